@@ -2,42 +2,72 @@
 
 from __future__ import annotations
 
+import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, TypeVar
 
+from .config import LLM_MAX_IN_FLIGHT
+
 T = TypeVar("T")
 
 
+def pack_batches(
+    items: List[Dict[str, Any]],
+    max_batch_size: int = 50,
+    max_tokens_estimate: int = 2000,
+) -> List[List[Dict[str, Any]]]:
+    # Remplit chaque batch jusqu'à max_batch_size items ou max_tokens_estimate tokens,
+    # en gardant l'ordre (un item plus gros que la limite part seul dans son batch)
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for item in items:
+        item_tokens = estimate_tokens(json.dumps(item, ensure_ascii=False))
+        if current and (
+            len(current) >= max_batch_size
+            or current_tokens + item_tokens > max_tokens_estimate
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 def process_in_batches(
     items: List[Dict[str, Any]],
     processor: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
     max_batch_size: int = 50,
     max_tokens_estimate: int = 2000,
+    max_in_flight: int = LLM_MAX_IN_FLIGHT,
 ) -> List[Dict[str, Any]]:
-    # Divise une grosse liste en petits morceaux et les traite un par un
+    # Divise une grosse liste en batches (par nombre d'items et de tokens estimés)
+    # et les traite en parallèle, max_in_flight à la fois ; les résultats gardent l'ordre
     if not items:
         return []
     
-    if len(items) <= max_batch_size:
+    batches = pack_batches(items, max_batch_size, max_tokens_estimate)
+    if len(batches) == 1:
         # Pas assez d'items, on traite tout d'un coup
         return processor(items)
     
-    # On divise en petits morceaux
-    results: List[Dict[str, Any]] = []
-    total_batches = (len(items) + max_batch_size - 1) // max_batch_size
+    total_batches = len(batches)
     
-    for batch_idx in range(0, len(items), max_batch_size):
-        batch = items[batch_idx : batch_idx + max_batch_size]
-        batch_num = (batch_idx // max_batch_size) + 1
-        
+    def _run(batch_num: int, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         print(f"   [BATCH] Traitement batch {batch_num}/{total_batches} ({len(batch)} items)...")
-        
         try:
-            processed_batch = processor(batch)
-            results.extend(processed_batch)
+            return processor(batch)
         except Exception as exc:
             print(f"   [ERROR] Erreur dans le batch {batch_num}: {exc}")
             # Si ça plante, on garde les items originaux
-            results.extend(batch)
+            return batch
+    
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, total_batches))) as executor:
+        for processed_batch in executor.map(_run, range(1, total_batches + 1), batches):
+            results.extend(processed_batch)
     
     return results
 
@@ -49,10 +79,7 @@ def estimate_tokens(text: str) -> int:
 
 def should_split_batch(items: List[Dict[str, Any]], max_tokens: int = 2000) -> bool:
     # Vérifie si un batch est trop gros et doit être divisé
-    import json
-    
     json_str = json.dumps(items, ensure_ascii=False)
     estimated_tokens = estimate_tokens(json_str)
     
     return estimated_tokens > max_tokens
-
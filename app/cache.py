@@ -0,0 +1,134 @@
+# Cache persistant des réponses d'API (SQLite), avec expiration et éviction LRU
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    # Clé stable à partir de n'importe quelles données sérialisables en JSON
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache clé → JSON stocké dans un fichier SQLite.
+
+    - Chaque entrée expire après `ttl_seconds` (0 = jamais)
+    - Au-delà de `max_entries`, les entrées les moins récemment lues sont supprimées
+    - Chaque écriture est une transaction : le fichier n'est jamais à moitié écrit
+    - Une connexion par opération, donc utilisable depuis plusieurs threads
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float = 0, max_entries: int = 0) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS entries ("
+                        " namespace TEXT NOT NULL,"
+                        " key TEXT NOT NULL,"
+                        " value TEXT NOT NULL,"
+                        " created_at REAL NOT NULL,"
+                        " accessed_at REAL NOT NULL,"
+                        " PRIMARY KEY (namespace, key))"
+                    )
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)"
+                    )
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, namespace: str, key: str, max_age: float | None = None) -> Optional[Any]:
+        # Retourne la valeur si présente et pas expirée, sinon None
+        # max_age (secondes) remplace le TTL par défaut pour cette lecture
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row is None:
+                    self._count(hit=False)
+                    return None
+                value, created_at = row
+                ttl = self.ttl_seconds if max_age is None else max_age
+                if ttl and now - created_at > ttl:
+                    conn.execute(
+                        "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                        (namespace, key),
+                    )
+                    self._count(hit=False)
+                    return None
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+        finally:
+            conn.close()
+        self._count(hit=True)
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        # Écrit la valeur puis supprime les entrées en trop (les moins récemment lues)
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, payload, now, now),
+                )
+                if self.max_entries:
+                    conn.execute(
+                        "DELETE FROM entries WHERE rowid IN ("
+                        " SELECT rowid FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+        finally:
+            conn.close()
+
+    def clear(self, namespace: str | None = None) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                if namespace is None:
+                    conn.execute("DELETE FROM entries")
+                else:
+                    conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
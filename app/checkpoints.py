@@ -0,0 +1,107 @@
+# Points de reprise du pipeline : sortie de chaque étape gardée sur disque avec l'empreinte de ses entrées
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from .config import PIPELINE_CHECKPOINT_DIR
+
+T = TypeVar("T")
+
+
+def input_hash(inputs: Any) -> str:
+    # Empreinte stable des entrées d'une étape (ordre des clés indifférent)
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCheckpoints:
+    """
+    Sorties des étapes du pipeline, une par fichier (<dossier>/<étape>.json).
+
+    Chaque étape passe par run() : sa sortie est écrite avec l'empreinte de ses
+    entrées. En reprise (resume), une étape dont les entrées n'ont pas changé
+    est relue au lieu d'être recalculée : une synchro Notion ratée se relance
+    sans refaire les appels Spoonacular ni OpenAI.
+
+    from_stage force le recalcul de cette étape et des suivantes ; les
+    précédentes sont reprises si leurs entrées n'ont pas changé.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[str],
+        directory: Path = PIPELINE_CHECKPOINT_DIR,
+        resume: bool = False,
+        from_stage: Optional[str] = None,
+        write: bool = True,
+    ) -> None:
+        if from_stage is not None and from_stage not in stages:
+            raise ValueError(f"Étape inconnue : {from_stage} (attendu : {', '.join(stages)})")
+        self.stages = list(stages)
+        self.directory = Path(directory)
+        self.resume = resume or from_stage is not None
+        self.from_index = self.stages.index(from_stage) if from_stage else len(self.stages)
+        self.write = write
+        self.reused: list[str] = []
+
+    def path(self, stage: str) -> Path:
+        return self.directory / f"{stage}.json"
+
+    def _can_reuse(self, stage: str) -> bool:
+        return self.resume and self.stages.index(stage) < self.from_index
+
+    def load(self, stage: str, digest: str) -> Optional[dict]:
+        path = self.path(stage)
+        if not path.exists():
+            return None
+        try:
+            saved = json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as exc:
+            print(f"   [WARN] Point de reprise illisible ({path.name}) : {exc}")
+            return None
+        if not isinstance(saved, dict) or saved.get("input_hash") != digest:
+            return None
+        return saved
+
+    def save(self, stage: str, digest: str, output: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(stage)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"stage": stage, "input_hash": digest, "saved_at": time.time(), "output": output},
+                ensure_ascii=False,
+                default=str,
+            ),
+            encoding="utf-8",
+        )
+        tmp_path.replace(path)
+
+    def run(
+        self,
+        stage: str,
+        inputs: Any,
+        compute: Callable[[], T],
+        keep: Callable[[T], bool] | None = None,
+    ) -> T:
+        # keep(sortie) → False : la sortie n'est pas gardée (étape à refaire au prochain run)
+        digest = input_hash(inputs)
+        if self._can_reuse(stage):
+            saved = self.load(stage, digest)
+            if saved is not None:
+                print(f"   ↪️  Étape '{stage}' reprise (entrées inchangées)")
+                self.reused.append(stage)
+                return saved["output"]
+
+        output = compute()
+        if self.write and (keep is None or keep(output)):
+            try:
+                self.save(stage, digest, output)
+            except (OSError, TypeError, ValueError) as exc:
+                print(f"   [WARN] Point de reprise non écrit pour '{stage}' : {exc}")
+        return output
@@ -121,6 +121,63 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or ""
 SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY") or ""
 SPOONACULAR_API_KEY2 = os.getenv("SPOONACULAR_API_KEY2") or ""
 SPOONACULAR_API_KEY3 = os.getenv("SPOONACULAR_API_KEY3") or ""
+# Toutes les clés Spoonacular : SPOONACULAR_API_KEYS (séparées par des virgules) puis les variables ci-dessus, sans doublon
+SPOONACULAR_API_KEYS = list(dict.fromkeys(
+    key.strip()
+    for key in [*os.getenv("SPOONACULAR_API_KEYS", "").split(","), SPOONACULAR_API_KEY, SPOONACULAR_API_KEY2, SPOONACULAR_API_KEY3]
+    if key.strip()
+))
+# Nombre de clés (les premières de la liste) gardées pour le widget (recherche de recettes) ; les courses prennent les autres
+SPOONACULAR_WIDGET_KEYS = int(os.getenv("SPOONACULAR_WIDGET_KEYS", "1"))
+# Points par clé et par jour supposés disponibles tant qu'aucune réponse n'a donné le vrai solde (offre gratuite : 150)
+SPOONACULAR_DAILY_QUOTA = float(os.getenv("SPOONACULAR_DAILY_QUOTA", "150"))
+# Solde de chaque clé (en-têtes X-API-Quota-*), gardé jusqu'au reset de minuit UTC
+SPOONACULAR_QUOTA_PATH = Path(os.getenv("SPOONACULAR_QUOTA_PATH") or DATA_DIR / "spoonacular_quota.json")
+
+# Spoonacular : nombre de recettes récupérées en parallèle et débit max par clé
+SPOONACULAR_MAX_WORKERS = int(os.getenv("SPOONACULAR_MAX_WORKERS", "4"))
+SPOONACULAR_REQUESTS_PER_SECOND = float(os.getenv("SPOONACULAR_REQUESTS_PER_SECOND", "5"))
+
+# Cache local des réponses Spoonacular (évite de repayer les mêmes requêtes)
+SPOONACULAR_CACHE_ENABLED = os.getenv("SPOONACULAR_CACHE_ENABLED", "true").lower() in {"true", "1", "yes"}
+SPOONACULAR_CACHE_PATH = Path(os.getenv("SPOONACULAR_CACHE_PATH") or DATA_DIR / "spoonacular_cache.sqlite3")
+SPOONACULAR_CACHE_TTL_DAYS = float(os.getenv("SPOONACULAR_CACHE_TTL_DAYS", "30"))
+SPOONACULAR_SEARCH_CACHE_TTL_HOURS = float(os.getenv("SPOONACULAR_SEARCH_CACHE_TTL_HOURS", "24"))
+SPOONACULAR_CACHE_MAX_ENTRIES = int(os.getenv("SPOONACULAR_CACHE_MAX_ENTRIES", "2000"))
+
+# Session HTTP partagée : nombre d'hôtes gardés en pool, connexions par hôte, timeout par défaut
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# Nombre de noms normalisés gardés en mémoire (normalize_aliment / normalize_text)
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "8192"))
+
+# Dictionnaires de synonymes d'aliments (regroupement "onions" / "oignon" sans LLM)
+SYNONYMS_PATH = DATA_DIR / "FOOD_SYNONYMS_ALL.json"
+LEARNED_SYNONYMS_PATH = DATA_DIR / "learned_synonyms.json"
+
+# Appels LLM découpés en batches : taille max d'un batch et nombre de batches en parallèle
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "40"))
+LLM_BATCH_MAX_TOKENS = int(os.getenv("LLM_BATCH_MAX_TOKENS", "2000"))
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+
+# Cache local des réponses LLM (relancer le pipeline avec les mêmes données ne coûte aucun token)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in {"true", "1", "yes"}
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH") or DATA_DIR / "llm_cache.sqlite3")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "7"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+
+# Base locale DuckDB (stock, menus et courses de chaque semaine) ; les JSON de data/ restent écrits
+STORE_ENABLED = os.getenv("STORE_ENABLED", "true").lower() in {"true", "1", "yes"}
+STORE_PATH = Path(os.getenv("STORE_PATH") or DATA_DIR / "food.duckdb")
+
+# Points de reprise du pipeline (--resume / --from-stage) : sortie de chaque étape + empreinte de ses entrées
+PIPELINE_CHECKPOINT_DIR = Path(os.getenv("PIPELINE_CHECKPOINT_DIR") or DATA_DIR / "checkpoints")
+# Étapes indépendantes du pipeline lancées en même temps (recettes et stock, pushes Notion...)
+PIPELINE_MAX_PARALLEL = int(os.getenv("PIPELINE_MAX_PARALLEL", "4"))
+# Trace écrite par --profile (format Chrome trace, lisible dans ui.perfetto.dev)
+PROFILE_TRACE_PATH = Path(os.getenv("PROFILE_TRACE_PATH") or DATA_DIR / "profile.trace.json")
 
 DIET = os.getenv("DIET", "high-protein")
 TARGET_CALORIES = int(os.getenv("TARGET_CALORIES", "2100"))
@@ -134,6 +191,23 @@ USE_MOCK_DATA = os.getenv("USE_MOCK_DATA", "false").lower() in {"true", "1", "ye
 HAS_NOTION = bool(api_key and NOTION_RECIPES_DB and NOTION_GROCERIES_DB)
 HAS_NOTION_STOCK = bool(api_key and NOTION_STOCK_DB)
 
+# Appels Notion : upserts en parallèle, sous la limite moyenne de ~3 requêtes/s
+# (NOTION_BURST = rafale tolérée avant d'être ramené au débit moyen)
+NOTION_MAX_WORKERS = int(os.getenv("NOTION_MAX_WORKERS", "3"))
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_BURST = int(os.getenv("NOTION_BURST", "5"))
+
+# Miroir local des bases Notion : relu tel quel s'il a moins de MAX_AGE secondes,
+# sinon seules les pages modifiées depuis la dernière synchro sont redemandées.
+# Chaque delta liste aussi tous les ids (titres seuls) pour retirer les pages supprimées ou archivées :
+# cette pagination complète coûte selon la taille de la base, pas selon le nombre de pages modifiées.
+# Toutes les FULL_SYNC_HOURS, le contenu de chaque page est relu et le miroir reconstruit : filet de sécurité
+# pour ce que last_edited_time ne signale pas (formules, rollups) ou un miroir abîmé.
+NOTION_MIRROR_ENABLED = os.getenv("NOTION_MIRROR_ENABLED", "true").lower() in {"true", "1", "yes"}
+NOTION_MIRROR_DIR = Path(os.getenv("NOTION_MIRROR_DIR") or DATA_DIR / "notion_mirror")
+NOTION_MIRROR_MAX_AGE_SECONDS = float(os.getenv("NOTION_MIRROR_MAX_AGE_SECONDS", "300"))
+NOTION_MIRROR_FULL_SYNC_HOURS = float(os.getenv("NOTION_MIRROR_FULL_SYNC_HOURS", "24"))
+
 # Notifications
 NTFY_TOPIC = os.getenv("NTFY_TOPIC", "")
 NTFY_USER = os.getenv("NTFY_USER", "")  # Optionnel : pour topics privés
@@ -0,0 +1,93 @@
+# Exécuteur de graphe d'étapes : chaque étape démarre dès que ses dépendances sont terminées
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .tracing import span
+
+
+@dataclass
+class Stage:
+    """Une étape : `run(résultats)` reçoit les sorties des étapes déjà terminées (au moins ses deps)."""
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Deux étapes portent le même nom")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Étape '{stage.name}' : dépendance inconnue {missing}")
+
+    # Tri topologique (Kahn) : s'il reste des étapes, il y a un cycle
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle entre les étapes : {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages: Sequence[Stage], max_parallel: int = 4) -> Dict[str, Any]:
+    """
+    Exécute les étapes en parallèle, chacune dès que ses dépendances sont prêtes.
+
+    La durée totale suit le chemin critique plutôt que la somme des étapes.
+    Avec max_parallel=1, les étapes passent une par une, dans l'ordre déclaré
+    (parmi celles qui sont prêtes). Si une étape échoue, plus aucune n'est
+    lancée ; celles en cours se terminent, puis l'erreur est relevée.
+
+    Args:
+        stages: Étapes, dans l'ordre de préférence
+        max_parallel: Nombre d'étapes en cours en même temps
+
+    Returns:
+        Dict nom d'étape → sortie
+    """
+    _check_graph(stages)
+
+    def run_one(stage: Stage, inputs: Dict[str, Any]) -> Any:
+        with span(stage.name, cat="stage"):
+            return stage.run(inputs)
+
+    max_parallel = max(1, max_parallel)
+    results: Dict[str, Any] = {}
+    pending: List[Stage] = list(stages)
+    running: Dict[Future, str] = {}
+    error: BaseException | None = None
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        while pending or running:
+            if error is None:
+                for stage in [s for s in pending if all(dep in results for dep in s.deps)]:
+                    if len(running) >= max_parallel:
+                        break
+                    pending.remove(stage)
+                    running[pool.submit(run_one, stage, dict(results))] = stage.name
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException as exc:
+                    if error is None:
+                        error = exc
+
+    if error is not None:
+        raise error
+    return results
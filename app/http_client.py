@@ -0,0 +1,108 @@
+# Session HTTP partagée (pool de connexions + keep-alive) pour tous les appels sortants
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_TIMEOUT
+from .tracing import is_enabled, span
+
+
+# Timeout (secondes) par hôte ; les autres hôtes utilisent HTTP_TIMEOUT
+HOST_TIMEOUTS: Dict[str, float] = {
+    "api.spoonacular.com": 30,
+    "ntfy.sh": 5,
+}
+
+# Catégorie des mesures (--profile) par hôte ; les autres hôtes sont rangés sous "http"
+HOST_CATEGORIES: Dict[str, str] = {
+    "api.spoonacular.com": "spoonacular",
+    "ntfy.sh": "ntfy",
+}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    # Crée la session au premier appel, puis la réutilise (les connexions restent ouvertes)
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def close_session() -> None:
+    # Ferme toutes les connexions du pool (la prochaine requête en recrée une)
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def timeout_for(url: str) -> float:
+    host = (urlsplit(url).hostname or "").lower()
+    return HOST_TIMEOUTS.get(host, HTTP_TIMEOUT)
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    # Comme requests.request, mais via la session partagée et avec le timeout de l'hôte
+    kwargs.setdefault("timeout", timeout_for(url))
+    if not is_enabled():
+        return get_session().request(method, url, **kwargs)
+
+    # Les identifiants dans le chemin (/recipes/123/information) sont regroupés sous un même nom
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    path = re.sub(r"/\d+(?=/|$)", "/{id}", parts.path)
+    category = HOST_CATEGORIES.get(host, "http")
+    with span(f"{category}:{method.upper()} {path}", cat=category, host=host) as measure:
+        response = get_session().request(method, url, **kwargs)
+        measure.set(status=response.status_code)
+        return response
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    # Par hôte : requêtes envoyées, connexions ouvertes, requêtes qui ont réutilisé une connexion
+    stats: Dict[str, Dict[str, int]] = {}
+    if _session is None:
+        return stats
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host_stats["requests"] += pool.num_requests
+            host_stats["connections"] += pool.num_connections
+            host_stats["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
@@ -4,17 +4,30 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from openai import OpenAI
 
-from .config import N_RECIPES_FINAL, OPENAI_API_KEY
+from .batch_processor import process_in_batches
+from .cache import ResponseCache, make_cache_key
+from .config import (
+    LLM_BATCH_MAX_ITEMS,
+    LLM_BATCH_MAX_TOKENS,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_DAYS,
+    N_RECIPES_FINAL,
+    OPENAI_API_KEY,
+)
 from .retry import retry_openai
+from .tracing import span
 from .validators import validate_courses_list, sanitize_course_item
 
 
 ROOT = Path(__file__).parent
 client = OpenAI(api_key=OPENAI_API_KEY)
+LLM_MODEL = "gpt-4o-mini"
 
 # Versioning des prompts
 PROMPT_VERSIONS = {
@@ -42,6 +55,68 @@ def get_prompt_version(filename: str) -> str:
     return PROMPT_VERSIONS.get(filename, "unknown")
 
 
+# Cache des réponses LLM : même fonction + modèle + version du prompt + température + entrée
+# → même réponse, sans tokens (ex: relance du pipeline après un échec Notion)
+_llm_cache: ResponseCache | None = (
+    ResponseCache(
+        LLM_CACHE_PATH,
+        ttl_seconds=LLM_CACHE_TTL_DAYS * 86400,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+    )
+    if LLM_CACHE_ENABLED
+    else None
+)
+
+
+def set_llm_cache_enabled(enabled: bool) -> None:
+    # Permet de forcer de vrais appels LLM (option --no-llm-cache)
+    global _llm_cache
+    if not enabled:
+        _llm_cache = None
+    elif _llm_cache is None:
+        _llm_cache = ResponseCache(
+            LLM_CACHE_PATH,
+            ttl_seconds=LLM_CACHE_TTL_DAYS * 86400,
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+        )
+
+
+def _cached_content(
+    function: str,
+    prompt_file: str,
+    temperature: float,
+    user_content: str,
+    create: Callable[[], Any],
+) -> str:
+    # Retourne le contenu de la réponse, depuis le cache si possible
+    # create() fait le vrai appel au LLM, seulement en cas d'absence dans le cache
+    cache = _llm_cache
+    key = make_cache_key(function, LLM_MODEL, get_prompt_version(prompt_file), temperature, user_content)
+    if cache is not None:
+        try:
+            cached = cache.get(function, key)
+        except Exception as exc:  # Le cache ne doit jamais bloquer un appel LLM
+            print(f"   [WARN] Cache LLM illisible : {exc}")
+            cached = None
+        if cached is not None:
+            print(f"   (Réponse LLM en cache pour {function})")
+            return cached
+
+    with span(f"openai:{function}", cat="openai", model=LLM_MODEL):
+        response = create()
+    content = response.choices[0].message.content or "{}"
+
+    if cache is not None:
+        try:
+            json.loads(content)  # On ne garde que les réponses exploitables
+            cache.set(function, key, content)
+        except json.JSONDecodeError:
+            pass
+        except Exception as exc:
+            print(f"   [WARN] Écriture du cache LLM impossible : {exc}")
+    return content
+
+
 def _lite_candidates(candidates: List[Dict[str, Any]], limit: int = 25) -> List[Dict[str, Any]]:
     # Filtre et réduit les recettes pour pas envoyer trop de données au LLM
 
@@ -96,15 +171,16 @@ def choose_recipes(candidates: List[Dict[str, Any]], stock: List[str]) -> List[D
         f"{json.dumps(lite, ensure_ascii=False, indent=2)}\n"
     )
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        max_tokens=1500,
-        response_format={"type": "json_object"},
-        messages=[{"role": "user", "content": user_content}],
-    )
+    def _call_llm():
+        return client.chat.completions.create(
+            model=LLM_MODEL,
+            temperature=0.3,
+            max_tokens=1500,
+            response_format={"type": "json_object"},
+            messages=[{"role": "user", "content": user_content}],
+        )
 
-    content = response.choices[0].message.content or "{}"
+    content = _cached_content("choose_recipes", "choose_recipes.txt", 0.3, user_content, _call_llm)
     data = json.loads(content)
     recipes = data.get("recipes") or data.get("Recettes") or data
     return recipes
@@ -133,15 +209,16 @@ def consolidate_groceries_llm(selected: List[Dict[str, Any]], stock: List[str])
         f"{json.dumps(selected, ensure_ascii=False, indent=2)}\n"
     )
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.2,
-        max_tokens=2000,
-        response_format={"type": "json_object"},
-        messages=[{"role": "user", "content": user_content}],
-    )
+    def _call_llm():
+        return client.chat.completions.create(
+            model=LLM_MODEL,
+            temperature=0.2,
+            max_tokens=2000,
+            response_format={"type": "json_object"},
+            messages=[{"role": "user", "content": user_content}],
+        )
 
-    content = response.choices[0].message.content or "{}"
+    content = _cached_content("consolidate_groceries_llm", "consolidate.txt", 0.2, user_content, _call_llm)
 
     try:
         data = json.loads(content)
@@ -177,6 +254,16 @@ def deduplicate_courses_llm(courses: List[Dict[str, Any]]) -> List[Dict[str, Any
     if not is_valid:
         raise ValueError(f"Données invalides: {', '.join(errors)}")
     
+    # Liste longue : batches en parallèle (la liste est triée, les noms proches restent ensemble)
+    return process_in_batches(
+        courses,
+        _deduplicate_batch,
+        max_batch_size=LLM_BATCH_MAX_ITEMS,
+        max_tokens_estimate=LLM_BATCH_MAX_TOKENS,
+    )
+
+
+def _deduplicate_batch(courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     prompt_template = _load_prompt("deduplicate_courses.txt")
     
     user_content = (
@@ -188,16 +275,16 @@ def deduplicate_courses_llm(courses: List[Dict[str, Any]]) -> List[Dict[str, Any
     @retry_openai(max_attempts=3, base_delay=1.0)
     def _call_llm():
         return client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=LLM_MODEL,
             temperature=0.1,
             max_tokens=3000,
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": user_content}],
         )
     
-    response = _call_llm()
-    
-    content = response.choices[0].message.content or "{}"
+    content = _cached_content(
+        "deduplicate_courses_llm", "deduplicate_courses.txt", 0.1, user_content, _call_llm
+    )
     
     try:
         data = json.loads(content)
@@ -243,16 +330,11 @@ def complete_quantities_llm(
         raise ValueError(f"Données invalides avant appel LLM: {', '.join(errors)}")
     
     # Trouve les items sans quantités
-    items_without_qty = [
-        item for item in courses 
-        if not item.get("Quantité") or item.get("Quantité") == "" or item.get("Quantité") == 0
-    ]
+    items_without_qty = [item for item in courses if _is_missing_quantity(item)]
     
     if not items_without_qty:
         return courses  # Déjà tout rempli
     
-    prompt_template = _load_prompt("complete_quantities.txt")
-    
     # Récupère les infos des recettes pour que le LLM puisse calculer les quantités
     recipes_context = []
     if recipes:
@@ -289,6 +371,45 @@ def complete_quantities_llm(
             }
             recipes_context.append(recipe_info)
     
+    # Liste longue : batches en parallèle, chacun avec les seules recettes qui le concernent
+    def _complete_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not any(_is_missing_quantity(item) for item in batch):
+            return batch
+        return _complete_quantities_batch(batch, _recipes_for(batch, recipes_context))
+    
+    return process_in_batches(
+        courses,
+        _complete_batch,
+        max_batch_size=LLM_BATCH_MAX_ITEMS,
+        max_tokens_estimate=LLM_BATCH_MAX_TOKENS,
+    )
+
+
+def _is_missing_quantity(item: Dict[str, Any]) -> bool:
+    return not item.get("Quantité") or item.get("Quantité") == "" or item.get("Quantité") == 0
+
+
+def _recipes_for(
+    batch: List[Dict[str, Any]],
+    recipes_context: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    # Garde les recettes citées dans le champ "Recettes" du batch (toutes si aucune ne l'est)
+    names = {
+        name.strip().lower()
+        for item in batch
+        for name in str(item.get("Recettes") or "").split(",")
+        if name.strip()
+    }
+    matching = [recipe for recipe in recipes_context if recipe["Nom"].strip().lower() in names]
+    return matching or recipes_context
+
+
+def _complete_quantities_batch(
+    courses: List[Dict[str, Any]],
+    recipes_context: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    prompt_template = _load_prompt("complete_quantities.txt")
+    
     user_content = (
         f"{prompt_template}\n\n"
         f"Liste de courses avec quantités manquantes (format JSON):\n"
@@ -304,16 +425,16 @@ def complete_quantities_llm(
     @retry_openai(max_attempts=3, base_delay=1.0)
     def _call_llm():
         return client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=LLM_MODEL,
             temperature=0.2,
             max_tokens=3000,
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": user_content}],
         )
     
-    response = _call_llm()
-    
-    content = response.choices[0].message.content or "{}"
+    content = _cached_content(
+        "complete_quantities_llm", "complete_quantities.txt", 0.2, user_content, _call_llm
+    )
     
     try:
         data = json.loads(content)
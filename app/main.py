@@ -8,20 +8,40 @@ import json
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Sequence
+from typing import Any, Callable, Dict, Iterable, List, Sequence
 
+from .checkpoints import StageCheckpoints, input_hash
 from .config import (
     DATA_DIR,
     OPENAI_API_KEY,
-    SPOONACULAR_API_KEY,
-    SPOONACULAR_API_KEY2,
+    PIPELINE_CHECKPOINT_DIR,
+    PIPELINE_MAX_PARALLEL,
+    PROFILE_TRACE_PATH,
+    SPOONACULAR_API_KEYS,
     USE_MOCK_DATA,
     N_RECIPES_FINAL,
 )
-from .llm import choose_recipes, consolidate_groceries_llm, deduplicate_courses_llm, complete_quantities_llm
-from .shopping import consolidate_groceries, merge_courses, prepare_stock_lookup
+from .dag import Stage, run_stages
+from .llm import (
+    choose_recipes,
+    complete_quantities_llm,
+    consolidate_groceries_llm,
+    deduplicate_courses_llm,
+    set_llm_cache_enabled,
+)
+from .shopping import (
+    consolidate_groceries,
+    merge_courses,
+    normalize_aliment,
+    prepare_stock_lookup,
+    split_near_duplicates,
+)
 from .spoonacular import get_candidate_recipes
-from notion_tools.fetch.fetch_stock import fetch_stock as fetch_stock_from_notion
+from .stock import StockItem, write_snapshot
+from .store import record as record_in_store
+from .tracing import profiling, traced
+from .utils import week_label
+from notion_tools.fetch.fetch_stock import fetch_stock_snapshot
 
 
 @dataclass
@@ -30,6 +50,10 @@ class PipelineOptions:
     dry_run: bool
     llm_enabled: bool
     llm_fallback: bool
+    llm_cache: bool = True
+    resume: bool = False
+    from_stage: str | None = None
+    max_parallel: int = PIPELINE_MAX_PARALLEL
 
 
 PROJECT_ROOT = DATA_DIR.parent
@@ -75,10 +99,18 @@ def _save_json(path: Path, data: object, options: PipelineOptions) -> None:
     print(f"   Fichier mis à jour -> {display_path}")
 
 
+def _save_week(action: str, *args: object, options: PipelineOptions) -> None:
+    # Copie dans le store DuckDB (historique par semaine), en plus des JSON
+    if not options.dry_run:
+        record_in_store(action, *args)
+
+
 def _stock_names(stock: Sequence[object]) -> List[str]:
     names: List[str] = []
     for item in stock:
-        if isinstance(item, dict):
+        if isinstance(item, StockItem):
+            name = item.name
+        elif isinstance(item, dict):
             name = (
                 item.get("Aliment")
                 or item.get("Name")
@@ -178,70 +210,43 @@ def _print_summary(recipes: List[Dict[str, Any]]) -> None:
         print(f"  {idx}. {name} - {time} min | ~{calories} kcal | ~{protein} g protéines")
 
 
-def build_pipeline(
-    *,
-    query: str | None,
-    stock_path: Path,
-    options: PipelineOptions,
-    refresh_stock: bool,
-    mealplan_start_date: str | None = None,
-) -> None:
-    # Vérifie les clés API nécessaires
-    if options.llm_enabled and not OPENAI_API_KEY:
-        raise RuntimeError(
-            "OPENAI_API_KEY manquant. Ajoute la clé dans .env ou lance avec --no-llm."
-        )
-
-    if options.mode == "prod":
-        if not SPOONACULAR_API_KEY and not SPOONACULAR_API_KEY2:
-            raise RuntimeError("Mode prod : au moins une clé SPOONACULAR_API_KEY est requise.")
-    else:
-        os.environ.setdefault("USE_MOCK_DATA", "true")
-
-    if not stock_path.is_absolute():
-        stock_path = (PROJECT_ROOT / stock_path).resolve()
-
-    print("Récupération des recettes...")
-    candidates = get_candidate_recipes(query=query)
-    print(f"   {len(candidates)} recettes trouvées")
+# Étapes du pipeline, dans l'ordre (--from-stage en accepte une)
+PIPELINE_STAGES = (
+    "candidates",
+    "selection",
+    "consolidation",
+    "merge",
+    "dedup",
+    "quantities",
+    "sync_recipes",
+    "sync_mealplan",
+    "sync_groceries",
+)
 
-    if refresh_stock and options.mode == "prod":
-        print("Rafraîchissement du stock depuis Notion...")
-        try:
-            stock_snapshot = fetch_stock_from_notion()
-        except Exception as exc:  # pragma: no cover - dépend Notion
-            print(f"   Impossible de rafraîchir le stock : {exc}")
-        else:
-            if not options.dry_run:
-                try:
-                    stock_path.parent.mkdir(parents=True, exist_ok=True)
-                except Exception:
-                    pass
-                stock_path.write_text(
-                    json.dumps(stock_snapshot, ensure_ascii=False, indent=2),
-                    encoding="utf-8",
-                )
-            try:
-                display_path = stock_path.relative_to(PROJECT_ROOT)
-            except ValueError:
-                display_path = stock_path
-            print(f"   Stock mis à jour -> {display_path}")
-    elif refresh_stock:
-        print("   (Rafraîchissement ignoré en mode mock)")
 
-    print("Chargement du stock local...")
-    stock = prepare_stock_lookup(stock_path)
-    if stock:
-        try:
-            display_path = stock_path.relative_to(PROJECT_ROOT)
-        except ValueError:
-            display_path = stock_path
-        print(f"   {len(stock)} éléments dans {display_path}")
-    else:
-        print("   (Aucun stock local, lance fetch_stock.py si besoin)")
+def _refresh_stock(stock_path: Path, options: PipelineOptions) -> None:
+    print("Rafraîchissement du stock depuis Notion...")
+    try:
+        stock_items, stock_schema = fetch_stock_snapshot()
+    except Exception as exc:  # pragma: no cover - dépend Notion
+        print(f"   Impossible de rafraîchir le stock : {exc}")
+        return
+    if not options.dry_run:
+        # Snapshot compact : schéma en en-tête, une ligne par article
+        write_snapshot(stock_path, stock_items, stock_schema)
+        record_in_store("replace_stock", stock_items)
+    try:
+        display_path = stock_path.relative_to(PROJECT_ROOT)
+    except ValueError:
+        display_path = stock_path
+    print(f"   Stock mis à jour -> {display_path}")
 
-    stock_names = _stock_names(stock)
 
+def _select_recipes(
+    candidates: List[Dict[str, Any]],
+    stock_names: List[str],
+    options: PipelineOptions,
+) -> List[Dict[str, Any]]:
     if options.llm_enabled:
         print("Sélection des recettes via LLM...")
         selected = choose_recipes(candidates, stock_names)
@@ -252,10 +257,15 @@ def build_pipeline(
         selected = candidates[:N_RECIPES_FINAL]
 
     print(f"   {len(selected)} recettes retenues")
+    return _enrich_with_ingredients(selected, candidates)
 
-    selected = _enrich_with_ingredients(selected, candidates)
-    _save_json(MENU_PATH, selected, options)
 
+def _consolidate(
+    selected: List[Dict[str, Any]],
+    stock: Sequence[object],
+    stock_names: List[str],
+    options: PipelineOptions,
+) -> List[Dict[str, Any]]:
     print("Consolidation de la liste de courses...")
     groceries = consolidate_groceries(selected, stock=stock)
 
@@ -269,9 +279,10 @@ def build_pipeline(
             if groceries_llm:
                 groceries = groceries_llm
                 print("   Quantités ajoutées via LLM")
+    return groceries
 
-    _save_json(GROCERIES_PATH, groceries, options)
 
+def _merge(groceries: List[Dict[str, Any]], stock: Sequence[object]) -> List[Dict[str, Any]]:
     print("Fusion finale des achats...")
     try:
         merged, stats = merge_courses(
@@ -289,97 +300,271 @@ def build_pipeline(
         # On continue avec la liste non fusionnée plutôt que de planter
         merged = groceries
         print("   (Utilisation de la liste non fusionnée)")
-    
-    if options.llm_enabled and len(merged) > 0:
-        print("Nettoyage et déduplication via LLM...")
-        try:
-            cleaned = deduplicate_courses_llm(merged)
-            if cleaned and isinstance(cleaned, list) and len(cleaned) > 0:
-                # Même si la longueur est pareille, le LLM peut avoir normalisé les noms
-                original_len = len(merged)
-                merged = cleaned
-                if len(cleaned) < original_len:
-                    print(f"   Liste nettoyée : {len(merged)} items (avant : {original_len})")
-                else:
-                    print(f"   Liste normalisée : {len(merged)} items")
+    return merged
+
+
+def _deduplicate(merged: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Doublons exacts et synonymes déjà fusionnés : seuls les noms proches vont au LLM
+    clear, ambiguous = split_near_duplicates(merged)
+    if not ambiguous:
+        print("Déduplication : aucun doublon ambigu, LLM non sollicité")
+        return merged
+
+    print(f"Nettoyage et déduplication via LLM ({len(ambiguous)}/{len(merged)} items ambigus)...")
+    try:
+        cleaned = deduplicate_courses_llm(ambiguous)
+        if cleaned and isinstance(cleaned, list) and len(cleaned) > 0:
+            # Même si la longueur est pareille, le LLM peut avoir normalisé les noms
+            original_len = len(merged)
+            merged = sorted(clear + cleaned, key=lambda x: normalize_aliment(x.get("Aliment")))
+            if len(merged) < original_len:
+                print(f"   Liste nettoyée : {len(merged)} items (avant : {original_len})")
             else:
-                print("   (Aucun changement)")
-        except Exception as exc:  # pragma: no cover - dépend du service externe
-            print(f"   Impossible : {exc}")
-            print("   (Utilisation de la liste consolidée)")
-        
-        # Compléter les quantités manquantes
-        items_without_qty = [
-            item for item in merged 
-            if not item.get("Quantité") or item.get("Quantité") == "" or item.get("Quantité") == 0
-        ]
-        if items_without_qty:
-            print(f"Complétion des quantités manquantes via LLM ({len(items_without_qty)} items)...")
+                print(f"   Liste normalisée : {len(merged)} items")
+        else:
+            print("   (Aucun changement)")
+    except Exception as exc:  # pragma: no cover - dépend du service externe
+        print(f"   Impossible : {exc}")
+        print("   (Utilisation de la liste consolidée)")
+    return merged
+
+
+def _complete_quantities(
+    merged: List[Dict[str, Any]],
+    selected: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    items_without_qty = [
+        item for item in merged 
+        if not item.get("Quantité") or item.get("Quantité") == "" or item.get("Quantité") == 0
+    ]
+    if not items_without_qty:
+        return merged
+
+    print(f"Complétion des quantités manquantes via LLM ({len(items_without_qty)} items)...")
+    try:
+        completed = complete_quantities_llm(merged, selected)
+        if completed and isinstance(completed, list) and len(completed) > 0:
+            merged = completed
+            completed_count = len([
+                item for item in merged 
+                if item.get("Quantité") and item.get("Quantité") != "" and item.get("Quantité") != 0
+            ])
+            print(f"   {completed_count}/{len(merged)} items ont maintenant une quantité")
+        else:
+            print("   (Aucune quantité complétée)")
+    except Exception as exc:  # pragma: no cover - dépend du service externe
+        print(f"   Impossible : {exc}")
+        print("   (Utilisation de la liste sans quantités complétées)")
+    return merged
+
+
+def _notion_sync_config() -> Any:
+    # Config Notion si la synchro est active, sinon None (message affiché)
+    try:
+        from integrations.notion.config import get_config
+
+        notion_config = get_config()
+    except Exception as exc:
+        # Si l'import échoue (module non installé, etc.), on continue
+        print(f"\n   ⚠️  Impossible de charger l'intégration Notion : {exc}")
+        return None
+
+    if not notion_config.sync_enabled:
+        print("\n   (Synchronisation Notion désactivée, NOTION_SYNC_ENABLED=false)")
+        return None
+    return notion_config
+
+
+def _push_to_notion(kind: str, mealplan_start_date: str | None = None) -> Dict[str, Any]:
+    # Un push Notion ("recipes", "mealplan", "groceries") ; {"ok": False} en cas d'échec
+    try:
+        if kind == "recipes":
+            from integrations.notion.recipes import push_recipes_to_notion
+
+            print("   📝 Push des recettes...")
+            result = push_recipes_to_notion(path=MENU_PATH, dry_run=False)
+        elif kind == "mealplan":
+            from datetime import date
+            from integrations.notion.mealplan import push_mealplan_to_notion
+
+            print("   📅 Push du plan de repas...")
+            start_date = date.fromisoformat(mealplan_start_date) if mealplan_start_date else None
+            result = push_mealplan_to_notion(path=MENU_PATH, start_date=start_date, dry_run=False)
+        else:
+            from integrations.notion.groceries import push_groceries_to_notion
+
+            print("   🛒 Push de la liste de courses...")
+            result = push_groceries_to_notion(path=ACHATS_PATH, dry_run=False)
+    except Exception as exc:
+        print(f"   ❌ Erreur lors de la synchronisation Notion ({kind}) : {exc}")
+        # On continue même si Notion échoue
+        return {"ok": False}
+
+    # Des articles en erreur : le push sera refait au prochain --resume
+    return {**result, "ok": not result.get("n_errors")}
+
+
+@traced("pipeline", cat="pipeline")
+def build_pipeline(
+    *,
+    query: str | None,
+    stock_path: Path,
+    options: PipelineOptions,
+    refresh_stock: bool,
+    mealplan_start_date: str | None = None,
+) -> None:
+    # Vérifie les clés API nécessaires
+    if options.llm_enabled and not OPENAI_API_KEY:
+        raise RuntimeError(
+            "OPENAI_API_KEY manquant. Ajoute la clé dans .env ou lance avec --no-llm."
+        )
+
+    if not options.llm_cache:
+        set_llm_cache_enabled(False)
+        print("(Cache LLM désactivé, toutes les réponses seront recalculées)")
+
+    if options.mode == "prod":
+        if not SPOONACULAR_API_KEYS:
+            raise RuntimeError("Mode prod : au moins une clé SPOONACULAR_API_KEY est requise.")
+    else:
+        os.environ.setdefault("USE_MOCK_DATA", "true")
+
+    if not stock_path.is_absolute():
+        stock_path = (PROJECT_ROOT / stock_path).resolve()
+
+    # Points de reprise : écrits à chaque run (sauf dry-run), relus avec --resume / --from-stage
+    checkpoints = StageCheckpoints(
+        PIPELINE_STAGES,
+        directory=PIPELINE_CHECKPOINT_DIR,
+        resume=options.resume,
+        from_stage=options.from_stage,
+        write=not options.dry_run,
+    )
+    semaine = week_label()
+    llm_key = {"llm": options.llm_enabled, "fallback": options.llm_fallback}
+
+    # Étapes du graphe : chacune reçoit les sorties des étapes terminées
+    def candidates_stage(_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        print("Récupération des recettes...")
+        candidates = checkpoints.run(
+            "candidates",
+            {"mode": options.mode, "query": query, "semaine": semaine},
+            lambda: get_candidate_recipes(query=query),
+        )
+        print(f"   {len(candidates)} recettes trouvées")
+        return candidates
+
+    def stock_stage(_results: Dict[str, Any]) -> Dict[str, Any]:
+        if refresh_stock and options.mode == "prod":
+            _refresh_stock(stock_path, options)
+        elif refresh_stock:
+            print("   (Rafraîchissement ignoré en mode mock)")
+
+        print("Chargement du stock local...")
+        stock = prepare_stock_lookup(stock_path)
+        if stock:
             try:
-                completed = complete_quantities_llm(merged, selected)
-                if completed and isinstance(completed, list) and len(completed) > 0:
-                    merged = completed
-                    completed_count = len([
-                        item for item in merged 
-                        if item.get("Quantité") and item.get("Quantité") != "" and item.get("Quantité") != 0
-                    ])
-                    print(f"   {completed_count}/{len(merged)} items ont maintenant une quantité")
-                else:
-                    print("   (Aucune quantité complétée)")
-            except Exception as exc:  # pragma: no cover - dépend du service externe
-                print(f"   Impossible : {exc}")
-                print("   (Utilisation de la liste sans quantités complétées)")
-    
-    _save_json(ACHATS_PATH, merged, options)
-
-    # Synchronisation Notion (si activée)
-    if not options.dry_run:
-        try:
-            from integrations.notion.config import get_config
-            
-            notion_config = get_config()
-            if notion_config.sync_enabled:
-                print("\n🔄 Synchronisation vers Notion...")
-                
-                try:
-                    from integrations.notion.recipes import push_recipes_to_notion
-                    from integrations.notion.mealplan import push_mealplan_to_notion
-                    from integrations.notion.groceries import push_groceries_to_notion
-                    
-                    # Push recettes
-                    print("   📝 Push des recettes...")
-                    recipes_result = push_recipes_to_notion(path=MENU_PATH, dry_run=False)
-                    
-                    # Push meal plan (si DB configurée)
-                    if notion_config.mealplan_db_id:
-                        print("   📅 Push du plan de repas...")
-                        from datetime import date
-                        start_date = None
-                        if mealplan_start_date:
-                            start_date = date.fromisoformat(mealplan_start_date)
-                        mealplan_result = push_mealplan_to_notion(
-                            path=MENU_PATH,
-                            start_date=start_date,
-                            dry_run=False
-                        )
-                    else:
-                        print("   ⚠️  Meal Plan DB non configurée, skip")
-                    
-                    # Push courses
-                    print("   🛒 Push de la liste de courses...")
-                    groceries_result = push_groceries_to_notion(path=ACHATS_PATH, dry_run=False)
-                    
-                    print("   ✅ Synchronisation Notion terminée")
-                except Exception as exc:
-                    print(f"   ❌ Erreur lors de la synchronisation Notion : {exc}")
-                    # On continue même si Notion échoue
-            else:
-                print("\n   (Synchronisation Notion désactivée, NOTION_SYNC_ENABLED=false)")
-        except Exception as exc:
-            # Si l'import échoue (module non installé, etc.), on continue
-            print(f"\n   ⚠️  Impossible de charger l'intégration Notion : {exc}")
+                display_path = stock_path.relative_to(PROJECT_ROOT)
+            except ValueError:
+                display_path = stock_path
+            print(f"   {len(stock)} éléments dans {display_path}")
+        else:
+            print("   (Aucun stock local, lance fetch_stock.py si besoin)")
+        return {
+            "items": stock,
+            "names": _stock_names(stock),
+            "key": [item.to_row() if isinstance(item, StockItem) else item for item in stock],
+        }
+
+    def selection_stage(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        candidates, stock = results["candidates"], results["stock"]
+        selected = checkpoints.run(
+            "selection",
+            {"candidates": input_hash(candidates), "stock": stock["names"], "n": N_RECIPES_FINAL, **llm_key},
+            lambda: _select_recipes(candidates, stock["names"], options),
+        )
+        _save_json(MENU_PATH, selected, options)
+        _save_week("replace_recipes", semaine, selected, options=options)
+        return selected
+
+    def consolidation_stage(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        selected, stock = results["selection"], results["stock"]
+        groceries = checkpoints.run(
+            "consolidation",
+            {"selected": selected, "stock": stock["key"], **llm_key},
+            lambda: _consolidate(selected, stock["items"], stock["names"], options),
+        )
+        _save_json(GROCERIES_PATH, groceries, options)
+        _save_week("replace_groceries", semaine, "groceries", groceries, options=options)
+        return groceries
+
+    def merge_stage(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        groceries, stock = results["consolidation"], results["stock"]
+        return checkpoints.run(
+            "merge",
+            {"groceries": groceries, "stock": stock["key"]},
+            lambda: _merge(groceries, stock["items"]),
+        )
+
+    def dedup_stage(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        merged = results["merge"]
+        if not (options.llm_enabled and merged):
+            return merged
+        return checkpoints.run("dedup", {"merged": merged}, lambda: _deduplicate(merged))
+
+    def quantities_stage(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        merged, selected = results["dedup"], results["selection"]
+        if options.llm_enabled and merged:
+            # Compléter les quantités manquantes
+            merged = checkpoints.run(
+                "quantities",
+                {"merged": merged, "selected": selected},
+                lambda: _complete_quantities(merged, selected),
+            )
+        _save_json(ACHATS_PATH, merged, options)
+        _save_week("replace_groceries", semaine, "achats", merged, options=options)
+        return merged
+
+    def push_stage(kind: str, inputs_from: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        # Push gardé comme point de reprise seulement s'il a réussi
+        def run(results: Dict[str, Any]) -> Dict[str, Any]:
+            return checkpoints.run(
+                f"sync_{kind}",
+                {"data": results[inputs_from], "start": mealplan_start_date, "semaine": semaine},
+                lambda: _push_to_notion(kind, mealplan_start_date),
+                keep=lambda result: bool(result.get("ok")),
+            )
+        return run
+
+    stages = [
+        Stage("candidates", candidates_stage),
+        Stage("stock", stock_stage),
+        Stage("selection", selection_stage, ("candidates", "stock")),
+        Stage("consolidation", consolidation_stage, ("selection", "stock")),
+        Stage("merge", merge_stage, ("consolidation", "stock")),
+        Stage("dedup", dedup_stage, ("merge",)),
+        Stage("quantities", quantities_stage, ("dedup", "selection")),
+    ]
+
+    # Synchronisation Notion (si activée) : les recettes partent dès menu.json écrit,
+    # le plan de repas attend les recettes (relations), les courses attendent achats_filtres.json
+    notion_config = None if options.dry_run else _notion_sync_config()
+    if notion_config is not None:
+        print("\n🔄 Synchronisation vers Notion (dès que chaque fichier est prêt)...")
+        stages.append(Stage("sync_recipes", push_stage("recipes", "selection"), ("selection",)))
+        if notion_config.mealplan_db_id:
+            stages.append(Stage("sync_mealplan", push_stage("mealplan", "selection"), ("sync_recipes",)))
+        else:
+            print("   ⚠️  Meal Plan DB non configurée, skip")
+        stages.append(Stage("sync_groceries", push_stage("groceries", "quantities"), ("quantities",)))
+
+    results = run_stages(stages, max_parallel=options.max_parallel)
 
-    _print_summary(selected)
+    pushes = [results[name] for name in ("sync_recipes", "sync_mealplan", "sync_groceries") if name in results]
+    if pushes and all(push.get("ok") for push in pushes):
+        print("   ✅ Synchronisation Notion terminée")
+
+    _print_summary(results["selection"])
 
 
 def parse_args() -> argparse.Namespace:
@@ -417,6 +602,40 @@ def parse_args() -> argparse.Namespace:
         help="Désactive la sélection et la consolidation LLM",
         action="store_true",
     )
+    parser.add_argument(
+        "--no-llm-cache",
+        help="Ignore le cache des réponses LLM (force de nouveaux appels)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--resume",
+        help="Reprend les étapes dont les entrées n'ont pas changé (data/checkpoints/)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help="Refait cette étape et les suivantes, reprend les précédentes (implique --resume)",
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=PIPELINE_MAX_PARALLEL,
+        help="Nombre d'étapes indépendantes lancées en même temps (1 = une par une)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_TRACE_PATH,
+        default=None,
+        type=Path,
+        metavar="TRACE_JSON",
+        help=(
+            "Mesure la durée des étapes et des appels Notion/Spoonacular/OpenAI : "
+            f"résumé affiché et trace Chrome/Perfetto écrite (défaut: {PROFILE_TRACE_PATH})"
+        ),
+    )
     parser.add_argument(
         "--mealplan-start-date",
         type=str,
@@ -433,15 +652,20 @@ def main() -> None:
         dry_run=args.dry_run,
         llm_enabled=not args.no_llm,
         llm_fallback=not args.no_llm_fallback,
+        llm_cache=not args.no_llm_cache,
+        resume=args.resume,
+        from_stage=args.from_stage,
+        max_parallel=args.max_parallel,
     )
 
-    build_pipeline(
-        query=args.query,
-        stock_path=args.stock_path,
-        options=options,
-        refresh_stock=args.refresh_stock,
-        mealplan_start_date=args.mealplan_start_date,
-    )
+    with profiling(args.profile):
+        build_pipeline(
+            query=args.query,
+            stock_path=args.stock_path,
+            options=options,
+            refresh_stock=args.refresh_stock,
+            mealplan_start_date=args.mealplan_start_date,
+        )
 
 
 if __name__ == "__main__":
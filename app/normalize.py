@@ -0,0 +1,111 @@
+# Normalisation des noms (aliments, titres Notion), mémorisée pour ne pas refaire unidecode
+
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from unidecode import unidecode
+
+from .config import LEARNED_SYNONYMS_PATH, NORMALIZE_CACHE_SIZE, SYNONYMS_PATH
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_aliment(name: str) -> str:
+    return unidecode(name).strip().lower()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_text(text: str) -> str:
+    return unidecode(text.strip().lower())
+
+
+def normalize_aliment(name: str | None) -> str:
+    # Clé de regroupement d'un aliment : sans accents, minuscules, sans espaces autour
+    if not name:
+        return ""
+    return _normalize_aliment(str(name))
+
+
+def normalize_text(text: str | None) -> str:
+    # Clé de comparaison d'un texte (titres Notion, unités)
+    if not text:
+        return ""
+    return _normalize_text(str(text))
+
+
+def _read_json(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as exc:
+        print(f"   [WARN] Synonymes illisibles ({path.name}) : {exc}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+@lru_cache(maxsize=1)
+def _synonym_table() -> Dict[str, str]:
+    # Table inversée variante normalisée → clé canonique, construite une seule fois
+    # FOOD_SYNONYMS_ALL.json : {"canonique": ["variante", ...]}
+    # learned_synonyms.json : {"variante": "canonique"} (prioritaire)
+    table: Dict[str, str] = {}
+    ambiguous = set()
+    for canonical, variants in _read_json(SYNONYMS_PATH).items():
+        canonical_key = normalize_aliment(canonical)
+        if not canonical_key:
+            continue
+        for variant in [canonical, *(variants or [])]:
+            variant_key = normalize_aliment(variant)
+            if not variant_key:
+                continue
+            if table.get(variant_key, canonical_key) != canonical_key:
+                # Ex: "pepper" est à la fois poivron et poivre → on ne devine pas
+                ambiguous.add(variant_key)
+            table[variant_key] = canonical_key
+    for variant_key in ambiguous:
+        table.pop(variant_key, None)
+
+    for variant, canonical in _read_json(LEARNED_SYNONYMS_PATH).items():
+        variant_key = normalize_aliment(variant)
+        canonical_key = normalize_aliment(canonical)
+        if variant_key and canonical_key:
+            table[variant_key] = canonical_key
+    return table
+
+
+def canonical_aliment(name: str | None) -> str:
+    # Clé de regroupement tenant compte des synonymes ("onions", "oignon" → "oignon")
+    norm = normalize_aliment(name)
+    return _synonym_table().get(norm, norm)
+
+
+@lru_cache(maxsize=1)
+def synonyms_fingerprint() -> str:
+    # Empreinte des synonymes : des clés canoniques calculées avec une autre table sont à refaire
+    raw = json.dumps(_synonym_table(), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def reload_synonyms() -> None:
+    # À appeler après une modification des fichiers de synonymes
+    _synonym_table.cache_clear()
+    synonyms_fingerprint.cache_clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    # Hits / misses / taille de chaque cache (pour vérifier qu'il sert vraiment)
+    stats: Dict[str, Dict[str, int]] = {}
+    for name, func in (("aliment", _normalize_aliment), ("text", _normalize_text)):
+        info = func.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+    return stats
+
+
+def clear_cache() -> None:
+    _normalize_aliment.cache_clear()
+    _normalize_text.cache_clear()
@@ -6,6 +6,8 @@ import time
 from functools import wraps
 from typing import Any, Callable, TypeVar
 
+from .tracing import span
+
 T = TypeVar("T")
 
 
@@ -43,7 +45,8 @@ def retry_with_backoff(
                         f" - Réessaie dans {delay:.1f}s"
                     )
                     
-                    time.sleep(delay)
+                    with span("retry.backoff", cat="retry", func=func.__qualname__, attempt=attempt, delay=delay):
+                        time.sleep(delay)
             
             # Normalement on arrive jamais ici
             if last_exception:
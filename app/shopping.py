@@ -2,20 +2,17 @@
 
 from __future__ import annotations
 
-import json
-from collections import defaultdict
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Sequence, Set
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Set
 
 from .config import DATA_DIR
-
-from unidecode import unidecode
-
-
-def normalize_aliment(name: str | None) -> str:
-    if not name:
-        return ""
-    return unidecode(str(name)).strip().lower()
+from .normalize import canonical_aliment, normalize_aliment
+from .stock import StockItem, load_snapshot
+from .store import LocalStore, get_store
+from .units import canonical_unit, convert, unit_dimension
 
 
 def _to_number(value) -> float | None:
@@ -32,31 +29,98 @@ def _to_number(value) -> float | None:
     return None
 
 
-def _build_stock_index(stock: Sequence[object] | None) -> Set[str]:
-    index: Set[str] = set()
+class _StockIndex:
+    """
+    Noms du stock normalisés, indexés pour la recherche approchée.
+
+    Même décision que de tester SequenceMatcher(...).ratio() sur tout le stock,
+    mais sans calculer le ratio pour les noms qui ne peuvent pas l'atteindre :
+    - les noms sont rangés par longueur, et ratio <= 2*min(la, lb)/(la + lb)
+      élimine d'office les longueurs trop éloignées
+    - ratio <= 2*(lettres communes)/(la + lb) élimine ensuite la plupart des autres
+    """
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.names: Set[str] = set()
+        self._by_length: Dict[int, List[tuple[str, Counter]]] = defaultdict(list)
+        self._decisions: Dict[tuple[str, float], bool] = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, norm: str) -> None:
+        if not norm or norm in self.names:
+            return
+        self.names.add(norm)
+        self._by_length[len(norm)].append((norm, Counter(norm)))
+        self._decisions.clear()
+
+    def __contains__(self, norm: object) -> bool:
+        return norm in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def fuzzy_match(self, norm: str, fuzzy_threshold: float) -> bool:
+        key = (norm, fuzzy_threshold)
+        cached = self._decisions.get(key)
+        if cached is None:
+            cached = self._decisions[key] = self._scan(norm, fuzzy_threshold)
+        return cached
+
+    def _scan(self, norm: str, fuzzy_threshold: float) -> bool:
+        la = len(norm)
+        counts: Counter | None = None
+        for lb, candidates in self._by_length.items():
+            total = la + lb
+            # Même formule que SequenceMatcher (2.0 * M / T) pour garder les mêmes arrondis
+            if 2.0 * min(la, lb) / total < fuzzy_threshold:
+                continue
+            if counts is None:
+                counts = Counter(norm)
+            for candidate, candidate_counts in candidates:
+                common = sum((counts & candidate_counts).values())
+                if 2.0 * common / total < fuzzy_threshold:
+                    continue
+                if SequenceMatcher(None, norm, candidate).ratio() >= fuzzy_threshold:
+                    return True
+        return False
+
+
+def _build_stock_index(stock: Sequence[object] | None) -> _StockIndex:
+    index = _StockIndex()
     if not stock:
         return index
     for item in stock:
+        if isinstance(item, StockItem):
+            # Nom déjà normalisé au chargement du snapshot
+            index.add(item.norm)
+            continue
         if isinstance(item, dict):
             name = item.get("Aliment") or item.get("name") or item.get("Nom")
         else:
             name = str(item)
-        norm = normalize_aliment(name)
+        norm = canonical_aliment(name)
         if norm:
             index.add(norm)
     return index
 
 
-def _is_available(aliment: str, stock_index: Set[str], fuzzy_threshold: float = 0.88) -> bool:
-    norm = normalize_aliment(aliment)
+def _is_available(
+    aliment: str,
+    stock_index: _StockIndex | Set[str],
+    fuzzy_threshold: float = 0.88,
+) -> bool:
+    norm = canonical_aliment(aliment)
     if not norm:
         return False
     if norm in stock_index:
         return True
-    for candidate in stock_index:
-        if SequenceMatcher(None, norm, candidate).ratio() >= fuzzy_threshold:
-            return True
-    return False
+    if not isinstance(stock_index, _StockIndex):
+        stock_index = _StockIndex(stock_index)
+    return stock_index.fuzzy_match(norm, fuzzy_threshold)
 
 
 ROUNDING_RULES = {
@@ -66,169 +130,211 @@ ROUNDING_RULES = {
     "produce": ("piece", 1.0),
 }
 
-UNIT_CONVERSIONS = {
-    # Conversions existantes
-    ("g", "tsp"): lambda qty: qty / 5.0,
-    ("tsp", "g"): lambda qty: qty * 5.0,
-    ("g", "ml"): lambda qty: qty,
-    ("ml", "g"): lambda qty: qty,
-    ("piece", "g"): lambda qty: qty,
-    ("g", "piece"): lambda qty: qty,
-    # Nouvelles conversions
-    ("tbsp", "ml"): lambda qty: qty * 15.0,
-    ("ml", "tbsp"): lambda qty: qty / 15.0,
-    ("tsp", "ml"): lambda qty: qty * 5.0,
-    ("ml", "tsp"): lambda qty: qty / 5.0,
-    ("cup", "ml"): lambda qty: qty * 240.0,
-    ("ml", "cup"): lambda qty: qty / 240.0,
-    ("oz", "g"): lambda qty: qty * 28.35,
-    ("g", "oz"): lambda qty: qty / 28.35,
-    ("lb", "g"): lambda qty: qty * 453.59,
-    ("g", "lb"): lambda qty: qty / 453.59,
-    ("clove", "pc"): lambda qty: qty,
-    ("piece", "pc"): lambda qty: qty,
-    ("pc", "piece"): lambda qty: qty,
-}
-
-
-def _convert_unit(qty: float, current_unit: str, target_unit: str) -> float:
-    func = UNIT_CONVERSIONS.get((current_unit, target_unit))
-    if not func:
-        raise ValueError("Conversion indisponible")
-    return func(qty)
-
-
 def _apply_rounding(category: str | None, qty: float, unit: str) -> tuple[float, str]:
     rule = ROUNDING_RULES.get(category or "")
     if not rule:
         return qty, unit
     preferred_unit, step = rule
-    try:
-        if unit != preferred_unit:
-            qty = _convert_unit(qty, unit, preferred_unit)
-            unit = preferred_unit
-        rounded = round(qty / step) * step
-        return round(rounded, 4), unit
-    except ValueError:
-        return qty, unit
+    if canonical_unit(unit) != canonical_unit(preferred_unit):
+        converted = convert(qty, unit, preferred_unit)
+        if converted is None:
+            return qty, unit
+        qty, unit = converted, preferred_unit
+    rounded = round(qty / step) * step
+    return round(rounded, 4), unit
+
+
+def _merge_units(units: Dict[str, float]) -> Dict[str, float]:
+    # Regroupe les quantités d'une même dimension dans la première unité vue (500 ml + 1 l → 1500 ml)
+    merged: Dict[str, float] = {}
+    targets: Dict[str, str] = {}
+    for unit, qty in units.items():
+        target = targets.setdefault(unit_dimension(unit) or canonical_unit(unit), unit)
+        if target != unit:
+            qty = convert(qty, unit, target)
+        merged[target] = merged.get(target, 0.0) + qty
+    return merged
 
 
-def consolidate_groceries(
-    selected: List[Dict],
-    stock: Sequence[object] | None = None,
-    fuzzy_threshold: float = 0.88,
-) -> List[Dict]:
-    stock_index = _build_stock_index(stock)
-
-    tally: Dict[str, Dict[str, object]] = defaultdict(
-        lambda: {
-            "Aliment": "",
-            "units": defaultdict(float),
-            "Notes": [],
-            "Recettes": set(),
-            "Category": None,
-            "CategoryAlt": set(),
-        }
-    )
-
-    for rec in selected:
-        rec_name = rec.get("Nom") or rec.get("title") or rec.get("name") or ""
-        ingredients = rec.get("ingredients") or rec.get("Ingrédients")
-
-        def _process_ing(
-            name: str,
-            amount: float | None = None,
-            unit: str | None = None,
-            category: str | None = None,
-            note: str | None = None,
-        ):
-            if not name:
-                return
-            if stock_index and _is_available(name, stock_index, fuzzy_threshold):
-                return
-            norm = normalize_aliment(name)
-            if not norm:
-                return
-            entry = tally[norm]
-            if not entry["Aliment"]:
-                entry["Aliment"] = name
-            unit_norm = (unit or "").strip()
-            if amount is not None:
-                entry["units"][unit_norm] += float(amount)
-            else:
-                entry["Notes"].append(str(unit or "").strip())
-            if rec_name:
-                entry["Recettes"].add(rec_name)
-            if category:
-                if not entry["Category"]:
-                    entry["Category"] = category
-                elif entry["Category"] != category:
-                    entry["CategoryAlt"].add(category)
-            if note:
-                entry["Notes"].append(note)
-
-        if isinstance(ingredients, str):
-            for raw in [x.strip() for x in ingredients.split(",") if x.strip()]:
-                _process_ing(raw)
-        elif isinstance(ingredients, list) and ingredients:
-            if isinstance(ingredients[0], dict):
-                for ing in ingredients:
-                    amount = _to_number(ing.get("amount"))
-                    _process_ing(
-                        ing.get("name"),
-                        amount,
-                        ing.get("unit"),
-                        ing.get("category"),
-                        ing.get("notes"),
-                    )
-            elif isinstance(ingredients[0], str):
-                for raw in ingredients:
-                    _process_ing(raw.strip())
-
-    consolidated: List[Dict] = []
-    for data in tally.values():
-        units = data["units"]
-        if len(units) == 1:
-            unit, qty = next(iter(units.items()))
-            qty_value = round(qty, 2) if qty else ""
-            unit_value = unit
+@dataclass(slots=True)
+class _Aggregate:
+    # Un ingrédient agrégé : quantités par unité, notes, recettes, catégories
+    name: str
+    sort_key: str
+    units: Dict[str, float] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+    recipes: Set[str] = field(default_factory=set)
+    category: str | None = None
+    alt_categories: Set[str] | None = None
+
+
+class GroceryAggregator:
+    """
+    Regroupe des ingrédients par nom canonique, lot après lot.
+
+    Cœur commun de consolidate_groceries (ingrédients des recettes) et de
+    merge_courses (listes de courses déjà faites). On peut appeler add_recipes /
+    add_courses plusieurs fois puis results() : le résultat est le même que
+    sur la liste complète.
+    """
+
+    def __init__(self, stock: Sequence[object] | None = None, fuzzy_threshold: float = 0.88) -> None:
+        self.fuzzy_threshold = fuzzy_threshold
+        self.skipped_stock = 0
+        self._stock_index = _build_stock_index(stock)
+        self._records: Dict[str, _Aggregate] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(
+        self,
+        name: str,
+        amount: float | None = None,
+        unit: str = "",
+        category: str | None = None,
+        notes: Iterable[str] = (),
+        recipes: Iterable[str] = (),
+        missing_note: str = "",
+    ) -> bool:
+        # Retourne False si l'article est ignoré (nom vide ou déjà en stock)
+        if not name:
+            return False
+        norm = canonical_aliment(name)
+        if not norm:
+            return False
+        if self._stock_index and _is_available(name, self._stock_index, self.fuzzy_threshold):
+            self.skipped_stock += 1
+            return False
+
+        record = self._records.get(norm)
+        if record is None:
+            record = self._records[norm] = _Aggregate(name=name, sort_key=normalize_aliment(name))
+
+        if amount is not None:
+            if isinstance(unit, str):
+                unit = sys.intern(unit)
+            record.units[unit] = record.units.get(unit, 0.0) + amount
         else:
-            qty_value = ""
-            unit_value = ""
-            if units:
+            record.notes.append(missing_note)
+        record.recipes.update(recipes)
+        if category:
+            if isinstance(category, str):
+                category = sys.intern(category)
+            if not record.category:
+                record.category = category
+            elif record.category != category:
+                if record.alt_categories is None:
+                    record.alt_categories = set()
+                record.alt_categories.add(category)
+        record.notes.extend(notes)
+        return True
+
+    def add_recipes(self, selected: Iterable[Dict]) -> None:
+        # Ingrédients de recettes : chaîne "a, b", liste de noms ou liste de dicts Spoonacular
+        for rec in selected:
+            rec_name = rec.get("Nom") or rec.get("title") or rec.get("name") or ""
+            recipes = (rec_name,) if rec_name else ()
+            ingredients = rec.get("ingredients") or rec.get("Ingrédients")
+
+            if isinstance(ingredients, str):
+                for raw in [x.strip() for x in ingredients.split(",") if x.strip()]:
+                    self.add(raw, recipes=recipes)
+            elif isinstance(ingredients, list) and ingredients:
+                if isinstance(ingredients[0], dict):
+                    for ing in ingredients:
+                        amount = _to_number(ing.get("amount"))
+                        unit = ing.get("unit")
+                        note = ing.get("notes")
+                        self.add(
+                            ing.get("name"),
+                            amount,
+                            (unit or "").strip(),
+                            ing.get("category"),
+                            notes=(note,) if note else (),
+                            recipes=recipes,
+                            missing_note=str(unit or "").strip(),
+                        )
+                elif isinstance(ingredients[0], str):
+                    for raw in ingredients:
+                        self.add(raw.strip(), recipes=recipes)
+
+    def add_courses(self, courses: Iterable[Dict]) -> None:
+        # Articles de listes de courses (format achats_filtres.json)
+        for item in courses:
+            name = item.get("Aliment") or item.get("Name") or item.get("Nom") or ""
+            raw_qty = item.get("Quantité") or item.get("Quantite")
+            notes = item.get("Notes") or ""
+            recettes = item.get("Recettes") or item.get("Recette") or ""
+            self.add(
+                name,
+                _to_number(raw_qty),
+                item.get("Unité") or item.get("Unite") or "",
+                item.get("Categorie") or item.get("Category"),
+                notes=(str(notes),) if notes else (),
+                recipes=(r.strip() for r in recettes.split(",") if r.strip()) if recettes else (),
+                missing_note=str(raw_qty or ""),
+            )
+
+    def results(self, notes_first: bool = True) -> List[Dict]:
+        # Un dict par ingrédient, trié par nom ; notes_first fixe l'ordre des clés (Notes avant Categorie)
+        output: List[Dict] = []
+        for record in self._records.values():
+            notes = list(record.notes)
+            units = record.units
+            if len(units) > 1:
+                units = _merge_units(units)
+            if len(units) == 1:
+                unit, qty = next(iter(units.items()))
+                qty_value = round(qty, 2) if qty else ""
+                unit_value = unit
+            else:
+                qty_value = ""
+                unit_value = ""
                 detail_parts = [
                     f"{round(val, 2)} {unit}".strip()
                     for unit, val in units.items()
                     if val
                 ]
                 if detail_parts:
-                    data["Notes"].append(" + ".join(detail_parts))
+                    notes.append(" + ".join(detail_parts))
 
-        main_cat = data.get("Category")
-        alt_cats = sorted(
-            c for c in data.get("CategoryAlt", set()) if c and c != main_cat
-        )
-
-        if isinstance(qty_value, (int, float)) and unit_value:
-            qty_value, unit_value = _apply_rounding(main_cat, qty_value, unit_value)
+            main_cat = record.category
+            alt_cats = sorted(
+                c for c in (record.alt_categories or ()) if c and c != main_cat
+            )
+            if isinstance(qty_value, (int, float)) and unit_value:
+                qty_value, unit_value = _apply_rounding(main_cat, qty_value, unit_value)
+
+            entry = {
+                "Aliment": record.name,
+                "Quantité": qty_value,
+                "Unité": unit_value,
+                "Recettes": ", ".join(sorted(record.recipes)) if record.recipes else "",
+            }
+            notes_joined = "; ".join(n for n in notes if n).strip()
+            if notes_first and notes_joined:
+                entry["Notes"] = notes_joined
+            if main_cat:
+                entry["Categorie"] = main_cat
+            if alt_cats:
+                entry["Categorie_alt"] = alt_cats
+            if not notes_first and notes_joined:
+                entry["Notes"] = notes_joined
+            output.append((record.sort_key, entry))
+
+        output.sort(key=lambda pair: pair[0])
+        return [entry for _key, entry in output]
 
-        entry = {
-            "Aliment": data["Aliment"],
-            "Quantité": qty_value,
-            "Unité": unit_value,
-            "Recettes": ", ".join(sorted(data["Recettes"])) if data["Recettes"] else "",
-        }
-        notes_joined = "; ".join(n for n in data["Notes"] if n).strip()
-        if notes_joined:
-            entry["Notes"] = notes_joined
-        if main_cat:
-            entry["Categorie"] = main_cat
-        if alt_cats:
-            entry["Categorie_alt"] = alt_cats
-        consolidated.append(entry)
 
-    consolidated.sort(key=lambda x: normalize_aliment(x["Aliment"]))
-    return consolidated
+def consolidate_groceries(
+    selected: List[Dict],
+    stock: Sequence[object] | None = None,
+    fuzzy_threshold: float = 0.88,
+) -> List[Dict]:
+    aggregator = GroceryAggregator(stock, fuzzy_threshold)
+    aggregator.add_recipes(selected)
+    return aggregator.results(notes_first=True)
 
 
 def merge_courses(
@@ -237,117 +343,82 @@ def merge_courses(
     fuzzy_threshold: float = 0.88,
     return_stats: bool = False,
 ) -> List[Dict] | tuple[List[Dict], Dict[str, int]]:
-    stock_index = _build_stock_index(stock)
-
-    tally: Dict[str, Dict[str, object]] = defaultdict(
-        lambda: {
-            "Aliment": "",
-            "units": defaultdict(float),
-            "Notes": [],
-            "Recettes": set(),
-            "Categorie": None,
-            "CategoryAlt": set(),
-        }
-    )
-
-    skipped_stock = 0
-    for item in courses:
-        name = item.get("Aliment") or item.get("Name") or item.get("Nom") or ""
-        norm = normalize_aliment(name)
-        if not norm:
-            continue
-        if stock_index and _is_available(name, stock_index, fuzzy_threshold):
-            skipped_stock += 1
-            continue
-
-        unit = item.get("Unité") or item.get("Unite") or ""
-        amount = _to_number(item.get("Quantité") or item.get("Quantite"))
-        notes = item.get("Notes") or ""
-
-        entry = tally[norm]
-        if not entry["Aliment"]:
-            entry["Aliment"] = name
-        incoming_category = item.get("Categorie") or item.get("Category")
-        if incoming_category:
-            if not entry["Categorie"]:
-                entry["Categorie"] = incoming_category
-            elif entry["Categorie"] != incoming_category:
-                entry["CategoryAlt"].add(incoming_category)
-
-        if amount is not None:
-            entry["units"][unit] += amount
-        else:
-            entry["Notes"].append(str(item.get("Quantité") or item.get("Quantite") or ""))
-        if notes:
-            entry["Notes"].append(str(notes))
-        recettes = item.get("Recettes") or item.get("Recette") or ""
-        if recettes:
-            entry["Recettes"].update(r.strip() for r in recettes.split(",") if r.strip())
-
-    merged: List[Dict] = []
-    for data in tally.values():
-        units = data["units"]
-        if len(units) == 1:
-            unit, qty = next(iter(units.items()))
-            qty_value = round(qty, 2) if qty else ""
-            unit_value = unit
-        else:
-            qty_value = ""
-            unit_value = ""
-            if units:
-                detail_parts = [
-                    f"{round(val, 2)} {unit}".strip()
-                    for unit, val in units.items()
-                    if val
-                ]
-                if detail_parts:
-                    data["Notes"].append(" + ".join(detail_parts))
-
-        main_cat = data.get("Categorie")
-        alt_cats = sorted(
-            c for c in data.get("CategoryAlt", set()) if c and c != main_cat
-        )
-        if isinstance(qty_value, (int, float)) and unit_value:
-            qty_value, unit_value = _apply_rounding(main_cat, qty_value, unit_value)
-
-        entry = {
-            "Aliment": data["Aliment"],
-            "Quantité": qty_value,
-            "Unité": unit_value,
-            "Recettes": ", ".join(sorted(data["Recettes"])) if data["Recettes"] else "",
-        }
-        if main_cat:
-            entry["Categorie"] = main_cat
-        if alt_cats:
-            entry["Categorie_alt"] = alt_cats
-        notes_joined = "; ".join(n for n in data["Notes"] if n).strip()
-        if notes_joined:
-            entry["Notes"] = notes_joined
-        merged.append(entry)
-
-    merged.sort(key=lambda x: normalize_aliment(x["Aliment"]))
+    aggregator = GroceryAggregator(stock, fuzzy_threshold)
+    aggregator.add_courses(courses)
+    merged = aggregator.results(notes_first=False)
 
     if return_stats:
         return merged, {
             "input": len(courses),
             "output": len(merged),
-            "skipped_stock": skipped_stock,
+            "skipped_stock": aggregator.skipped_stock,
         }
     return merged
 
 
+def _word_keys(key: str) -> frozenset[str]:
+    # Mots d'un nom, chacun ramené à sa forme canonique ("tomates cerises" → {tomate, cerises})
+    return frozenset(canonical_aliment(word) for word in key.split() if word)
+
+
+def split_near_duplicates(
+    courses: List[Dict],
+    fuzzy_threshold: float = 0.75,
+) -> tuple[List[Dict], List[Dict]]:
+    """
+    Sépare une liste déjà fusionnée (merge_courses) en deux :
+    - les items sans voisin proche, qu'il n'y a pas besoin d'envoyer au LLM
+    - les items ambigus : noms proches ("tomate" / "tomates cerises", fautes de frappe)
+      que seul le LLM peut décider de fusionner ou non
+
+    merge_courses regroupe déjà les doublons exacts et les synonymes connus ; si la
+    liste n'est pas passée par là (repli sur la liste non fusionnée), deux items de
+    même nom canonique sont aussi ambigus.
+    """
+    keys = [canonical_aliment(item.get("Aliment") or item.get("Name") or item.get("Nom")) for item in courses]
+    counts = Counter(key for key in keys if key)
+    names = sorted(counts)
+    words = {key: _word_keys(key) for key in names}
+
+    ambiguous_keys: Set[str] = {key for key, count in counts.items() if count > 1}
+    for i, key in enumerate(names):
+        for other in names[i + 1:]:
+            if words[key] <= words[other] or words[other] <= words[key]:
+                near = True
+            else:
+                near = SequenceMatcher(None, key, other).ratio() >= fuzzy_threshold
+            if near:
+                ambiguous_keys.update((key, other))
+
+    clear: List[Dict] = []
+    ambiguous: List[Dict] = []
+    for item, key in zip(courses, keys):
+        (ambiguous if key in ambiguous_keys else clear).append(item)
+    return clear, ambiguous
+
+
 DEFAULT_STOCK_PATH = DATA_DIR / "stock.json"
 
 
-def prepare_stock_lookup(stock_path: str | None = None) -> List[Dict]:
+def prepare_stock_lookup(stock_path: str | None = None) -> List[StockItem]:
     from pathlib import Path
 
     if stock_path is None:
         stock_path = DEFAULT_STOCK_PATH
     path = Path(stock_path)
-    if not path.exists():
-        return []
-    return json.loads(path.read_text(encoding="utf-8"))
+
+    # Snapshot par défaut : on lit le store s'il est au moins aussi récent que stock.json
+    store = get_store() if path.resolve() == DEFAULT_STOCK_PATH.resolve() else None
+    if store is not None:
+        try:
+            synced_at = store.stock_synced_at()
+            if synced_at and (not path.exists() or synced_at >= path.stat().st_mtime):
+                return store.load_stock_items()
+        except Exception as exc:
+            print(f"   [WARN] Store local illisible, lecture de {path.name} : {exc}")
+
+    # stock.json compact (v2) ou ancienne liste de dicts
+    return load_snapshot(path)
 
 
 def _convert_unit_for_subtraction(
@@ -362,64 +433,22 @@ def _convert_unit_for_subtraction(
     Returns:
         Quantité convertie ou None si conversion impossible
     """
-    # Normaliser les unités (simple lower, pas normalize_aliment qui est pour les noms)
-    unit_lower = (unit or "").strip().lower()
-    stock_unit_lower = (stock_unit or "").strip().lower()
-    
-    # Si même unité, pas de conversion
-    if unit_lower == stock_unit_lower:
-        return stock_qty
-    
-    # Conversions de base
-    conversions = {
-        ("g", "kg"): lambda x: x * 1000,
-        ("kg", "g"): lambda x: x / 1000,
-        ("ml", "l"): lambda x: x * 1000,
-        ("l", "ml"): lambda x: x / 1000,
-        ("ml", "cl"): lambda x: x * 10,
-        ("cl", "ml"): lambda x: x / 10,
-    }
-    
-    # Essayer conversion directe
-    key = (stock_unit_lower, unit_lower)
-    if key in conversions:
-        return conversions[key](stock_qty)
-    
-    # Conversions via UNIT_CONVERSIONS si disponible
-    try:
-        if (stock_unit_lower, unit_lower) in UNIT_CONVERSIONS:
-            return UNIT_CONVERSIONS[(stock_unit_lower, unit_lower)](stock_qty)
-    except:
-        pass
-    
-    return None
+    # Stock exprimé dans l'unité de la course (registre commun des unités)
+    return convert(stock_qty, stock_unit, unit)
 
 
-def subtract_stock_from_groceries(
-    groceries: List[Dict[str, Any]],
-    stock: Sequence[object] | None = None
-) -> List[Dict[str, Any]]:
-    """
-    Soustrait le stock des courses (durable uniquement).
-    
-    Règles :
-    - Si durable et quantité/unité compatibles → max(qty - stock, 0)
-    - Si durable mais quantité inconnue → soustraire par défaut (g:200, ml:100, pc:1)
-    - Si frais → ne pas soustraire
-    
-    Args:
-        groceries: Liste de courses
-        stock: Liste d'items du stock
-    
-    Returns:
-        Liste de courses avec quantités soustraites
-    """
-    if not stock:
-        return groceries
-    
-    # Construire un index du stock par nom normalisé
+def _stock_lookup(stock: Sequence[object]) -> Dict[str, Dict[str, Any]]:
+    # Index du stock par nom normalisé (catégorie en minuscules, quantité, unité)
     stock_lookup: Dict[str, Dict[str, Any]] = {}
     for item in stock:
+        if isinstance(item, StockItem):
+            if item.norm:
+                stock_lookup[item.norm] = {
+                    "categorie": item.category.lower(),
+                    "qty": item.qty,
+                    "unit": item.unit,
+                }
+            continue
         if not isinstance(item, dict):
             continue
         
@@ -427,11 +456,11 @@ def subtract_stock_from_groceries(
         if not name:
             continue
         
-        norm_name = normalize_aliment(name)
+        norm_name = canonical_aliment(name)
         if not norm_name:
             continue
         
-        categorie = item.get("Categorie") or item.get("Category") or ""
+        categorie = item.get("Catégorie") or item.get("Categorie") or item.get("Category") or ""
         qty = _to_number(item.get("Quantité") or item.get("Quantity"))
         unit = item.get("Unité") or item.get("Unit") or ""
         
@@ -440,20 +469,51 @@ def subtract_stock_from_groceries(
             "qty": qty,
             "unit": unit,
         }
+    return stock_lookup
+
+
+def subtract_stock_from_groceries(
+    groceries: List[Dict[str, Any]],
+    stock: Sequence[object] | None = None,
+    store: LocalStore | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Soustrait le stock des courses (durable uniquement).
+    
+    Règles :
+    - Si durable et quantité/unité compatibles → max(qty - stock, 0)
+    - Si durable mais quantité inconnue → soustraire par défaut (g:200, ml:100, pc:1)
+    - Si frais → ne pas soustraire
+    
+    Args:
+        groceries: Liste de courses
+        stock: Liste d'items du stock
+        store: Store local dont la table stock est à jour : la jointure
+               courses ↔ stock se fait alors en SQL (stock ignoré, sauf en repli)
+    
+    Returns:
+        Liste de courses avec quantités soustraites
+    """
+    if store is None and not stock:
+        return groceries
+    
+    norms = [canonical_aliment(g.get("Aliment") or g.get("name") or "") for g in groceries]
+    matches: List[Dict[str, Any] | None] | None = None
+    if store is not None:
+        try:
+            matches = store.join_stock(norms)
+        except Exception as exc:
+            print(f"   [WARN] Store local illisible, soustraction en mémoire : {exc}")
+            if not stock:
+                return groceries
+    if matches is None:
+        stock_lookup = _stock_lookup(stock or [])
+        matches = [stock_lookup.get(norm) if norm else None for norm in norms]
     
     result = []
-    defaults = {"g": 200, "ml": 100, "pc": 1, "pièce": 1, "piece": 1}
+    defaults = {"g": 200, "ml": 100, "pc": 1}
     
-    for grocery in groceries:
-        name = grocery.get("Aliment") or grocery.get("name") or ""
-        norm_name = normalize_aliment(name)
-        
-        if not norm_name:
-            result.append(grocery)
-            continue
-        
-        stock_item = stock_lookup.get(norm_name)
-        
+    for grocery, stock_item in zip(groceries, matches):
         # Si pas dans le stock, garder tel quel
         if not stock_item:
             result.append(grocery)
@@ -485,8 +545,7 @@ def subtract_stock_from_groceries(
                 continue
         
         # Si quantité inconnue → soustraire par défaut
-        grocery_unit_lower = grocery_unit.lower() if grocery_unit else ""
-        default_subtract = defaults.get(grocery_unit_lower, 0)
+        default_subtract = defaults.get(canonical_unit(grocery_unit), 0)
         new_qty = max(grocery_qty - default_subtract, 0)
         grocery["Quantité"] = new_qty
         result.append(grocery)
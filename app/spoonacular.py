@@ -2,28 +2,136 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from typing import Any, Dict, List
 
 import requests
 
+from . import http_client
+from .cache import ResponseCache, make_cache_key
 from .config import (
     DIET,
     MAX_READY_MIN,
     N_RECIPES_CANDIDATES,
-    SPOONACULAR_API_KEY,
-    SPOONACULAR_API_KEY2,
-    SPOONACULAR_API_KEY3,
+    SPOONACULAR_API_KEYS,
+    SPOONACULAR_CACHE_ENABLED,
+    SPOONACULAR_CACHE_MAX_ENTRIES,
+    SPOONACULAR_CACHE_PATH,
+    SPOONACULAR_CACHE_TTL_DAYS,
+    SPOONACULAR_DAILY_QUOTA,
+    SPOONACULAR_QUOTA_PATH,
+    SPOONACULAR_REQUESTS_PER_SECOND,
+    SPOONACULAR_SEARCH_CACHE_TTL_HOURS,
+    SPOONACULAR_WIDGET_KEYS,
     USE_MOCK_DATA,
 )
 from .retry import retry_http
+from .spoonacular_keys import BULK, WIDGET, AllAPIKeysExhaustedError, SpoonacularKeyPool
 
 
 BASE_URL = "https://api.spoonacular.com"
 
 
-class AllAPIKeysExhaustedError(RuntimeError):
-    """Exception levée quand toutes les clés API Spoonacular ont épuisé leurs crédits."""
-    pass
+class _KeyRateLimiter:
+    """Espace les requêtes d'une même clé API (thread-safe)."""
+
+    def __init__(self, max_per_second: float) -> None:
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, api_key: str) -> None:
+        # Réserve le prochain créneau libre pour cette clé, puis attend hors du verrou
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(api_key, 0.0))
+            self._next_slot[api_key] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_rate_limiter = _KeyRateLimiter(SPOONACULAR_REQUESTS_PER_SECOND)
+
+# Clés API et solde du jour de chacune (la première est gardée pour le widget par défaut)
+_key_pool = SpoonacularKeyPool(
+    SPOONACULAR_API_KEYS,
+    widget_keys=SPOONACULAR_WIDGET_KEYS,
+    daily_quota=SPOONACULAR_DAILY_QUOTA,
+    state_path=SPOONACULAR_QUOTA_PATH,
+)
+
+# Cache des réponses (clé = endpoint + paramètres, sans la clé API)
+_response_cache: ResponseCache | None = (
+    ResponseCache(
+        SPOONACULAR_CACHE_PATH,
+        ttl_seconds=SPOONACULAR_CACHE_TTL_DAYS * 86400,
+        max_entries=SPOONACULAR_CACHE_MAX_ENTRIES,
+    )
+    if SPOONACULAR_CACHE_ENABLED
+    else None
+)
+
+
+def _cache_key(params: Dict[str, Any]) -> str:
+    return make_cache_key({k: v for k, v in params.items() if k != "apiKey"})
+
+
+def _information_params(spoon_id: int) -> Dict[str, Any]:
+    return {"id": int(spoon_id), "includeNutrition": "false"}
+
+
+def _cache_get(namespace: str, params: Dict[str, Any], max_age: float | None = None) -> Any:
+    if _response_cache is None:
+        return None
+    try:
+        return _response_cache.get(namespace, _cache_key(params), max_age=max_age)
+    except Exception as exc:  # Le cache ne doit jamais bloquer un appel API
+        print(f"   [WARN] Cache Spoonacular illisible : {exc}")
+        return None
+
+
+def _cache_set(namespace: str, params: Dict[str, Any], value: Any) -> None:
+    if _response_cache is None:
+        return
+    try:
+        _response_cache.set(namespace, _cache_key(params), value)
+    except Exception as exc:
+        print(f"   [WARN] Écriture du cache Spoonacular impossible : {exc}")
+
+
+def _seed_information_cache(results: List[Dict[str, Any]]) -> None:
+    # complexSearch (addRecipeInformation + fillIngredients) renvoie déjà les infos
+    # complètes : on les range pour que /information n'ait pas à les retélécharger
+    for recipe in results:
+        recipe_id = recipe.get("id")
+        if recipe_id and recipe.get("extendedIngredients"):
+            _cache_set("information", _information_params(recipe_id), recipe)
+
+
+def _get_with_pool(url: str, params: Dict[str, Any], purpose: str) -> requests.Response:
+    # Envoie la requête avec la clé qui a le plus de points restants ; le pool lit le solde dans la réponse.
+    # Un 402 n'arrive qu'une fois par clé et par jour (solde inconnu) : la clé est notée vide, on passe à la suivante
+    @retry_http(max_attempts=3, base_delay=1.0)
+    def _make_request(api_key: str) -> requests.Response:
+        _rate_limiter.wait(api_key)
+        return http_client.get(url, params={**params, "apiKey": api_key})
+
+    while True:
+        api_key = _key_pool.acquire(purpose)
+        response = _make_request(api_key)
+        _key_pool.record(api_key, response)
+        if response.status_code == 401:
+            raise RuntimeError(
+                f"[ERROR] Erreur Spoonacular : clé API invalide ou absente (401 Unauthorized) sur la {_key_pool.label(api_key)}."
+                " Vérifie tes clés API dans ton .env."
+            )
+        if response.status_code != 402:
+            return response
+        print(f"   [WARN] Plus de crédits sur la {_key_pool.label(api_key)}, bascule vers une autre clé...")
 
 
 def complex_search(
@@ -31,20 +139,17 @@ def complex_search(
     number: int = N_RECIPES_CANDIDATES,
     diet: str = DIET,
     max_ready_time: int = MAX_READY_MIN,
-    api_key: str | None = None,
     offset: int = 0,
 ) -> Dict[str, Any]:
-    # Appelle l'API Spoonacular pour chercher des recettes
+    # Appelle l'API Spoonacular pour chercher des recettes (trafic du widget : toutes les clés)
 
-    key_to_use = api_key or SPOONACULAR_API_KEY
-    if not key_to_use:
+    if not _key_pool:
         raise RuntimeError(
             "[ERROR] Aucune cle API Spoonacular disponible."
             " Configure SPOONACULAR_API_KEY dans ton .env."
         )
 
     params = {
-        "apiKey": key_to_use,
         "addRecipeInformation": "true",
         "fillIngredients": "true",
         "addRecipeNutrition": "true",
@@ -58,40 +163,16 @@ def complex_search(
     if query:
         params["query"] = query
 
-    @retry_http(max_attempts=3, base_delay=1.0)
-    def _make_request():
-        return requests.get(f"{BASE_URL}/recipes/complexSearch", params=params, timeout=30)
-    
-    response = _make_request()
-
-    if response.status_code == 402:
-        # Plus de crédits, on essaie les clés de secours si elles existent
-        if api_key is None or api_key == SPOONACULAR_API_KEY:
-            # Si on était sur la 1ère clé (ou None), essayer la 2ème
-            if SPOONACULAR_API_KEY2:
-                print(f"   [WARN] Plus de crédits sur la clé 1, bascule vers la clé 2...")
-                return complex_search(query=query, number=number, diet=diet, max_ready_time=max_ready_time, api_key=SPOONACULAR_API_KEY2)
-            # Sinon, essayer la 3ème
-            elif SPOONACULAR_API_KEY3:
-                print(f"   [WARN] Plus de crédits sur la clé 1, bascule vers la clé 3...")
-                return complex_search(query=query, number=number, diet=diet, max_ready_time=max_ready_time, api_key=SPOONACULAR_API_KEY3)
-        elif api_key == SPOONACULAR_API_KEY2:
-            # Si on était sur la 2ème clé, essayer la 3ème
-            if SPOONACULAR_API_KEY3:
-                print(f"   [WARN] Plus de crédits sur la clé 2, bascule vers la clé 3...")
-                return complex_search(query=query, number=number, diet=diet, max_ready_time=max_ready_time, api_key=SPOONACULAR_API_KEY3)
-        raise RuntimeError(
-            "[ERROR] Erreur Spoonacular : quota atteint (402 Payment Required)."
-            " Verifie ton abonnement ou change de cle API."
-        )
-    if response.status_code == 401:
-        raise RuntimeError(
-            "[ERROR] Erreur Spoonacular : cle API invalide ou absente (401 Unauthorized)."
-            " Verifie SPOONACULAR_API_KEY dans ton .env."
-        )
+    cached = _cache_get("complexSearch", params, max_age=SPOONACULAR_SEARCH_CACHE_TTL_HOURS * 3600)
+    if cached is not None:
+        return cached
 
+    response = _get_with_pool(f"{BASE_URL}/recipes/complexSearch", params, WIDGET)
     response.raise_for_status()
-    return response.json()
+    payload = response.json()
+    _cache_set("complexSearch", params, payload)
+    _seed_information_cache(payload.get("results", []))
+    return payload
 
 
 def normalize(recipe: Dict[str, Any]) -> Dict[str, Any]:
@@ -428,7 +509,7 @@ def get_candidate_recipes(
         print("   Mode MOCK (données locales)")
         return get_mock_recipes()
 
-    if not SPOONACULAR_API_KEY and not SPOONACULAR_API_KEY2 and not SPOONACULAR_API_KEY3:
+    if not _key_pool:
         print("   (Pas de clé API, bascule en mode MOCK)")
         return get_mock_recipes()
 
@@ -564,6 +645,28 @@ def get_mock_recipe_ingredients(spoon_id: int, desired_portions: int = 2) -> Lis
     return None
 
 
+def _fetch_recipe_information(spoon_id: int) -> Dict[str, Any]:
+    # Appelle /recipes/{id}/information ; la génération des courses laisse les clés du widget de côté
+    if not _key_pool:
+        raise RuntimeError(
+            "[ERROR] Aucune clé API Spoonacular disponible."
+            " Configure au moins une clé API dans ton .env."
+        )
+
+    url = f"{BASE_URL}/recipes/{spoon_id}/information"
+    try:
+        response = _get_with_pool(url, {"includeNutrition": "false"}, BULK)
+        response.raise_for_status()
+        recipe = response.json()
+    except AllAPIKeysExhaustedError:
+        # Doit remonter tel quel : l'appelant arrête de planifier d'autres requêtes
+        raise
+    except (RuntimeError, requests.RequestException) as exc:
+        raise RuntimeError(f"Erreur lors de la récupération de la recette {spoon_id}: {exc}")
+    
+    return recipe
+
+
 def get_recipe_ingredients_with_quantities(
     spoon_id: int,
     portions_multiplier: float = 1.0,
@@ -583,86 +686,10 @@ def get_recipe_ingredients_with_quantities(
     Returns:
         Liste d'ingrédients avec quantités multipliées
     """
-    # Pour le 2ème script (génération des courses), on privilégie la clé 2 ou 3 si disponible
-    # pour préserver la clé 1 pour le Widget 1
-    if not SPOONACULAR_API_KEY and not SPOONACULAR_API_KEY2 and not SPOONACULAR_API_KEY3:
-        raise RuntimeError(
-            "[ERROR] Aucune clé API Spoonacular disponible."
-            " Configure au moins une clé API dans ton .env."
-        )
-    
-    # Priorité : Clé 2 > Clé 3 > Clé 1
-    if SPOONACULAR_API_KEY2:
-        key_to_use = SPOONACULAR_API_KEY2
-        key_name = "clé 2"
-    elif SPOONACULAR_API_KEY3:
-        key_to_use = SPOONACULAR_API_KEY3
-        key_name = "clé 3"
-    else:
-        key_to_use = SPOONACULAR_API_KEY
-        key_name = "clé 1"
-    
-    url = f"{BASE_URL}/recipes/{spoon_id}/information"
-    params = {
-        "apiKey": key_to_use,
-        "includeNutrition": "false",
-    }
-    
-    @retry_http(max_attempts=3, base_delay=1.0)
-    def _make_request():
-        return requests.get(url, params=params, timeout=30)
-    
-    try:
-        response = _make_request()
-        
-        if response.status_code == 402:
-            # Plus de crédits, on essaie toutes les autres clés disponibles de manière systématique
-            initial_key_name = key_name
-            tried_keys = [key_to_use]
-            all_keys = [
-                ("clé 1", SPOONACULAR_API_KEY),
-                ("clé 2", SPOONACULAR_API_KEY2),
-                ("clé 3", SPOONACULAR_API_KEY3),
-            ]
-            
-            # Lister les clés disponibles pour debug
-            available_keys = [k[0] for k in all_keys if k[1]]
-            print(f"   [INFO] Clés API disponibles : {', '.join(available_keys) if available_keys else 'aucune'}")
-            
-            # Essayer toutes les clés disponibles jusqu'à ce qu'une fonctionne
-            for next_key_name, next_key_value in all_keys:
-                if next_key_value and next_key_value not in tried_keys:
-                    print(f"   [WARN] Plus de crédits sur la {key_name}, bascule vers la {next_key_name}...")
-                    key_to_use = next_key_value
-                    key_name = next_key_name
-                    params["apiKey"] = key_to_use
-                    response = _make_request()
-                    tried_keys.append(key_to_use)
-                    
-                    # Si cette clé fonctionne, sortir de la boucle
-                    if response.status_code != 402:
-                        break
-                    # Sinon, continuer avec la clé suivante
-            
-            # Si après tous les fallbacks on a toujours une erreur 402
-            if response.status_code == 402:
-                tried_key_names = [k[0] for k in all_keys if k[1] and k[1] in tried_keys]
-                print(f"   [WARN] Toutes les clés API ont été essayées ({', '.join(tried_key_names)})")
-                raise AllAPIKeysExhaustedError(
-                    "[ERROR] Erreur Spoonacular : quota atteint (402 Payment Required) sur toutes les clés disponibles."
-                    " Vérifie ton abonnement ou recharge tes crédits."
-                )
-        
-        if response.status_code == 401:
-            raise RuntimeError(
-                f"[ERROR] Erreur Spoonacular : clé API invalide ou absente (401 Unauthorized) sur la {key_name}."
-                " Vérifie tes clés API dans ton .env."
-            )
-        
-        response.raise_for_status()
-        recipe = response.json()
-    except (RuntimeError, requests.RequestException) as exc:
-        raise RuntimeError(f"Erreur lors de la récupération de la recette {spoon_id}: {exc}")
+    recipe = _cache_get("information", _information_params(spoon_id))
+    if recipe is None:
+        recipe = _fetch_recipe_information(spoon_id)
+        _cache_set("information", _information_params(spoon_id), recipe)
     
     # Calculer le multiplicateur correct
     if desired_portions is not None:
@@ -0,0 +1,156 @@
+# Pool de clés Spoonacular : quota lu dans les en-têtes de chaque réponse, clé avec le plus de marge choisie à chaque requête
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Origine de la requête : le widget (recherche de recettes) peut utiliser toutes les clés,
+# le reste (ingrédients des courses) laisse les clés réservées au widget
+WIDGET = "widget"
+BULK = "bulk"
+
+_DAY = 86400
+
+
+class AllAPIKeysExhaustedError(RuntimeError):
+    """Exception levée quand toutes les clés API Spoonacular ont épuisé leurs crédits."""
+    pass
+
+
+def _key_id(key: str) -> str:
+    # La clé elle-même n'est jamais écrite sur disque
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _next_reset(now: float) -> float:
+    # Spoonacular remet les quotas à zéro à minuit UTC
+    return (int(now // _DAY) + 1) * _DAY
+
+
+def _header_number(headers: Any, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class SpoonacularKeyPool:
+    """
+    Clés Spoonacular et points restants de chacune pour la journée.
+
+    Chaque réponse met à jour le solde de sa clé (en-têtes X-API-Quota-Used /
+    X-API-Quota-Left), gardé sur disque jusqu'au reset de minuit UTC : une clé
+    vide n'est plus essayée, même au run suivant. Une clé jamais vue (ou remise
+    à zéro) est supposée avoir daily_quota points.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        widget_keys: int = 1,
+        daily_quota: float = 150.0,
+        state_path: Optional[Path] = None,
+    ) -> None:
+        self.keys: List[str] = list(dict.fromkeys(key for key in keys if key))
+        self.reserved = set(self.keys[:max(widget_keys, 0)])
+        self.daily_quota = daily_quota
+        self.state_path = Path(state_path) if state_path else None
+        self._state: Optional[Dict[str, Dict[str, float]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def label(self, key: str) -> str:
+        return f"clé {self.keys.index(key) + 1}" if key in self.keys else "clé inconnue"
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._state is None:
+            self._state = {}
+            if self.state_path is not None and self.state_path.exists():
+                try:
+                    saved = json.loads(self.state_path.read_text(encoding="utf-8"))
+                    self._state = dict(saved.get("keys") or {})
+                except (json.JSONDecodeError, OSError, AttributeError) as exc:
+                    print(f"   [WARN] Quotas Spoonacular illisibles ({self.state_path.name}) : {exc}")
+        return self._state
+
+    def _save(self) -> None:
+        if self.state_path is None:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"keys": self._state}, indent=2), encoding="utf-8")
+            tmp_path.replace(self.state_path)
+        except OSError as exc:
+            print(f"   [WARN] Quotas Spoonacular non écrits : {exc}")
+
+    def _headroom(self, key: str, now: float) -> float:
+        entry = self._load().get(_key_id(key))
+        if not entry or now >= entry.get("reset_at", 0):
+            return self.daily_quota
+        return entry.get("left", self.daily_quota)
+
+    def headroom(self, key: str, now: Optional[float] = None) -> float:
+        with self._lock:
+            return self._headroom(key, time.time() if now is None else now)
+
+    def _candidates(self, purpose: str) -> List[str]:
+        if purpose == WIDGET:
+            return self.keys
+        # Les clés du widget ne servent aux autres requêtes que si elles sont les seules configurées
+        return [key for key in self.keys if key not in self.reserved] or self.keys
+
+    def acquire(self, purpose: str = BULK) -> str:
+        """
+        Choisit la clé qui a le plus de points restants.
+
+        Un point est décompté tout de suite (les requêtes parallèles se
+        répartissent), la réponse donnera ensuite le vrai solde.
+
+        Raises:
+            AllAPIKeysExhaustedError: Si aucune clé n'a de points restants
+        """
+        with self._lock:
+            now = time.time()
+            candidates = self._candidates(purpose)
+            if not candidates:
+                raise RuntimeError("[ERROR] Aucune clé API Spoonacular disponible.")
+            key = max(candidates, key=lambda k: (self._headroom(k, now), -self.keys.index(k)))
+            left = self._headroom(key, now)
+            if left <= 0:
+                names = ", ".join(self.label(k) for k in candidates)
+                raise AllAPIKeysExhaustedError(
+                    f"[ERROR] Erreur Spoonacular : quota du jour atteint sur toutes les clés disponibles ({names})."
+                    " Vérifie ton abonnement ou attends le reset de minuit UTC."
+                )
+            entry = self._load().setdefault(_key_id(key), {})
+            if now >= entry.get("reset_at", 0):
+                entry.update(used=0.0, reset_at=_next_reset(now))
+            entry["left"] = left - 1
+            return key
+
+    def record(self, key: str, response: Any) -> None:
+        # Solde réel de la clé d'après la réponse ; un 402 la marque vide jusqu'au reset
+        headers = getattr(response, "headers", None)
+        used = _header_number(headers, "X-API-Quota-Used")
+        left = _header_number(headers, "X-API-Quota-Left")
+        exhausted = getattr(response, "status_code", None) == 402
+        if left is None and not exhausted:
+            return
+        with self._lock:
+            now = time.time()
+            entry = self._load().setdefault(_key_id(key), {})
+            entry["reset_at"] = _next_reset(now)
+            entry["updated_at"] = now
+            if used is not None:
+                entry["used"] = used
+            entry["left"] = 0.0 if exhausted else max(left, 0.0)
+            self._save()
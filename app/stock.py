@@ -0,0 +1,181 @@
+# Snapshot compact du stock : un seul schéma en en-tête, une ligne à champs fixes par article
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .normalize import canonical_aliment, synonyms_fingerprint
+
+
+STOCK_SNAPSHOT_FORMAT = "stock-v2"
+
+# Ordre des champs dans chaque ligne du snapshot
+STOCK_FIELDS = ("page_id", "name", "norm", "qty", "unit", "category")
+
+# Anciennes clés (dicts Notion / stock.json v1) → champ
+_LEGACY_KEYS = {
+    "id": "page_id",
+    "Aliment": "name",
+    "Name": "name",
+    "Nom": "name",
+    "name": "name",
+    "Quantité": "qty",
+    "Quantite": "qty",
+    "Quantity": "qty",
+    "Unité": "unit",
+    "Unite": "unit",
+    "Unit": "unit",
+    "Catégorie": "category",
+    "Categorie": "category",
+    "Category": "category",
+}
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _first(item: Dict, keys: Iterable[Optional[str]]) -> Any:
+    for key in keys:
+        if key and item.get(key) not in (None, ""):
+            return item[key]
+    return None
+
+
+@dataclass(slots=True)
+class StockItem:
+    """
+    Un article du stock, nom déjà normalisé (clé canonique).
+
+    Se lit aussi comme les anciens dicts (item["Aliment"], item.get("Quantité"))
+    pour le code qui n'a pas encore changé.
+    """
+
+    name: str
+    norm: str
+    qty: Optional[float] = None
+    unit: str = ""
+    category: str = ""
+    page_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(
+        cls,
+        item: Dict,
+        name_key: Optional[str] = None,
+        quantity_key: Optional[str] = None,
+        unit_key: Optional[str] = None,
+        category_key: Optional[str] = None,
+    ) -> Optional["StockItem"]:
+        # Les clés résolues depuis le schéma passent avant les noms habituels
+        name = str(_first(item, [name_key, "Aliment", "Name", "Nom", "name"]) or "").strip()
+        if not name:
+            return None
+        unit = _first(item, [unit_key, "Unité", "Unite", "Unit"])
+        if isinstance(unit, list):
+            unit = unit[0] if unit else ""
+        category = _first(item, [category_key, "Catégorie", "Categorie", "Category"])
+        if isinstance(category, list):
+            category = category[0] if category else ""
+        return cls(
+            name=name,
+            norm=canonical_aliment(name),
+            qty=_to_number(_first(item, [quantity_key, "Quantité", "Quantite", "Quantity"])),
+            unit=str(unit or "").strip(),
+            category=str(category or "").strip(),
+            page_id=item.get("id"),
+        )
+
+    def to_row(self) -> List[Any]:
+        return [getattr(self, field) for field in STOCK_FIELDS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.page_id,
+            "Aliment": self.name,
+            "Quantité": self.qty,
+            "Unité": self.unit,
+            "Catégorie": self.category,
+        }
+
+    def get(self, key: str, default: Any = None) -> Any:
+        field = _LEGACY_KEYS.get(key)
+        if field is None:
+            return default
+        value = getattr(self, field)
+        return default if value in (None, "") else value
+
+    def __getitem__(self, key: str) -> Any:
+        field = _LEGACY_KEYS.get(key)
+        if field is None:
+            raise KeyError(key)
+        return getattr(self, field)
+
+
+def to_stock_items(stock: Sequence[object] | None) -> List[StockItem]:
+    # Accepte des StockItem, des dicts (ancien format) ou des noms
+    items: List[StockItem] = []
+    for entry in stock or []:
+        if isinstance(entry, StockItem):
+            items.append(entry)
+        elif isinstance(entry, dict):
+            item = StockItem.from_dict(entry)
+            if item is not None:
+                items.append(item)
+        elif entry:
+            name = str(entry).strip()
+            if name:
+                items.append(StockItem(name=name, norm=canonical_aliment(name)))
+    return items
+
+
+def build_snapshot(items: Sequence[StockItem], schema: Optional[Dict] = None) -> Dict[str, Any]:
+    return {
+        "format": STOCK_SNAPSHOT_FORMAT,
+        "synonyms": synonyms_fingerprint(),
+        "schema": schema or {},
+        "fields": list(STOCK_FIELDS),
+        "rows": [item.to_row() for item in items],
+    }
+
+
+def write_snapshot(path: Path, items: Sequence[StockItem], schema: Optional[Dict] = None) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(build_snapshot(items, schema), ensure_ascii=False, indent=1),
+        encoding="utf-8",
+    )
+
+
+def snapshot_items(data: Any) -> List[StockItem]:
+    # Relit un snapshot (v2, ou liste de dicts v1) sans renormaliser si les synonymes n'ont pas changé
+    if not isinstance(data, dict) or data.get("format") != STOCK_SNAPSHOT_FORMAT:
+        return to_stock_items(data if isinstance(data, list) else [])
+
+    fields = data.get("fields") or list(STOCK_FIELDS)
+    renormalize = data.get("synonyms") != synonyms_fingerprint()
+    items: List[StockItem] = []
+    for row in data.get("rows") or []:
+        item = StockItem(**dict(zip(fields, row)))
+        if renormalize:
+            item.norm = canonical_aliment(item.name)
+        items.append(item)
+    return items
+
+
+def load_snapshot(path: Path) -> List[StockItem]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return snapshot_items(json.loads(path.read_text(encoding="utf-8")))
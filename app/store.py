@@ -0,0 +1,363 @@
+# Stockage local DuckDB : stock, recettes et courses par semaine, historique, pages Notion
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import duckdb
+except ImportError:  # dépendance optionnelle : sans elle, record() ne fait rien
+    duckdb = None
+
+from .config import STORE_ENABLED, STORE_PATH
+from .normalize import canonical_aliment, synonyms_fingerprint
+from .stock import StockItem
+
+
+# DuckDB n'a pas de partitions de table : la semaine est la première colonne
+# de la clé et de l'index, une semaine se lit / se remplace sans parcourir les autres
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS stock ("
+    " position INTEGER NOT NULL,"
+    " aliment_key VARCHAR NOT NULL,"
+    " aliment VARCHAR,"
+    " quantite DOUBLE,"
+    " unite VARCHAR,"
+    " data VARCHAR NOT NULL,"
+    " synced_at DOUBLE NOT NULL)",
+    # Colonnes ajoutées après coup : ALTER pour les bases déjà créées
+    "ALTER TABLE stock ADD COLUMN IF NOT EXISTS categorie VARCHAR",
+    "ALTER TABLE stock ADD COLUMN IF NOT EXISTS page_id VARCHAR",
+    # Empreinte des synonymes avec laquelle aliment_key a été calculée
+    "ALTER TABLE stock ADD COLUMN IF NOT EXISTS synonyms VARCHAR",
+    "CREATE INDEX IF NOT EXISTS idx_stock_aliment ON stock (aliment_key)",
+    "CREATE TABLE IF NOT EXISTS recipes ("
+    " week VARCHAR NOT NULL,"
+    " position INTEGER NOT NULL,"
+    " spoon_id BIGINT,"
+    " nom VARCHAR,"
+    " data VARCHAR NOT NULL,"
+    " PRIMARY KEY (week, position))",
+    "CREATE INDEX IF NOT EXISTS idx_recipes_spoon_id ON recipes (spoon_id)",
+    "CREATE TABLE IF NOT EXISTS groceries ("
+    " week VARCHAR NOT NULL,"
+    " kind VARCHAR NOT NULL,"
+    " position INTEGER NOT NULL,"
+    " aliment_key VARCHAR NOT NULL,"
+    " aliment VARCHAR,"
+    " quantite DOUBLE,"
+    " unite VARCHAR,"
+    " categorie VARCHAR,"
+    " data VARCHAR NOT NULL,"
+    " PRIMARY KEY (week, kind, position))",
+    "CREATE INDEX IF NOT EXISTS idx_groceries_aliment ON groceries (aliment_key)",
+    "CREATE TABLE IF NOT EXISTS notion_pages ("
+    " database VARCHAR NOT NULL,"
+    " position INTEGER NOT NULL,"
+    " page_id VARCHAR,"
+    " data VARCHAR NOT NULL,"
+    " PRIMARY KEY (database, position))",
+]
+
+# Types de listes de courses gardées par semaine
+GROCERY_KINDS = ("groceries", "achats")
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _aliment_name(item: Dict) -> str:
+    return str(item.get("Aliment") or item.get("Name") or item.get("Nom") or item.get("name") or "").strip()
+
+
+def _category(item: Dict) -> str:
+    # Le pipeline écrit "Categorie", Notion et les StockItem "Catégorie"
+    category = item.get("Catégorie") or item.get("Categorie") or item.get("Category") or ""
+    if isinstance(category, list):
+        category = category[0] if category else ""
+    return str(category)
+
+
+class LocalStore:
+    """
+    Base DuckDB embarquée (un fichier) pour l'état local du projet.
+
+    - Tables : stock, recipes (par semaine), groceries (par semaine et type), notion_pages
+    - Lignes complètes gardées en JSON (colonne data), colonnes utiles extraites pour le SQL
+    - Recherche indexée par nom d'aliment canonique et par spoon_id
+    - Chaque écriture remplace un bloc entier dans une transaction
+    - Une connexion par opération : le fichier n'est pas verrouillé entre deux appels
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = duckdb.connect(str(self.path))
+            try:
+                if not self._initialized:
+                    for statement in _SCHEMA:
+                        conn.execute(statement)
+                    self._initialized = True
+                yield conn
+            finally:
+                conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        # Tout ou rien : en cas d'erreur, la base reste dans l'état précédent
+        with self._connect() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._connect() as conn:
+            return conn.execute(sql, list(params)).fetchall()
+
+    # --- Écritures ---------------------------------------------------------
+
+    def replace_stock(self, items: Sequence[Dict | StockItem]) -> None:
+        # Accepte les StockItem (nom déjà normalisé) ou les anciens dicts
+        now = time.time()
+        fingerprint = synonyms_fingerprint()
+        rows = []
+        for position, item in enumerate(items):
+            if isinstance(item, StockItem):
+                key, item = item.norm, item.to_dict()
+            else:
+                key = canonical_aliment(_aliment_name(item))
+            rows.append((
+                position,
+                key,
+                _aliment_name(item),
+                _to_float(item.get("Quantité")),
+                str(item.get("Unité") or ""),
+                _category(item),
+                item.get("id"),
+                fingerprint,
+                json.dumps(item, ensure_ascii=False),
+                now,
+            ))
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM stock")
+            if rows:
+                conn.executemany(
+                    "INSERT INTO stock (position, aliment_key, aliment, quantite, unite, categorie, page_id,"
+                    " synonyms, data, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def replace_recipes(self, week: str, recipes: Sequence[Dict]) -> None:
+        rows = [
+            (
+                week,
+                position,
+                _to_int(recipe.get("spoon_id") or recipe.get("id")),
+                str(recipe.get("Nom") or recipe.get("title") or recipe.get("name") or ""),
+                json.dumps(recipe, ensure_ascii=False),
+            )
+            for position, recipe in enumerate(recipes)
+        ]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM recipes WHERE week = ?", [week])
+            if rows:
+                conn.executemany("INSERT INTO recipes VALUES (?, ?, ?, ?, ?)", rows)
+
+    def replace_groceries(self, week: str, kind: str, items: Sequence[Dict]) -> None:
+        if kind not in GROCERY_KINDS:
+            raise ValueError(f"Type de liste inconnu : {kind}")
+        rows = [
+            (
+                week,
+                kind,
+                position,
+                canonical_aliment(_aliment_name(item)),
+                _aliment_name(item),
+                _to_float(item.get("Quantité")),
+                str(item.get("Unité") or ""),
+                _category(item),
+                json.dumps(item, ensure_ascii=False),
+            )
+            for position, item in enumerate(items)
+        ]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM groceries WHERE week = ? AND kind = ?", [week, kind])
+            if rows:
+                conn.executemany("INSERT INTO groceries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def replace_notion_pages(self, database: str, pages: Sequence[Dict]) -> None:
+        rows = [
+            (database, position, page.get("id"), json.dumps(page, ensure_ascii=False, default=str))
+            for position, page in enumerate(pages)
+        ]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM notion_pages WHERE database = ?", [database])
+            if rows:
+                conn.executemany("INSERT INTO notion_pages VALUES (?, ?, ?, ?)", rows)
+
+    # --- Lectures ----------------------------------------------------------
+
+    def load_stock(self) -> List[Dict]:
+        return [json.loads(row[0]) for row in self._query("SELECT data FROM stock ORDER BY position")]
+
+    def load_stock_items(self) -> List[StockItem]:
+        # Articles à champs fixes depuis les colonnes, sans renormaliser si les synonymes n'ont pas changé
+        fingerprint = synonyms_fingerprint()
+        rows = self._query(
+            "SELECT aliment, aliment_key, quantite, unite, categorie, page_id, synonyms"
+            " FROM stock WHERE aliment <> '' ORDER BY position"
+        )
+        return [
+            StockItem(
+                name=name,
+                norm=key if synonyms == fingerprint else canonical_aliment(name),
+                qty=qty,
+                unit=unit or "",
+                category=category or "",
+                page_id=page_id,
+            )
+            for name, key, qty, unit, category, page_id, synonyms in rows
+        ]
+
+    def stock_synced_at(self) -> Optional[float]:
+        rows = self._query("SELECT max(synced_at) FROM stock")
+        return rows[0][0] if rows else None
+
+    def load_recipes(self, week: str) -> List[Dict]:
+        rows = self._query("SELECT data FROM recipes WHERE week = ? ORDER BY position", [week])
+        return [json.loads(row[0]) for row in rows]
+
+    def load_groceries(self, week: str, kind: str = "achats") -> List[Dict]:
+        rows = self._query(
+            "SELECT data FROM groceries WHERE week = ? AND kind = ? ORDER BY position",
+            [week, kind],
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def load_notion_pages(self, database: str) -> List[Dict]:
+        rows = self._query(
+            "SELECT data FROM notion_pages WHERE database = ? ORDER BY position", [database]
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def recipe_weeks(self, spoon_id: int) -> List[str]:
+        # Semaines où une recette a déjà été au menu
+        rows = self._query(
+            "SELECT DISTINCT week FROM recipes WHERE spoon_id = ? ORDER BY week", [spoon_id]
+        )
+        return [row[0] for row in rows]
+
+    # --- Requêtes SQL ------------------------------------------------------
+
+    def join_stock(self, aliment_keys: Sequence[str]) -> List[Optional[Dict]]:
+        # Pour chaque aliment canonique : sa ligne de stock (la dernière si doublon), ou None
+        with self._connect() as conn:
+            conn.execute("CREATE OR REPLACE TEMP TABLE wanted (position INTEGER, aliment_key VARCHAR)")
+            if aliment_keys:
+                conn.executemany("INSERT INTO wanted VALUES (?, ?)", list(enumerate(aliment_keys)))
+            rows = conn.execute(
+                "SELECT w.position, s.aliment_key, s.quantite, s.unite, s.categorie"
+                " FROM wanted w LEFT JOIN ("
+                "   SELECT aliment_key, quantite, unite, categorie FROM stock"
+                "   QUALIFY row_number() OVER (PARTITION BY aliment_key ORDER BY position DESC) = 1"
+                " ) s ON s.aliment_key = w.aliment_key AND w.aliment_key <> ''"
+                " ORDER BY w.position"
+            ).fetchall()
+        return [
+            {"categorie": (categorie or "").lower(), "qty": quantite, "unit": unite or ""}
+            if key is not None else None
+            for _position, key, quantite, unite, categorie in rows
+        ]
+
+    def groceries_not_in_stock(self, week: str, kind: str = "achats") -> List[Dict]:
+        # Articles de la semaine dont l'aliment (canonique) n'est pas dans le stock
+        rows = self._query(
+            "SELECT g.data FROM groceries g"
+            " WHERE g.week = ? AND g.kind = ?"
+            " AND NOT EXISTS (SELECT 1 FROM stock s WHERE s.aliment_key = g.aliment_key)"
+            " ORDER BY g.position",
+            [week, kind],
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def purchase_history(self, aliment: str, kind: str = "achats") -> List[Dict]:
+        # Quantités achetées d'un aliment semaine par semaine (par unité)
+        rows = self._query(
+            "SELECT week, unite, sum(quantite) AS quantite, count(*) AS lignes"
+            " FROM groceries WHERE aliment_key = ? AND kind = ?"
+            " GROUP BY week, unite ORDER BY week, unite",
+            [canonical_aliment(aliment), kind],
+        )
+        return [
+            {"semaine": week, "unite": unite, "quantite": quantite, "lignes": lignes}
+            for week, unite, quantite, lignes in rows
+        ]
+
+    def weekly_totals(self, week: str, kind: str = "achats") -> List[Dict]:
+        # Total par aliment canonique et unité pour une semaine
+        rows = self._query(
+            "SELECT aliment_key, unite, sum(quantite) AS quantite"
+            " FROM groceries WHERE week = ? AND kind = ?"
+            " GROUP BY aliment_key, unite ORDER BY aliment_key, unite",
+            [week, kind],
+        )
+        return [{"aliment": key, "unite": unite, "quantite": qty} for key, unite, qty in rows]
+
+
+_store: LocalStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[LocalStore]:
+    # Store partagé, ou None si désactivé (STORE_ENABLED=false) ou si duckdb n'est pas installé
+    global _store
+    if not STORE_ENABLED or duckdb is None:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LocalStore(STORE_PATH)
+    return _store
+
+
+def record(action: str, *args: Any) -> bool:
+    # Écrit dans le store sans interrompre le pipeline si DuckDB échoue (les JSON restent la sortie de référence)
+    store = get_store()
+    if store is None:
+        return False
+    try:
+        getattr(store, action)(*args)
+    except Exception as exc:
+        print(f"   [WARN] Store local non mis à jour ({action}) : {exc}")
+        return False
+    return True
@@ -0,0 +1,212 @@
+# Mesure des durées (étapes du pipeline, appels Notion / Spoonacular / OpenAI) ; quasi gratuit quand c'est désactivé
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_enabled = False
+_origin_ns = 0
+_events: List[Dict[str, Any]] = []
+_events_lock = threading.Lock()
+_local = threading.local()
+
+
+class _NoopSpan:
+    """Span renvoyé quand la mesure est désactivée : ne fait rien."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    """Un intervalle mesuré : nom, catégorie, début, durée et attributs libres."""
+
+    __slots__ = ("name", "cat", "args", "start_ns", "nested")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]) -> None:
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start_ns = 0
+        self.nested = False
+
+    def set(self, **attrs: Any) -> None:
+        self.args.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        stack = getattr(_local, "cats", None)
+        if stack is None:
+            stack = _local.cats = []
+        # Un appel Notion dans un autre appel Notion ne compte qu'une fois dans le total de la catégorie
+        self.nested = self.cat in stack
+        stack.append(self.cat)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        end_ns = time.perf_counter_ns()
+        _local.cats.pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "start_ns": self.start_ns,
+            "dur_ns": end_ns - self.start_ns,
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "nested": self.nested,
+            "args": self.args,
+        }
+        with _events_lock:
+            _events.append(event)
+        return False
+
+
+def enable() -> None:
+    # Active la mesure et repart d'une trace vide
+    global _enabled, _origin_ns
+    with _events_lock:
+        _events.clear()
+    _origin_ns = time.perf_counter_ns()
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, cat: str = "app", **args: Any) -> Any:
+    # with span("notion:pages.create", cat="notion"): ...  → un no-op partagé si la mesure est désactivée
+    if not _enabled:
+        return _NOOP
+    return _Span(name, cat, args)
+
+
+def traced(name: Optional[str] = None, cat: str = "app") -> Callable[[Callable[..., T]], Callable[..., T]]:
+    # Décorateur : mesure chaque appel de la fonction (nom par défaut : son qualname)
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label, cat, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def events() -> List[Dict[str, Any]]:
+    with _events_lock:
+        return list(_events)
+
+
+def chrome_trace() -> Dict[str, Any]:
+    # Format "Trace Event" (chrome://tracing, ui.perfetto.dev) : événements complets "X", temps en µs
+    pid = os.getpid()
+    recorded = events()
+    trace_events: List[Dict[str, Any]] = []
+    threads: Dict[int, str] = {}
+    for event in recorded:
+        threads.setdefault(event["tid"], event["thread"])
+        trace_events.append({
+            "name": event["name"],
+            "cat": event["cat"],
+            "ph": "X",
+            "ts": (event["start_ns"] - _origin_ns) / 1000,
+            "dur": event["dur_ns"] / 1000,
+            "pid": pid,
+            "tid": event["tid"],
+            "args": {key: value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+                     for key, value in event["args"].items()},
+        })
+    for tid, thread_name in threads.items():
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(chrome_trace(), ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def summary(top: int = 15) -> str:
+    # Texte : spans les plus longs (temps cumulé, nombre d'appels, max) puis total par catégorie
+    recorded = events()
+    if not recorded:
+        return "⏱️  Profil : aucune mesure enregistrée"
+
+    by_name: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0, 0])  # appels, total, max
+    by_cat: Dict[str, List[int]] = defaultdict(lambda: [0, 0])  # appels, total
+    for event in recorded:
+        stats = by_name[(event["name"], event["cat"])]
+        stats[0] += 1
+        stats[1] += event["dur_ns"]
+        stats[2] = max(stats[2], event["dur_ns"])
+        cat_stats = by_cat[event["cat"]]
+        cat_stats[0] += 1
+        if not event["nested"]:
+            cat_stats[1] += event["dur_ns"]
+
+    ranked = sorted(by_name.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    width = max(len(name) for (name, _cat), _stats in ranked)
+    lines = [
+        f"⏱️  Profil : {len(ranked)} mesures les plus longues (temps cumulé)",
+        f"   {'nom':<{width}}  {'catégorie':<12} {'appels':>7} {'total (s)':>10} {'max (s)':>9}",
+    ]
+    for (name, cat), (count, total_ns, max_ns) in ranked:
+        lines.append(f"   {name:<{width}}  {cat:<12} {count:>7} {total_ns / 1e9:>10.3f} {max_ns / 1e9:>9.3f}")
+    lines.append("   Par catégorie (les appels imbriqués dans la même catégorie ne comptent qu'une fois) :")
+    for cat, (count, total_ns) in sorted(by_cat.items(), key=lambda item: item[1][1], reverse=True):
+        lines.append(f"   - {cat}: {total_ns / 1e9:.3f}s ({count} appels)")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiling(path: Optional[Path]) -> Iterator[None]:
+    # Pour les CLI (--profile) : mesure le bloc, puis écrit la trace et affiche le résumé, même en cas d'erreur
+    if path is None:
+        yield
+        return
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+        try:
+            written = write_chrome_trace(path)
+            print(f"\n{summary()}")
+            print(f"   Trace écrite : {written} (à ouvrir dans ui.perfetto.dev ou chrome://tracing)")
+        except OSError as exc:
+            print(f"   [WARN] Trace de profil non écrite : {exc}")
@@ -0,0 +1,136 @@
+# Registre des unités : dimension (masse, volume, nombre), unité de base et facteurs précalculés pour toutes les paires
+
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .normalize import normalize_text
+
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+# Unité de base de chaque dimension
+BASE_UNITS = {MASS: "g", VOLUME: "ml", COUNT: "pc"}
+
+# Symbole → (dimension, libellé affiché dans Notion, alias reconnus)
+# Les alias sont comparés après normalize_text (minuscules, sans accents)
+_UNITS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "mg": (MASS, "mg", ("milligramme", "milligrammes", "milligram", "milligrams")),
+    "g": (MASS, "g", ("gr", "gramme", "grammes", "gram", "grams")),
+    "kg": (MASS, "kg", ("kilo", "kilos", "kilogramme", "kilogrammes", "kilogram", "kilograms")),
+    "oz": (MASS, "oz", ("once", "onces", "ounce", "ounces")),
+    "lb": (MASS, "lb", ("lbs", "livre", "livres", "pound", "pounds")),
+    "ml": (VOLUME, "ml", ("millilitre", "millilitres", "milliliter", "milliliters")),
+    "cl": (VOLUME, "cl", ("centilitre", "centilitres", "centiliter", "centiliters")),
+    "dl": (VOLUME, "dl", ("decilitre", "decilitres", "deciliter", "deciliters")),
+    "l": (VOLUME, "l", ("litre", "litres", "liter", "liters")),
+    "tsp": (VOLUME, "cuil. à café", (
+        "tsps", "teaspoon", "teaspoons", "cac", "c. a cafe", "cuil. a cafe",
+        "cuillere a cafe", "cuilleres a cafe",
+    )),
+    "tbsp": (VOLUME, "cuil. à soupe", (
+        "tbsps", "tbs", "tablespoon", "tablespoons", "cas", "c. a soupe", "cuil. a soupe",
+        "cuillere a soupe", "cuilleres a soupe",
+    )),
+    "cup": (VOLUME, "tasse", ("cups", "tasse", "tasses")),
+    "pc": (COUNT, "pièce", ("pcs", "piece", "pieces", "unite", "unites")),
+    "clove": (COUNT, "gousse", ("cloves", "gousse", "gousses")),
+}
+
+# Conversions déclarées : 1 <unité> = <facteur> <unité de référence>
+# Les autres paires (kg → tbsp n'a pas de sens, mais l → tsp oui) sont déduites par fermeture transitive
+_DEFINITIONS: List[Tuple[str, float, str]] = [
+    ("mg", 0.001, "g"),
+    ("kg", 1000.0, "g"),
+    ("oz", 28.35, "g"),
+    ("lb", 453.59, "g"),
+    ("cl", 10.0, "ml"),
+    ("dl", 100.0, "ml"),
+    ("l", 1000.0, "ml"),
+    ("tsp", 5.0, "ml"),
+    ("tbsp", 3.0, "tsp"),
+    ("cup", 240.0, "ml"),
+    ("clove", 1.0, "pc"),
+]
+
+
+def _build_aliases() -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    for symbol, (_dimension, label, names) in _UNITS.items():
+        for name in (symbol, label, *names):
+            aliases[normalize_text(name)] = symbol
+    return aliases
+
+
+def _build_factors() -> Dict[Tuple[str, str], float]:
+    # Graphe non orienté des conversions déclarées, puis parcours en largeur depuis chaque unité :
+    # chaque paire d'une même dimension reçoit son facteur une fois pour toutes
+    graph: Dict[str, List[Tuple[str, float]]] = {symbol: [] for symbol in _UNITS}
+    for unit, factor, reference in _DEFINITIONS:
+        if _UNITS[unit][0] != _UNITS[reference][0]:
+            raise ValueError(f"Conversion entre dimensions différentes : {unit} → {reference}")
+        graph[unit].append((reference, factor))
+        graph[reference].append((unit, 1.0 / factor))
+
+    factors: Dict[Tuple[str, str], float] = {}
+    for source in graph:
+        reached = {source: 1.0}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for target, factor in graph[current]:
+                if target not in reached:
+                    reached[target] = reached[current] * factor
+                    queue.append(target)
+        for target, factor in reached.items():
+            factors[(source, target)] = factor
+    return factors
+
+
+_ALIASES = _build_aliases()
+_FACTORS = _build_factors()
+
+
+@lru_cache(maxsize=1024)
+def _canonical(unit: str) -> str:
+    key = normalize_text(unit)
+    return _ALIASES.get(key) or _ALIASES.get(key.rstrip(".")) or key
+
+
+def canonical_unit(unit: str | None) -> str:
+    # Symbole du registre ("grammes" → "g"), sinon le texte normalisé tel quel
+    if not unit:
+        return ""
+    return _canonical(str(unit))
+
+
+def unit_dimension(unit: str | None) -> Optional[str]:
+    entry = _UNITS.get(canonical_unit(unit))
+    return entry[0] if entry else None
+
+
+def unit_label(unit: str | None) -> str:
+    # Libellé à afficher (Notion) : "tbsp" → "cuil. à soupe", unité inconnue → texte normalisé
+    symbol = canonical_unit(unit)
+    entry = _UNITS.get(symbol)
+    return entry[1] if entry else symbol
+
+
+def conversion_factor(from_unit: str | None, to_unit: str | None) -> Optional[float]:
+    # Facteur tel que qty_to = qty_from * facteur ; None si les unités ne sont pas convertibles
+    source = canonical_unit(from_unit)
+    target = canonical_unit(to_unit)
+    if source == target:
+        return 1.0
+    return _FACTORS.get((source, target))
+
+
+def convert(qty: float, from_unit: str | None, to_unit: str | None) -> Optional[float]:
+    factor = conversion_factor(from_unit, to_unit)
+    if factor is None:
+        return None
+    return qty * factor
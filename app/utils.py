@@ -6,8 +6,7 @@ import re
 from datetime import date
 from typing import Optional
 
-import requests
-
+from . import http_client
 from .config import NTFY_TOPIC
 
 
@@ -72,12 +71,11 @@ def notify_ntfy(title: str, body: str, click_url: str | None = None) -> None:
         if NTFY_USER and NTFY_PASS:
             auth = (NTFY_USER, NTFY_PASS)
         
-        response = requests.post(
+        response = http_client.post(
             f"https://ntfy.sh/{NTFY_TOPIC.strip()}",
             data=body.encode("utf-8"),
             headers=headers,
             auth=auth,
-            timeout=5,
         )
         response.raise_for_status()  # Lève une exception si erreur HTTP
     except Exception as e:
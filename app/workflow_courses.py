@@ -12,16 +12,27 @@ if sys.platform == "win32":
 
 import argparse
 import json
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from integrations.notion.groceries import push_groceries_to_notion
 from integrations.notion.client import get_client
-from notion_tools.notion_reader import export_database, normalize_id
+from notion_tools.notion_reader import and_filter, export_database, normalize_id, property_filter
 
-from .config import DATA_DIR, NOTION_COURSES_VIEW_URL, NOTION_RECIPES_DB
+from .http_client import connection_stats
+from .config import (
+    DATA_DIR,
+    NOTION_COURSES_VIEW_URL,
+    NOTION_RECIPES_DB,
+    PROFILE_TRACE_PATH,
+    SPOONACULAR_MAX_WORKERS,
+)
+from .store import get_store, record as record_in_store
 from .spoonacular import get_recipe_ingredients_with_quantities, AllAPIKeysExhaustedError
+from .tracing import profiling, traced
 from .utils import extract_spoon_id_from_url, notify_ntfy, week_label
 
 
@@ -48,8 +59,12 @@ def get_selected_recipes_this_week(
     if not db_id:
         raise RuntimeError("Base Recettes non configurée")
     
-    # Récupérer toutes les pages
-    pages = export_database(client, db_id)
+    # Filtre côté Notion : seules les recettes de la semaine (et sélectionnées) sont lues
+    query_filter = and_filter(
+        property_filter(client, db_id, ["Semaine", "Week"], "equals", semaine_label),
+        property_filter(client, db_id, ["Sélectionnée", "Selected"], "equals", True),
+    )
+    pages = export_database(client, db_id, filter=query_filter)
     
     # Debug : afficher les colonnes disponibles (seulement pour la première page)
     if pages and len(pages) > 0:
@@ -64,7 +79,7 @@ def get_selected_recipes_this_week(
     
     selected = []
     for page in pages:
-        # Vérifier Semaine = semaine_label (obligatoire)
+        # Vérifier Semaine = semaine_label (obligatoire ; garde-fou si le filtre n'a pas pu être appliqué)
         semaine_prop = page.get("Semaine") or page.get("Week")
         semaine_value = None
         if semaine_prop and isinstance(semaine_prop, dict):
@@ -227,6 +242,113 @@ def get_selected_recipes_this_week(
     return selected
 
 
+# IDs fictifs utilisés dans get_mock_recipes
+MOCK_SPOON_IDS = {123456, 234567, 345678, 456789, 567890, 678901}
+
+
+def _fetch_recipe_ingredients(recipe: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Récupère les ingrédients d'une recette (MOCK ou API Spoonacular).
+    
+    Lève AllAPIKeysExhaustedError si toutes les clés sont épuisées,
+    les autres erreurs sont affichées et donnent une liste vide.
+    """
+    spoon_id = recipe.get("spoon_id")
+    # L'utilisateur veut toujours 2 portions par défaut (peut être modifié dans Notion via la colonne "Portions")
+    portions = recipe.get("portions", 2)  # Défaut: 2 portions
+    recipe_name = recipe.get("name", "")
+    
+    if spoon_id in MOCK_SPOON_IDS:
+        # Récupérer les ingrédients depuis les données MOCK
+        print(f"   🔄 {recipe_name}: ID MOCK ({spoon_id}) - récupération depuis les données MOCK...")
+        try:
+            from .spoonacular import get_mock_recipe_ingredients
+            ingredients = get_mock_recipe_ingredients(spoon_id, desired_portions=portions)
+            if ingredients:
+                print(f"   ✅ {recipe_name}: {len(ingredients)} ingrédient(s) récupéré(s) depuis MOCK")
+                return ingredients
+            print(f"   ⚠️  {recipe_name}: ID MOCK non trouvé dans les données MOCK")
+        except Exception as e:
+            print(f"   ❌ Erreur pour '{recipe_name}' (MOCK): {e}")
+            import traceback
+            traceback.print_exc()
+        return []
+    
+    # Récupérer depuis l'API
+    print(f"   🔄 {recipe_name}: récupération depuis l'API...")
+    try:
+        # Utiliser desired_portions pour que la fonction calcule automatiquement
+        # le multiplicateur en fonction des servings de base de la recette
+        ingredients = get_recipe_ingredients_with_quantities(
+            spoon_id,
+            desired_portions=portions  # Nombre de portions désirées (par défaut 2)
+        )
+    except AllAPIKeysExhaustedError:
+        raise
+    except Exception as e:
+        print(f"   ❌ Erreur pour '{recipe_name}': {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+    print(f"   ✅ {recipe_name}: {len(ingredients)} ingrédient(s) récupéré(s)")
+    return ingredients
+
+
+def fetch_ingredients_for_recipes(
+    recipes: List[Dict[str, Any]],
+    max_workers: int = SPOONACULAR_MAX_WORKERS,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Récupère les ingrédients de toutes les recettes en parallèle.
+    
+    Les requêtes partent dans un pool de threads borné (le débit par clé est
+    limité dans app.spoonacular). Dès qu'une requête lève AllAPIKeysExhaustedError,
+    plus aucune nouvelle recette n'est lancée.
+    
+    Args:
+        recipes: Recettes sélectionnées (avec spoon_id et portions)
+        max_workers: Nombre max de requêtes simultanées
+    
+    Returns:
+        Tuple (ingrédients dans l'ordre des recettes, toutes les clés épuisées ?)
+    """
+    to_fetch = []
+    for recipe in recipes:
+        if not recipe.get("spoon_id"):
+            print(f"   ⚠️  Pas d'ID Spoonacular pour '{recipe.get('name', '')}', ignoré")
+            continue
+        to_fetch.append(recipe)
+    
+    if not to_fetch:
+        return [], False
+    
+    exhausted = threading.Event()
+    
+    def _task(recipe: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Une recette pas encore démarrée ne part plus si les clés sont épuisées
+        if exhausted.is_set():
+            return []
+        try:
+            return _fetch_recipe_ingredients(recipe)
+        except AllAPIKeysExhaustedError as e:
+            if not exhausted.is_set():
+                exhausted.set()
+                print(f"   ❌ {e}")
+                print(f"   🛑 Arrêt du traitement : toutes les clés API Spoonacular ont épuisé leurs crédits.")
+                print(f"   💡 Solution : Rechargez vos crédits sur spoonacular.com ou attendez le renouvellement de votre quota.")
+            return []
+    
+    workers = max(1, min(max_workers, len(to_fetch)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_task, to_fetch))
+    
+    all_ingredients: List[Dict[str, Any]] = []
+    for ingredients in results:
+        all_ingredients.extend(ingredients)
+    return all_ingredients, exhausted.is_set()
+
+
+@traced(cat="pipeline")
 def generate_courses_from_selection(
     semaine_label: str | None = None,
     dry_run: bool = False,
@@ -277,67 +399,11 @@ def generate_courses_from_selection(
         portions = recipe.get("portions", 2)
         print(f"   📝 '{recipe_name}': ID={spoon_id}, Portions={portions}")
     
-    all_ingredients = []
-    all_keys_exhausted = False
-    
-    for recipe in selected_recipes:
-        # Si toutes les clés sont épuisées, arrêter le traitement
-        if all_keys_exhausted:
-            print(f"   ⏸️  Arrêt du traitement : toutes les clés API sont épuisées")
-            break
-        
-        spoon_id = recipe.get("spoon_id")
-        # L'utilisateur veut toujours 2 portions par défaut (peut être modifié dans Notion via la colonne "Portions")
-        portions = recipe.get("portions", 2)  # Défaut: 2 portions
-        recipe_name = recipe.get("name", "")
-        
-        if not spoon_id:
-            print(f"   ⚠️  Pas d'ID Spoonacular pour '{recipe_name}', ignoré")
-            continue
-        
-        # Vérifier si c'est un ID MOCK (IDs fictifs utilisés dans get_mock_recipes)
-        is_mock_id = spoon_id in [123456, 234567, 345678, 456789, 567890, 678901]
-        
-        if is_mock_id:
-            # Récupérer les ingrédients depuis les données MOCK
-            print(f"   🔄 {recipe_name}: ID MOCK ({spoon_id}) - récupération depuis les données MOCK...")
-            try:
-                from .spoonacular import get_mock_recipe_ingredients
-                ingredients = get_mock_recipe_ingredients(spoon_id, desired_portions=portions)
-                if ingredients:
-                    all_ingredients.extend(ingredients)
-                    print(f"   ✅ {recipe_name}: {len(ingredients)} ingrédient(s) récupéré(s) depuis MOCK")
-                else:
-                    print(f"   ⚠️  {recipe_name}: ID MOCK non trouvé dans les données MOCK")
-            except Exception as e:
-                print(f"   ❌ Erreur pour '{recipe_name}' (MOCK): {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            # Récupérer depuis l'API
-            print(f"   🔄 {recipe_name}: récupération depuis l'API...")
-            try:
-                # Utiliser desired_portions pour que la fonction calcule automatiquement
-                # le multiplicateur en fonction des servings de base de la recette
-                ingredients = get_recipe_ingredients_with_quantities(
-                    spoon_id,
-                    desired_portions=portions  # Nombre de portions désirées (par défaut 2)
-                )
-                all_ingredients.extend(ingredients)
-                print(f"   ✅ {recipe_name}: {len(ingredients)} ingrédient(s) récupéré(s)")
-            except AllAPIKeysExhaustedError as e:
-                # Toutes les clés sont épuisées, arrêter le traitement
-                print(f"   ❌ {e}")
-                print(f"   🛑 Arrêt du traitement : toutes les clés API Spoonacular ont épuisé leurs crédits.")
-                print(f"   💡 Solution : Rechargez vos crédits sur spoonacular.com ou attendez le renouvellement de votre quota.")
-                all_keys_exhausted = True
-                break
-            except Exception as e:
-                print(f"   ❌ Erreur pour '{recipe_name}': {e}")
-                import traceback
-                traceback.print_exc()
+    all_ingredients, all_keys_exhausted = fetch_ingredients_for_recipes(selected_recipes)
     
     print(f"   📊 Total : {len(all_ingredients)} ingrédient(s) récupéré(s) pour {len(selected_recipes)} recette(s)")
+    for host, stats in connection_stats().items():
+        print(f"   🔌 {host} : {stats['requests']} requête(s), {stats['connections']} connexion(s) ouverte(s)")
     
     if not all_ingredients:
         if all_keys_exhausted:
@@ -403,12 +469,14 @@ def generate_courses_from_selection(
     
     # 4. Soustraire le stock (durable uniquement)
     print("📦 Soustraction du stock...")
-    from notion_tools.fetch.fetch_stock import fetch_stock
+    from notion_tools.fetch.fetch_stock import fetch_stock_snapshot
     from .shopping import subtract_stock_from_groceries
     
     try:
-        stock = fetch_stock()
-        groceries_after_stock = subtract_stock_from_groceries(groceries, stock)
+        stock, _stock_schema = fetch_stock_snapshot()
+        # Stock du jour rangé dans le store : la jointure courses ↔ stock se fait en SQL
+        store = get_store() if not dry_run and record_in_store("replace_stock", stock) else None
+        groceries_after_stock = subtract_stock_from_groceries(groceries, stock, store=store)
         n_subtracted = len(groceries) - len([g for g in groceries_after_stock if g.get("Quantité", 0) > 0])
         groceries = groceries_after_stock
         print(f"   {n_subtracted} article(s) soustrait(s) du stock")
@@ -454,6 +522,9 @@ def generate_courses_from_selection(
             json.dumps(groceries, ensure_ascii=False, indent=2),
             encoding="utf-8"
         )
+        record_in_store("replace_recipes", semaine_label, menu_data)
+        record_in_store("replace_groceries", semaine_label, "groceries", groceries)
+        record_in_store("replace_groceries", semaine_label, "achats", groceries)
         print(f"   ✅ Fichiers sauvegardés")
     
     # 6. Push vers Notion
@@ -472,7 +543,7 @@ def generate_courses_from_selection(
         dry_run=dry_run
     )
     
-    print(f"   📊 Résultat : {result.get('n_created', 0)} créé(s), {result.get('n_updated', 0)} mis à jour, {result.get('n_errors', 0)} erreur(s)")
+    print(f"   📊 Résultat : {result.get('n_created', 0)} créé(s), {result.get('n_updated', 0)} mis à jour, {result.get('n_skipped', 0)} inchangé(s), {result.get('n_archived', 0)} archivé(s), {result.get('n_errors', 0)} erreur(s)")
     
     # 7. Notif (optionnel)
     if not dry_run:
@@ -507,6 +578,15 @@ def main() -> None:
         action="store_true",
         help="Mode dry-run (ne fait rien)",
     )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_TRACE_PATH,
+        default=None,
+        type=Path,
+        metavar="TRACE_JSON",
+        help=f"Mesure la durée des appels Notion/Spoonacular/OpenAI (trace écrite dans {PROFILE_TRACE_PATH})",
+    )
     parser.add_argument(
         "--notion-url",
         type=str,
@@ -522,11 +602,12 @@ def main() -> None:
     args = parser.parse_args()
     
     try:
-        result = generate_courses_from_selection(
-            semaine_label=args.semaine,
-            dry_run=args.dry_run,
-            notion_courses_url=args.notion_url,
-        )
+        with profiling(args.profile):
+            result = generate_courses_from_selection(
+                semaine_label=args.semaine,
+                dry_run=args.dry_run,
+                notion_courses_url=args.notion_url,
+            )
         print(f"\n✅ Résultat: {result}")
     except Exception as e:
         print(f"❌ Erreur: {e}")
@@ -11,14 +11,30 @@ if sys.platform == "win32":
     sys.stderr = codecs.getwriter("utf-8")(sys.stderr.buffer, "strict")
 
 import argparse
+from pathlib import Path
 from typing import Any, Dict, List
 
 from integrations.notion.recipes import push_recipes_to_notion
-from integrations.notion.client import get_client
-from notion_tools.notion_reader import export_database, normalize_id, get_database_properties
+from integrations.notion.client import get_client, safe_notion_call
+from notion_tools.mirror import forget_pages, mark_stale
+from notion_tools.notion_reader import (
+    and_filter,
+    export_database,
+    get_database_properties,
+    normalize_id,
+    or_filter,
+    property_filter,
+)
 
-from .config import NOTION_GROCERIES_DB, NOTION_RECIPES_DB, NOTION_RECIPES_VIEW_URL, NOTION_STOCK_DB
+from .config import (
+    NOTION_GROCERIES_DB,
+    NOTION_RECIPES_DB,
+    NOTION_RECIPES_VIEW_URL,
+    NOTION_STOCK_DB,
+    PROFILE_TRACE_PATH,
+)
 from .spoonacular import get_candidate_recipes
+from .tracing import profiling, traced
 from .utils import notify_ntfy, week_label
 
 
@@ -42,9 +58,29 @@ def archive_old_recipes(
         print("   ⚠️  Base Recettes non configurée")
         return 0
     
-    pages = export_database(client, db_id)
+    # Propriété "archivée" (checkbox) si elle existe, sinon on archive la page Notion
+    archived_prop_name = None
+    if not dry_run:
+        schema = get_database_properties(client, db_id)
+        for prop_name, prop_def in schema.items():
+            if prop_def.get("type") == "checkbox":
+                prop_lower = prop_name.lower()
+                if "archiv" in prop_lower or "archive" in prop_lower:
+                    archived_prop_name = prop_name
+                    break
+    
+    # Filtre côté Notion : autre semaine (ou vide) et pas déjà marquée archivée
+    query_filter = and_filter(
+        or_filter(
+            property_filter(client, db_id, ["Semaine", "Week"], "does_not_equal", current_semaine),
+            property_filter(client, db_id, ["Semaine", "Week"], "is_empty"),
+        ),
+        property_filter(client, db_id, [archived_prop_name], "equals", False) if archived_prop_name else None,
+    )
+    pages = export_database(client, db_id, filter=query_filter)
     
     archived = 0
+    archived_ids = []
     for page in pages:
         semaine_prop = page.get("Semaine") or page.get("Week")
         semaine_value = None
@@ -72,29 +108,28 @@ def archive_old_recipes(
                         continue
                     
                     # Option 1: Marquer comme archivée (si propriété existe)
-                    archived_prop_name = None
-                    schema = get_database_properties(client, db_id)
-                    for prop_name, prop_def in schema.items():
-                        if prop_def.get("type") == "checkbox":
-                            prop_lower = prop_name.lower()
-                            if "archiv" in prop_lower or "archive" in prop_lower:
-                                archived_prop_name = prop_name
-                                break
-                    
                     if archived_prop_name:
-                        client.pages.update(
+                        safe_notion_call(
+                            client.pages.update,
                             page_id=page_id,
                             properties={archived_prop_name: {"checkbox": True}}
                         )
                     else:
                         # Option 2: Archiver la page Notion
-                        client.pages.update(page_id=page_id, archived=True)
+                        safe_notion_call(client.pages.update, page_id=page_id, archived=True)
+                        archived_ids.append(page_id)
                     archived += 1
                 except Exception as e:
                     print(f"   ⚠️ Erreur archivage recette {page.get('id', 'unknown')}: {e}")
             else:
                 archived += 1
     
+    # Tenir le miroir local à jour (pages archivées retirées, cases cochées relues au prochain delta)
+    if archived_ids:
+        forget_pages(db_id, archived_ids)
+    elif archived and not dry_run:
+        mark_stale(db_id)
+    
     return archived
 
 
@@ -126,12 +161,16 @@ def transfer_purchased_to_stock(
         print("   ⚠️  Base Stock non configurée")
         return 0
     
-    # Récupérer les courses de la semaine
-    pages = export_database(client, groceries_db_id)
+    # Récupérer les courses achetées de la semaine (filtre côté Notion)
+    query_filter = and_filter(
+        property_filter(client, groceries_db_id, ["Semaine", "Week"], "equals", semaine_label),
+        property_filter(client, groceries_db_id, ["Acheté", "Achete", "Purchased"], "equals", True),
+    )
+    pages = export_database(client, groceries_db_id, filter=query_filter)
     
     transferred = 0
     for page in pages:
-        # Vérifier Semaine
+        # Vérifier Semaine (garde-fou si le filtre n'a pas pu être appliqué)
         semaine_prop = page.get("Semaine") or page.get("Week")
         semaine_value = None
         if semaine_prop and isinstance(semaine_prop, dict):
@@ -213,6 +252,7 @@ def transfer_purchased_to_stock(
     return transferred
 
 
+@traced(cat="pipeline")
 def propose_recipes_to_notion(
     n_candidates: int = 9,
     n_final: int = 6,
@@ -272,44 +312,8 @@ def propose_recipes_to_notion(
         # IMPORTANT: Ne pas mettre "Sélectionnée" à true - l'utilisateur doit sélectionner manuellement
         # Note: Portions et Sélectionnée sont optionnels - on ne les ajoute que si les colonnes existent
     
-    # 5.5. Sauvegarder les ingrédients structurés dans un cache (optimisation tokens)
-    if not dry_run:
-        print("💾 Sauvegarde du cache des ingrédients...")
-        from .config import DATA_DIR
-        import json
-        
-        ingredients_cache_path = DATA_DIR / "recipes_ingredients_cache.json"
-        ingredients_cache_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Charger le cache existant ou créer un nouveau dict
-        cache = {}
-        if ingredients_cache_path.exists():
-            try:
-                cache = json.loads(ingredients_cache_path.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                cache = {}
-        
-        # Ajouter les ingrédients de chaque recette au cache
-        for recipe in selected:
-            recipe_id = recipe.get("id")
-            if recipe_id:
-                # Les ingrédients sont déjà dans le format normalize()
-                # IMPORTANT: Les quantités dans normalize() sont pour base_servings portions
-                # (ex: si servings=4, les quantités sont pour 4 portions)
-                # On sauvegarde aussi le nombre de servings pour référence
-                cache[str(recipe_id)] = {
-                    "title": recipe.get("title", ""),
-                    "servings": recipe.get("servings", 1),  # Nombre de portions de base
-                    "ingredients": recipe.get("ingredients", []),
-                    "image": recipe.get("image"),  # Sauvegarder aussi l'image
-                }
-        
-        # Sauvegarder le cache
-        ingredients_cache_path.write_text(
-            json.dumps(cache, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
-        print(f"   ✅ Cache mis à jour pour {len(selected)} recette(s)")
+    # Note : les ingrédients complets sont déjà dans le cache Spoonacular
+    # (complex_search les y range), generate_courses ne les retélécharge pas
     
     # 6. Sauvegarder temporairement et push vers Notion
     print("📤 Push vers Notion...")
@@ -370,6 +374,15 @@ def main() -> None:
         action="store_true",
         help="Mode dry-run (ne fait rien)",
     )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_TRACE_PATH,
+        default=None,
+        type=Path,
+        metavar="TRACE_JSON",
+        help=f"Mesure la durée des appels Notion/Spoonacular/OpenAI (trace écrite dans {PROFILE_TRACE_PATH})",
+    )
     parser.add_argument(
         "--notion-url",
         type=str,
@@ -379,12 +392,13 @@ def main() -> None:
     args = parser.parse_args()
     
     try:
-        result = propose_recipes_to_notion(
-            n_candidates=args.n_candidates,
-            n_final=args.n_final,
-            dry_run=args.dry_run,
-            notion_recipes_url=args.notion_url,
-        )
+        with profiling(args.profile):
+            result = propose_recipes_to_notion(
+                n_candidates=args.n_candidates,
+                n_final=args.n_final,
+                dry_run=args.dry_run,
+                notion_recipes_url=args.notion_url,
+            )
         print(f"\n✅ Résultat: {result}")
     except Exception as e:
         print(f"❌ Erreur: {e}")
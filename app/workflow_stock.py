@@ -5,7 +5,7 @@ from __future__ import annotations
 import argparse
 from typing import Any, Dict
 
-from integrations.notion.client import get_client
+from integrations.notion.client import get_client, safe_notion_call
 from notion_tools.notion_reader import normalize_id
 
 from .config import NOTION_RECIPES_DB, NOTION_STOCK_DB
@@ -41,7 +41,7 @@ def subtract_stock_when_recipe_completed(
         raise RuntimeError("Base Stock non configurée")
     
     # Récupérer la recette
-    recipe_page = client.pages.retrieve(page_id=recipe_page_id)
+    recipe_page = safe_notion_call(client.pages.retrieve, page_id=recipe_page_id)
     props = recipe_page.get("properties", {})
     
     # Vérifier que Terminée = true ou État = "Terminée"
@@ -2,23 +2,53 @@
 
 from __future__ import annotations
 
+import threading
 import time
-from functools import wraps
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Optional, TypeVar
 
 from notion_client import Client
 from notion_client.errors import APIResponseError
 
+from app.config import NOTION_BURST, NOTION_MAX_WORKERS, NOTION_REQUESTS_PER_SECOND
 from app.retry import retry_with_backoff
+from app.tracing import is_enabled, span
 from integrations.notion.config import get_config
 
 T = TypeVar("T")
 
+# Nombre de 429 consécutifs tolérés pour un même appel (l'attente est gérée par le limiteur)
+RATE_LIMIT_RETRIES = 5
+
+
+def _error_status(exc: Exception) -> Optional[int]:
+    """Code HTTP d'une erreur Notion (429, 500...), ou None."""
+    status = getattr(exc, "status", None)
+    if isinstance(status, int):
+        return status
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    if code == "rate_limited":
+        return 429
+    return None
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Délai demandé par Notion via l'en-tête Retry-After (en secondes), si présent."""
+    headers = getattr(exc, "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
 
 def _is_retryable_notion_error(exc: Exception) -> bool:
     """Détermine si une erreur Notion est retryable (429, 5xx)."""
     if isinstance(exc, APIResponseError):
-        status = getattr(exc, "code", None) or getattr(exc, "status", None)
+        status = _error_status(exc)
         if status:
             # Rate limit (429) ou erreurs serveur (5xx)
             return status == 429 or (500 <= status < 600)
@@ -26,6 +56,103 @@ def _is_retryable_notion_error(exc: Exception) -> bool:
     return isinstance(exc, (ConnectionError, TimeoutError))
 
 
+class NotionRateLimiter:
+    """
+    Limiteur partagé par tous les appels Notion du process.
+    
+    - Token bucket : débit moyen `rate` requêtes/s, avec des rafales jusqu'à `burst`
+    - Concurrence adaptative (AIMD) : le nombre d'appels en vol autorisés est divisé
+      par 2 à chaque 429 et remonte doucement (+1 par "fenêtre" d'appels réussis)
+    - Retry-After : après un 429, plus aucun appel ne part avant le délai demandé
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        max_concurrency: int = 3,
+        default_retry_after: float = 1.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.default_retry_after = default_retry_after
+        self.concurrency = float(self.max_concurrency)
+        self.rate_limited = 0
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            elapsed = now - self._last_refill
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Attend un jeton et une place libre, puis compte l'appel comme en vol."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait: Optional[float] = None
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= int(self.concurrency):
+                    wait = None  # Réveillé par release()
+                elif self.rate > 0 and self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    if self.rate > 0:
+                        self._tokens -= 1
+                    self._in_flight += 1
+                    return
+                self._cond.wait(timeout=wait)
+
+    def release(self, rate_limited: bool = False, retry_after: Optional[float] = None) -> None:
+        """Libère la place ; sur un 429, réduit la concurrence et suspend les envois."""
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self.rate_limited += 1
+                self.concurrency = max(1.0, self.concurrency / 2)
+                delay = self.default_retry_after if retry_after is None else retry_after
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self._tokens = 0.0
+            else:
+                self.concurrency = min(
+                    float(self.max_concurrency), self.concurrency + 1 / self.concurrency
+                )
+            self._cond.notify_all()
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Appelle func en respectant le débit ; un 429 est signalé puis relancé."""
+        self.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except APIResponseError as exc:
+            if _error_status(exc) == 429:
+                self.release(rate_limited=True, retry_after=_retry_after(exc))
+            else:
+                self.release()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.release()
+        return result
+
+
+# Instance unique : tous les appels Notion du process partagent le même budget
+notion_limiter = NotionRateLimiter(
+    rate=NOTION_REQUESTS_PER_SECOND,
+    burst=NOTION_BURST,
+    max_concurrency=NOTION_MAX_WORKERS,
+)
+
+
 def retry_notion(
     max_attempts: int = 5,
     base_delay: float = 0.5,
@@ -55,19 +182,27 @@ def safe_notion_call(
     
     Usage:
         result = safe_notion_call(client.pages.create, parent={...}, properties={...})
+    
+    Passe par le limiteur partagé : un 429 ne déclenche pas de backoff exponentiel,
+    l'appel est simplement relancé une fois le délai Retry-After écoulé.
     """
     @retry_notion(max_attempts=5, base_delay=0.5)
     def _wrapped() -> T:
-        try:
-            return func(*args, **kwargs)
-        except APIResponseError as e:
-            status = getattr(e, "code", None) or getattr(e, "status", None)
-            if status == 429:
-                # Rate limit : on attend un peu plus
-                time.sleep(1.0)
-            raise
-
-    return _wrapped()
+        for attempt in range(1, RATE_LIMIT_RETRIES + 1):
+            try:
+                return notion_limiter.call(func, *args, **kwargs)
+            except APIResponseError as e:
+                if _error_status(e) != 429 or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                # Rate limit : le limiteur a réduit la concurrence et attend Retry-After
+        raise RuntimeError("Bug dans le retry Notion")
+
+    if not is_enabled():
+        return _wrapped()
+    # Nom de l'appel : PagesEndpoint.create → "notion:pages.create"
+    label = getattr(func, "__qualname__", None) or getattr(func, "__name__", "call")
+    with span(f"notion:{label.replace('Endpoint', '').lower()}", cat="notion"):
+        return _wrapped()
 
 
 _client: Client | None = None
@@ -3,14 +3,27 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from integrations.notion.client import get_client
+from notion_client import Client
+
+from integrations.notion.client import get_client, safe_notion_call
 from integrations.notion.config import get_config
-from integrations.notion.mappers import grocery_to_notion_properties
-from integrations.notion.upsert import clear_cache, upsert_page
-from notion_tools.notion_reader import get_database_properties, normalize_id, export_database
+from integrations.notion.mappers import grocery_to_notion_properties, normalize_text
+from integrations.notion.upsert import clear_cache, diff_properties, upsert_page
+from integrations.notion.writer import UpsertTask, run_upserts
+from notion_tools.mirror import forget_pages, mark_stale
+from notion_tools.notion_reader import (
+    export_database,
+    get_database_properties,
+    iter_database_pages,
+    normalize_id,
+    property_filter,
+    simplify_property,
+)
 
 
 def clear_courses_for_week(
@@ -36,10 +49,11 @@ def clear_courses_for_week(
     if not db_id:
         return 0
     
-    # Récupérer toutes les pages
-    pages = export_database(client, db_id)
+    # Filtre côté Notion : seules les lignes de la semaine sont lues
+    week_filter = property_filter(client, db_id, ["Semaine", "Week"], "equals", semaine_label)
+    pages = export_database(client, db_id, filter=week_filter)
     
-    # Filtrer par Semaine
+    # Vérifier la Semaine (garde-fou si le filtre n'a pas pu être appliqué)
     to_archive = []
     for page in pages:
         semaine_prop = page.get("Semaine") or page.get("Week")
@@ -66,18 +80,200 @@ def clear_courses_for_week(
     
     # Archiver (ou supprimer)
     archived = 0
+    archived_ids = []
     for page_id in to_archive:
         try:
             if archive:
                 # Archiver la page Notion
-                client.pages.update(page_id=page_id, archived=True)
+                safe_notion_call(client.pages.update, page_id=page_id, archived=True)
+                archived_ids.append(page_id)
             archived += 1
         except Exception as e:
             print(f"   ⚠️ Erreur archivage page {page_id}: {e}")
     
+    # Les pages archivées ne reviennent plus dans les requêtes : on les retire du miroir local
+    forget_pages(db_id, archived_ids)
+    
     return archived
 
 
+def _grocery_name(grocery: Dict) -> str:
+    return (
+        grocery.get("Aliment")
+        or grocery.get("name")
+        or grocery.get("Name")
+        or grocery.get("Article")
+        or "Article sans nom"
+    )
+
+
+def _week_property(schema: Dict[str, Dict]) -> Optional[str]:
+    """Colonne Semaine de la base Courses (select ou multi_select), None si absente."""
+    for prop_name in ("Semaine", "Week"):
+        if schema.get(prop_name, {}).get("type") in ("select", "multi_select"):
+            return prop_name
+    return None
+
+
+def _page_weeks(page: Dict, week_prop: str) -> List[str]:
+    value = simplify_property(page.get("properties", {}).get(week_prop) or {})
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    return [str(value)] if value else []
+
+
+@dataclass
+class WeekPlan:
+    """Plan minimal pour aligner les lignes d'une semaine sur achats_filtres.json."""
+
+    week: str
+    create: List[Tuple[str, Dict]] = field(default_factory=list)
+    update: List[Tuple[str, str, Dict]] = field(default_factory=list)
+    archive: List[Tuple[str, str]] = field(default_factory=list)
+    unchanged: int = 0
+
+    def print_plan(self) -> None:
+        print(
+            f"   📋 Plan {self.week} : {len(self.create)} à créer, {len(self.update)} à mettre à jour, "
+            f"{len(self.archive)} à archiver, {self.unchanged} inchangé(s)"
+        )
+        for name, _properties in self.create:
+            print(f"      + {name}")
+        for name, _page_id, changed in self.update:
+            print(f"      ~ {name} ({', '.join(changed)})")
+        for name, _page_id in self.archive:
+            print(f"      - {name}")
+
+
+def load_week_pages(client: Client, database_id: str, semaine_label: str, week_prop: str) -> List[Dict]:
+    """
+    Lit en une passe les lignes de la semaine dans Courses (pages brutes).
+    
+    Args:
+        client: Client Notion
+        database_id: ID de la base Courses
+        semaine_label: Label de la semaine (ex: "Semaine 46 – 2025")
+        week_prop: Nom de la colonne Semaine
+    
+    Returns:
+        Pages Notion de la semaine
+    """
+    week_filter = property_filter(client, database_id, [week_prop], "equals", semaine_label)
+    return [
+        page
+        for page in iter_database_pages(client, database_id, filter=week_filter)
+        # Garde-fou si le filtre n'a pas pu être appliqué
+        if semaine_label in _page_weeks(page, week_prop)
+    ]
+
+
+def plan_week(
+    pages: List[Dict],
+    groceries: List[Dict],
+    schema: Dict[str, Dict],
+    semaine_label: str,
+) -> WeekPlan:
+    """
+    Compare les lignes existantes de la semaine à la liste de courses.
+    
+    Un article présent des deux côtés (même titre normalisé) n'est mis à jour
+    que pour ses propriétés modifiées ; un article nouveau est créé ; une ligne
+    qui n'est plus dans la liste (ou en doublon) est archivée.
+    
+    Args:
+        pages: Lignes existantes de la semaine (load_week_pages)
+        groceries: Articles de achats_filtres.json
+        schema: Schéma de la base Courses
+        semaine_label: Label de la semaine, écrit sur chaque ligne
+    
+    Returns:
+        WeekPlan
+    """
+    title_prop = next((name for name, prop in schema.items() if prop.get("type") == "title"), None)
+    plan = WeekPlan(week=semaine_label)
+    
+    existing: Dict[str, Tuple[str, Dict]] = {}
+    for page in pages:
+        page_id = page.get("id")
+        if not page_id:
+            continue
+        title = str(simplify_property(page.get("properties", {}).get(title_prop) or {}) or "")
+        key = normalize_text(title)
+        if key in existing:
+            plan.archive.append((title, page_id))
+        else:
+            existing[key] = (title, page)
+    
+    # Un même article en double dans la liste : la dernière ligne gagne (comme les upserts en série)
+    wanted: Dict[str, Tuple[str, Dict]] = {}
+    for grocery in groceries:
+        name = _grocery_name(grocery)
+        properties = grocery_to_notion_properties({**grocery, "Semaine": semaine_label}, schema)
+        wanted[normalize_text(name)] = (name, properties)
+    
+    for key, (name, properties) in wanted.items():
+        match = existing.pop(key, None)
+        if match is None:
+            plan.create.append((name, properties))
+            continue
+        page = match[1]
+        changed = diff_properties(page.get("properties") or {}, properties)
+        if changed:
+            plan.update.append((name, page["id"], changed))
+        else:
+            plan.unchanged += 1
+    
+    plan.archive.extend((title, page["id"]) for title, page in existing.values())
+    return plan
+
+
+def apply_week_plan(client: Client, database_id: str, plan: WeekPlan) -> Dict[str, int]:
+    """
+    Exécute un WeekPlan avec le writer concurrent.
+    
+    Returns:
+        Dict avec n_created, n_updated, n_skipped, n_archived, n_errors
+    """
+    archived_ids: List[str] = []
+    
+    def _create(properties: Dict) -> Tuple[bool, bool, str]:
+        page = safe_notion_call(client.pages.create, parent={"database_id": database_id}, properties=properties)
+        return (True, False, page.get("id"))
+    
+    def _update(page_id: str, properties: Dict) -> Tuple[bool, bool, str]:
+        safe_notion_call(client.pages.update, page_id=page_id, properties=properties)
+        return (False, True, page_id)
+    
+    def _archive(page_id: str) -> Tuple[bool, bool, str]:
+        safe_notion_call(client.pages.update, page_id=page_id, archived=True)
+        archived_ids.append(page_id)
+        return (False, True, page_id)
+    
+    tasks = [UpsertTask(name=name, run=partial(_create, properties)) for name, properties in plan.create]
+    tasks += [
+        UpsertTask(name=name, run=partial(_update, page_id, changed), key=page_id)
+        for name, page_id, changed in plan.update
+    ]
+    written = run_upserts(tasks)
+    # Archivage après les écritures : le writer le compte comme une mise à jour
+    archived = run_upserts([
+        UpsertTask(name=name, run=partial(_archive, page_id), key=page_id)
+        for name, page_id in plan.archive
+    ])
+    
+    if written["n_created"] or written["n_updated"]:
+        mark_stale(database_id)
+    forget_pages(database_id, archived_ids)
+    
+    return {
+        "n_created": written["n_created"],
+        "n_updated": written["n_updated"],
+        "n_skipped": plan.unchanged,
+        "n_archived": archived["n_updated"],
+        "n_errors": written["n_errors"] + archived["n_errors"],
+    }
+
+
 def push_groceries_to_notion(
     path: Path | str | None = None,
     clear_week: bool = False,
@@ -88,11 +284,12 @@ def push_groceries_to_notion(
     
     Args:
         path: Chemin vers achats_filtres.json (défaut: data/achats_filtres.json)
-        clear_week: Si True, purge les entrées de la semaine avant d'écrire
-        dry_run: Si True, ne fait rien, juste valide
+        clear_week: Si True, aligne les lignes de la semaine sur la liste
+                    (création, mise à jour des changements, archivage des disparus)
+        dry_run: Si True, n'écrit rien (avec clear_week : affiche le plan)
     
     Returns:
-        Dict avec n_created, n_updated, n_errors
+        Dict avec n_created, n_updated, n_skipped, n_errors (+ n_archived avec clear_week)
     """
     from app.config import DATA_DIR
     
@@ -113,11 +310,9 @@ def push_groceries_to_notion(
     if not isinstance(groceries_data, list):
         raise ValueError(f"Le fichier {path} doit contenir une liste de courses")
     
-    if dry_run:
+    if dry_run and not clear_week:
         print(f"[DRY-RUN] {len(groceries_data)} articles à synchroniser")
-        if clear_week:
-            print("[DRY-RUN] Purge de la semaine activée")
-        return {"n_created": 0, "n_updated": 0, "n_errors": 0}
+        return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     # Initialise
     client = get_client()
@@ -138,60 +333,61 @@ def push_groceries_to_notion(
     if not title_prop:
         raise RuntimeError("Impossible de trouver une propriété titre dans la base Courses")
     
-    # Clear cache
-    clear_cache()
+    # Invalide l'index de la base Courses (les autres bases restent indexées)
+    clear_cache(normalized_db_id)
     
-    # Purge de la semaine si demandé
+    # Semaine : plan minimal contre les lignes existantes (lues une seule fois)
     if clear_week:
-        print("   🗑️  Purge des entrées de la semaine...")
-        from app.utils import week_label
-        semaine = week_label()
-        archived = clear_courses_for_week(semaine, archive=True)
-        print(f"   {archived} entrée(s) archivée(s)")
-    
-    n_created = 0
-    n_updated = 0
-    n_errors = 0
+        week_prop = _week_property(schema)
+        if week_prop:
+            from app.utils import week_label
+            semaine = week_label()
+            pages = load_week_pages(client, normalized_db_id, semaine, week_prop)
+            plan = plan_week(pages, groceries_data, schema, semaine)
+            plan.print_plan()
+            if dry_run:
+                return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_archived": 0, "n_errors": 0}
+            result = apply_week_plan(client, normalized_db_id, plan)
+            print(
+                f"   ✅ {result['n_created']} créé(s), {result['n_updated']} mis à jour, "
+                f"{result['n_skipped']} inchangé(s), {result['n_archived']} archivé(s), "
+                f"{result['n_errors']} erreur(s)"
+            )
+            return result
+        print("   [WARN] Pas de colonne Semaine dans Courses : upsert par titre, sans archivage")
+        if dry_run:
+            print(f"[DRY-RUN] {len(groceries_data)} articles à synchroniser")
+            return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     print(f"➡️  Synchronisation de {len(groceries_data)} articles vers Notion...")
     
+    tasks = []
     for grocery in groceries_data:
-        try:
-            # Récupère le nom
-            name = (
-                grocery.get("Aliment")
-                or grocery.get("name")
-                or grocery.get("Name")
-                or grocery.get("Article")
-                or "Article sans nom"
-            )
-            
-            # Convertit en propriétés Notion
+        name = _grocery_name(grocery)
+        
+        def _upsert(grocery: Dict = grocery, name: str = name):
+            # Convertit en propriétés Notion, puis upsert
             properties = grocery_to_notion_properties(grocery, schema)
-            
-            # Upsert
-            created, updated, page_id = upsert_page(
+            return upsert_page(
                 client,
                 normalized_db_id,
                 name,
                 properties,
                 title_prop,
             )
-            
-            if created:
-                n_created += 1
-            elif updated:
-                n_updated += 1
-                
-        except Exception as e:
-            n_errors += 1
-            print(f"   ❌ Erreur pour '{name}': {e}")
+        
+        tasks.append(UpsertTask(name=name, run=_upsert))
+    
+    result = run_upserts(tasks)
+    n_created, n_updated, n_errors = result["n_created"], result["n_updated"], result["n_errors"]
+    n_skipped = result["n_skipped"]
     
-    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_errors} erreur(s)")
+    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_skipped} inchangé(s), {n_errors} erreur(s)")
     
     return {
         "n_created": n_created,
         "n_updated": n_updated,
+        "n_skipped": n_skipped,
         "n_errors": n_errors,
     }
 
@@ -210,7 +406,7 @@ def main() -> None:
     parser.add_argument(
         "--clear-week",
         action="store_true",
-        help="Purge les entrées de la semaine avant d'écrire",
+        help="Aligne les lignes de la semaine (crée, met à jour, archive les disparus)",
     )
     parser.add_argument(
         "--dry-run",
@@ -5,7 +5,8 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 
-from unidecode import unidecode
+from app.normalize import normalize_text
+from app.units import unit_label
 
 
 def pick(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
@@ -23,13 +24,6 @@ def pick(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
     return default
 
 
-def normalize_text(text: str) -> str:
-    """Normalise un texte pour le matching (lowercase, strip, accents)."""
-    if not text:
-        return ""
-    return unidecode(str(text).strip().lower())
-
-
 def normalize_unit(unit: str) -> str:
     """
     Normalise une unité pour éviter les doublons.
@@ -41,50 +35,8 @@ def normalize_unit(unit: str) -> str:
         "millilitres" → "ml"
         "pièce", "pièces" → "pièce"
     """
-    if not unit:
-        return ""
-    
-    unit_lower = normalize_text(unit)
-    
-    # Mapping des unités communes (avant unidecode pour gérer les accents)
-    unit_map: Dict[str, str] = {
-        "g": "g",
-        "gramme": "g",
-        "grammes": "g",
-        "kg": "kg",
-        "kilogramme": "kg",
-        "kilogrammes": "kg",
-        "ml": "ml",
-        "millilitre": "ml",
-        "millilitres": "ml",
-        "l": "l",
-        "litre": "l",
-        "litres": "l",
-        "cl": "cl",
-        "centilitre": "cl",
-        "centilitres": "cl",
-        "pièce": "pièce",
-        "pièces": "pièce",
-        "piece": "pièce",  # Après unidecode
-        "pieces": "pièce",  # Après unidecode
-        "unité": "pièce",
-        "unités": "pièce",
-        "unite": "pièce",  # Après unidecode
-        "unites": "pièce",  # Après unidecode
-        "tbsp": "cuil. à soupe",
-        "tsp": "cuil. à café",
-        "cuillère à soupe": "cuil. à soupe",
-        "cuillères à soupe": "cuil. à soupe",
-        "cuillère à café": "cuil. à café",
-        "cuillères à café": "cuil. à café",
-    }
-    
-    # Vérifie d'abord avec le texte original (avec accents)
-    if unit_lower in unit_map:
-        return unit_map[unit_lower]
-    
-    # Sinon retourne tel quel (normalisé)
-    return unit_lower
+    # Libellés tirés du registre commun des unités (app/units.py)
+    return unit_label(unit)
 
 
 def recipe_to_notion_properties(recipe: Dict[str, Any], schema: Dict[str, Dict]) -> Dict[str, Any]:
@@ -391,22 +343,19 @@ def grocery_to_notion_properties(grocery: Dict[str, Any], schema: Dict[str, Dict
                 "rich_text": [{"type": "text", "text": {"content": str(recipes)}}]
             }
     
-    # Semaine (select ou multi_select)
+    # Semaine (select ou multi_select, selon le type réel de la colonne)
     semaine = pick(grocery, "Semaine", "semaine", "Week")
     if semaine:
-        # Essayer d'abord multi_select, puis select
-        semaine_prop = _find_property_by_name_or_type(schema, ("Semaine", "Week"), "multi_select")
-        if semaine_prop:
+        semaine_prop = (
+            _find_property_by_name_or_type(schema, ("Semaine", "Week"), "multi_select")
+            or _find_property_by_name_or_type(schema, ("Semaine", "Week"), "select")
+        )
+        semaine_type = schema.get(semaine_prop, {}).get("type") if semaine_prop else None
+        if semaine_type == "multi_select":
             # Pour multi_select, on doit passer une liste
-            semaine_value = str(semaine)
-            properties[semaine_prop] = {
-                "multi_select": [{"name": semaine_value}]
-            }
-        else:
-            # Fallback sur select si multi_select n'existe pas
-            semaine_prop = _find_property_by_name_or_type(schema, ("Semaine", "Week"), "select")
-            if semaine_prop:
-                properties[semaine_prop] = {"select": {"name": str(semaine)}}
+            properties[semaine_prop] = {"multi_select": [{"name": str(semaine)}]}
+        elif semaine_type == "select":
+            properties[semaine_prop] = {"select": {"name": str(semaine)}}
     
     # Acheté (checkbox)
     achete = pick(grocery, "Acheté", "achete", "Purchased", "Achete")
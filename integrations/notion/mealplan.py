@@ -9,8 +9,9 @@ from typing import Dict, List, Optional
 
 from integrations.notion.client import get_client
 from integrations.notion.config import get_config
-from integrations.notion.mappers import mealplan_to_notion_properties
+from integrations.notion.mappers import mealplan_to_notion_properties, normalize_text
 from integrations.notion.upsert import clear_cache, resolve_relation_by_title, upsert_page
+from integrations.notion.writer import UpsertTask, run_upserts
 from notion_tools.notion_reader import get_database_properties, normalize_id
 
 
@@ -30,7 +31,7 @@ def push_mealplan_to_notion(
         dry_run: Si True, ne fait rien, juste valide
     
     Returns:
-        Dict avec n_created, n_updated, n_errors
+        Dict avec n_created, n_updated, n_skipped, n_errors
     """
     from app.config import DATA_DIR
     
@@ -48,7 +49,7 @@ def push_mealplan_to_notion(
     
     if not config.mealplan_db_id and dry_run:
         print("[DRY-RUN] NOTION_MEALPLAN_DB non configuré, skip")
-        return {"n_created": 0, "n_updated": 0, "n_errors": 0}
+        return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     if not config.recipes_db_id:
         raise ValueError("NOTION_RECIPES_DB requis pour les relations")
@@ -60,7 +61,7 @@ def push_mealplan_to_notion(
     
     if not recipes_data:
         print("   ⚠️ Aucune recette dans menu.json")
-        return {"n_created": 0, "n_updated": 0, "n_errors": 0}
+        return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     # Date de début
     if start_date is None:
@@ -74,7 +75,7 @@ def push_mealplan_to_notion(
     
     if dry_run:
         print(f"[DRY-RUN] {len(recipes_data)} recettes → plan de repas à partir du {start_date}")
-        return {"n_created": 0, "n_updated": 0, "n_errors": 0}
+        return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     # Initialise
     client = get_client()
@@ -147,49 +148,49 @@ def push_mealplan_to_notion(
         available_props = [f"{name} ({def_.get('type')})" for name, def_ in schema.items()]
         print(f"   📋 Propriétés disponibles: {', '.join(available_props)}")
     
-    # Clear cache
-    clear_cache()
-    
-    n_created = 0
-    n_updated = 0
-    n_errors = 0
+    # Invalide l'index du Meal Plan (l'index Recettes reste partagé pour les relations)
+    clear_cache(normalized_mealplan_db_id)
     
     print(f"➡️  Création du plan de repas à partir du {start_date}...")
     
     current_date = start_date
     meal_type_index = 0
     
+    tasks = []
     for recipe in recipes_data:
-        try:
-            # Récupère le nom de la recette
-            recipe_name = (
-                recipe.get("Nom")
-                or recipe.get("name")
-                or recipe.get("Name")
-                or recipe.get("title")
-                or "Recette sans nom"
-            )
-            
+        # Récupère le nom de la recette
+        recipe_name = (
+            recipe.get("Nom")
+            or recipe.get("name")
+            or recipe.get("Name")
+            or recipe.get("title")
+            or "Recette sans nom"
+        )
+        
+        # Type de repas (alterne)
+        meal_type = meal_types[meal_type_index % len(meal_types)]
+        meal_type_index += 1
+        
+        # Crée l'entrée
+        entry = {
+            "date": current_date.isoformat(),
+            "meal_type": meal_type,
+            "recipe_name": recipe_name,
+        }
+        
+        # Titre pour l'upsert (date + type + recette)
+        title = f"{current_date.strftime('%Y-%m-%d')} - {meal_type} - {recipe_name}"
+        
+        def _upsert(entry: Dict = entry, title: str = title, first: bool = not tasks):
             # Résout la relation vers la recette
             recipe_page_id = resolve_relation_by_title(
                 client,
                 normalized_recipes_db_id,
-                recipe_name,
+                entry["recipe_name"],
             )
             
             if not recipe_page_id:
-                print(f"   ⚠️ Recette '{recipe_name}' non trouvée dans Notion, création sans relation")
-            
-            # Type de repas (alterne)
-            meal_type = meal_types[meal_type_index % len(meal_types)]
-            meal_type_index += 1
-            
-            # Crée l'entrée
-            entry = {
-                "date": current_date.isoformat(),
-                "meal_type": meal_type,
-                "recipe_name": recipe_name,
-            }
+                print(f"   ⚠️ Recette '{entry['recipe_name']}' non trouvée dans Notion, création sans relation")
             
             properties = mealplan_to_notion_properties(
                 entry,
@@ -198,41 +199,36 @@ def push_mealplan_to_notion(
             )
             
             # Debug : affiche les propriétés qui seront synchronisées (seulement pour la première recette)
-            if n_created == 0 and n_updated == 0:
+            if first:
                 print(f"   🔍 Propriétés à synchroniser: {list(properties.keys())}")
                 if not properties:
                     print(f"   ⚠️  Aucune propriété trouvée ! Vérifiez le schéma de votre base.")
             
-            # Titre pour l'upsert (date + type + recette)
-            title = f"{current_date.strftime('%Y-%m-%d')} - {meal_type} - {recipe_name}"
-            
             # Upsert
-            created, updated, page_id = upsert_page(
+            return upsert_page(
                 client,
                 normalized_mealplan_db_id,
                 title,
                 properties,
                 title_prop,
             )
-            
-            if created:
-                n_created += 1
-            elif updated:
-                n_updated += 1
-            
-            # Passe au repas suivant (même jour si seulement 2 types, sinon jour suivant)
-            if meal_type_index % len(meal_types) == 0:
-                current_date += timedelta(days=1)
-                
-        except Exception as e:
-            n_errors += 1
-            print(f"   ❌ Erreur pour '{recipe_name}': {e}")
+        
+        tasks.append(UpsertTask(name=recipe_name, run=_upsert, key=normalize_text(title)))
+        
+        # Passe au repas suivant (même jour si seulement 2 types, sinon jour suivant)
+        if meal_type_index % len(meal_types) == 0:
+            current_date += timedelta(days=1)
+    
+    result = run_upserts(tasks)
+    n_created, n_updated, n_errors = result["n_created"], result["n_updated"], result["n_errors"]
+    n_skipped = result["n_skipped"]
     
-    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_errors} erreur(s)")
+    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_skipped} inchangé(s), {n_errors} erreur(s)")
     
     return {
         "n_created": n_created,
         "n_updated": n_updated,
+        "n_skipped": n_skipped,
         "n_errors": n_errors,
     }
 
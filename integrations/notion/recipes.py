@@ -10,6 +10,7 @@ from integrations.notion.client import get_client
 from integrations.notion.config import get_config
 from integrations.notion.mappers import recipe_to_notion_properties
 from integrations.notion.upsert import clear_cache, upsert_page
+from integrations.notion.writer import UpsertTask, run_upserts
 from notion_tools.notion_reader import get_database_properties, normalize_id
 
 
@@ -25,7 +26,7 @@ def push_recipes_to_notion(
         dry_run: Si True, ne fait rien, juste valide
     
     Returns:
-        Dict avec n_created, n_updated, n_errors
+        Dict avec n_created, n_updated, n_skipped, n_errors
     """
     from app.config import DATA_DIR
     
@@ -48,7 +49,7 @@ def push_recipes_to_notion(
     
     if dry_run:
         print(f"[DRY-RUN] {len(recipes_data)} recettes à synchroniser")
-        return {"n_created": 0, "n_updated": 0, "n_errors": 0}
+        return {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
     
     # Initialise
     client = get_client()
@@ -78,26 +79,23 @@ def push_recipes_to_notion(
     if not title_prop:
         raise RuntimeError("Impossible de trouver une propriété titre dans la base Recettes")
     
-    # Clear cache pour un run propre
-    clear_cache()
-    
-    n_created = 0
-    n_updated = 0
-    n_errors = 0
+    # Invalide l'index de la base Recettes pour un run propre
+    clear_cache(normalized_db_id)
     
     print(f"➡️  Synchronisation de {len(recipes_data)} recettes vers Notion...")
     
+    tasks = []
     for recipe in recipes_data:
-        try:
-            # Récupère le nom
-            name = (
-                recipe.get("Nom")
-                or recipe.get("name")
-                or recipe.get("Name")
-                or recipe.get("title")
-                or "Recette sans nom"
-            )
-            
+        # Récupère le nom
+        name = (
+            recipe.get("Nom")
+            or recipe.get("name")
+            or recipe.get("Name")
+            or recipe.get("title")
+            or "Recette sans nom"
+        )
+        
+        def _upsert(recipe: Dict = recipe, name: str = name):
             # Debug : vérifier si l'image est présente
             image = recipe.get("image") or recipe.get("Image") or recipe.get("imageUrl")
             if image:
@@ -118,28 +116,26 @@ def push_recipes_to_notion(
                 print(f"   ⚠️  Image présente dans les données mais non ajoutée aux propriétés Notion")
             
             # Upsert
-            created, updated, page_id = upsert_page(
+            return upsert_page(
                 client,
                 normalized_db_id,
                 name,
                 properties,
                 title_prop,
             )
-            
-            if created:
-                n_created += 1
-            elif updated:
-                n_updated += 1
-                
-        except Exception as e:
-            n_errors += 1
-            print(f"   ❌ Erreur pour '{name}': {e}")
+        
+        tasks.append(UpsertTask(name=name, run=_upsert))
+    
+    result = run_upserts(tasks)
+    n_created, n_updated, n_errors = result["n_created"], result["n_updated"], result["n_errors"]
+    n_skipped = result["n_skipped"]
     
-    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_errors} erreur(s)")
+    print(f"   ✅ {n_created} créé(s), {n_updated} mis à jour, {n_skipped} inchangé(s), {n_errors} erreur(s)")
     
     return {
         "n_created": n_created,
         "n_updated": n_updated,
+        "n_skipped": n_skipped,
         "n_errors": n_errors,
     }
 
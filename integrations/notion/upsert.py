@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
 
 from notion_client import Client
 
 from integrations.notion.client import safe_notion_call
 from integrations.notion.mappers import normalize_text
+from notion_tools.mirror import mark_stale
 from notion_tools.notion_reader import (
     get_database_properties,
     iter_database_pages,
@@ -16,14 +20,203 @@ from notion_tools.notion_reader import (
 )
 
 
-# Cache local pour éviter les requêtes répétées (par DB, par run)
+# Index local titre normalisé → page_id (par DB, par run)
 _title_to_page_id_cache: Dict[str, Dict[str, str]] = {}
 
+# Empreinte des propriétés de chaque page (par DB) : valeurs lues par l'index ou dernières écrites
+_page_fingerprints: Dict[str, Dict[str, Dict[str, str]]] = {}
 
-def clear_cache() -> None:
-    """Vide le cache des titres → page_id."""
-    global _title_to_page_id_cache
-    _title_to_page_id_cache = {}
+# Bases dont l'index a été construit en entier (une passe paginée complète)
+_indexed_databases: Set[str] = set()
+
+# Un verrou par base : des upserts concurrents attendent la même passe au lieu d'en lancer une chacun
+_index_locks: Dict[str, threading.Lock] = {}
+_index_locks_guard = threading.Lock()
+
+
+def _index_lock(database_id: str) -> threading.Lock:
+    with _index_locks_guard:
+        return _index_locks.setdefault(database_id, threading.Lock())
+
+
+def clear_cache(database_id: Optional[str] = None) -> None:
+    """
+    Vide l'index des titres → page_id.
+    
+    Args:
+        database_id: Si fourni, n'invalide que l'index de cette base
+                     (les autres bases restent indexées pour le run)
+    """
+    global _title_to_page_id_cache, _indexed_databases, _page_fingerprints
+    if database_id is None:
+        _title_to_page_id_cache = {}
+        _indexed_databases = set()
+        _page_fingerprints = {}
+        return
+    
+    normalized_db_id = normalize_id(database_id)
+    _title_to_page_id_cache.pop(normalized_db_id, None)
+    _indexed_databases.discard(normalized_db_id)
+    _page_fingerprints.pop(normalized_db_id, None)
+
+
+_WRITE_TYPES = (
+    "title", "rich_text", "number", "select", "multi_select", "status", "checkbox",
+    "date", "relation", "people", "url", "email", "phone_number",
+)
+
+
+def _comparable_value(prop: Dict) -> Any:
+    """
+    Valeur comparable d'une propriété, qu'elle vienne d'une lecture Notion
+    (avec "type" et "plain_text") ou d'un payload d'écriture ({"rich_text": [{"text": {"content": ...}}]}).
+    """
+    prop_type = prop.get("type") or next((t for t in _WRITE_TYPES if t in prop), None)
+    value = prop.get(prop_type) if prop_type else prop
+    
+    if prop_type in ("title", "rich_text"):
+        return "".join(
+            span.get("plain_text") or (span.get("text") or {}).get("content") or ""
+            for span in value or []
+        ).strip()
+    if prop_type == "number":
+        return float(value) if value is not None else None
+    if prop_type in ("select", "status"):
+        return (value or {}).get("name")
+    if prop_type == "multi_select":
+        return sorted(item.get("name") for item in value or [])
+    if prop_type in ("relation", "people"):
+        return sorted(str(item.get("id", "")).replace("-", "") for item in value or [])
+    if prop_type == "date":
+        return [(value or {}).get("start"), (value or {}).get("end")] if value else None
+    return value
+
+
+def _fingerprint(prop: Dict) -> str:
+    payload = json.dumps(_comparable_value(prop), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _page_fingerprint(properties: Dict) -> Dict[str, str]:
+    return {name: _fingerprint(prop) for name, prop in properties.items() if isinstance(prop, dict)}
+
+
+def diff_properties(current: Dict, properties: Dict) -> Dict:
+    """
+    Propriétés de `properties` (payload d'écriture) qui diffèrent de `current`
+    (propriétés brutes d'une page lue dans Notion).
+    
+    Args:
+        current: Propriétés de la page telles que lues (page["properties"])
+        properties: Propriétés à écrire
+    
+    Returns:
+        Sous-ensemble de `properties` à envoyer (vide si la page est déjà à jour)
+    """
+    known = _page_fingerprint(current or {})
+    return {
+        name: prop for name, prop in properties.items()
+        if not isinstance(prop, dict) or known.get(name) != _fingerprint(prop)
+    }
+
+
+def _changed_properties(database_id: str, page_id: str, properties: Dict) -> Dict:
+    """Propriétés dont la valeur diffère de l'empreinte connue (toutes si la page est inconnue)."""
+    known = _page_fingerprints.get(database_id, {}).get(page_id)
+    if known is None:
+        return properties
+    return {
+        name: prop for name, prop in properties.items()
+        if not isinstance(prop, dict) or known.get(name) != _fingerprint(prop)
+    }
+
+
+def _remember_fingerprint(database_id: str, page_id: str, properties: Dict) -> None:
+    pages = _page_fingerprints.setdefault(database_id, {})
+    pages[page_id] = {**pages.get(page_id, {}), **_page_fingerprint(properties)}
+
+
+def _detect_title_property(client: Client, database_id: str) -> Optional[str]:
+    """Retourne le nom de la propriété titre de la base (ou None)."""
+    try:
+        schema = get_database_properties(client, database_id)
+    except Exception:
+        return None
+    for prop_name, prop_def in schema.items():
+        if prop_def.get("type") == "title":
+            return prop_name
+    return None
+
+
+def _page_title(page: Dict, title_property: Optional[str]) -> Optional[str]:
+    """Extrait le titre d'une page brute Notion."""
+    props = page.get("properties", {})
+    
+    # Si on connaît la propriété titre, on l'utilise directement
+    if title_property and title_property in props:
+        return str(simplify_property(props[title_property]))
+    
+    # Sinon, on prend la première propriété de type title
+    for prop_value in props.values():
+        if prop_value.get("type") == "title":
+            return str(simplify_property(prop_value))
+    return None
+
+
+def build_title_index(
+    client: Client,
+    database_id: str,
+    title_property: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Construit l'index titre normalisé → page_id d'une base en une seule passe paginée.
+    
+    L'index est partagé par find_page_by_title, upsert_page et
+    resolve_relation_by_title : une base n'est parcourue qu'une fois par run,
+    quel que soit le nombre de titres recherchés.
+    
+    Args:
+        client: Client Notion
+        database_id: ID de la base
+        title_property: Nom de la propriété titre (si None, détecte automatiquement)
+    
+    Returns:
+        Dict titre normalisé → page_id
+    """
+    normalized_db_id = normalize_id(database_id)
+    if not normalized_db_id:
+        return {}
+    
+    index = _title_to_page_id_cache.setdefault(normalized_db_id, {})
+    if normalized_db_id in _indexed_databases:
+        return index
+    
+    with _index_lock(normalized_db_id):
+        # Un autre thread a pu finir la passe pendant qu'on attendait
+        index = _title_to_page_id_cache.setdefault(normalized_db_id, {})
+        if normalized_db_id in _indexed_databases:
+            return index
+        
+        if not title_property:
+            title_property = _detect_title_property(client, normalized_db_id)
+        
+        try:
+            for page in iter_database_pages(client, normalized_db_id):
+                page_id = page.get("id")
+                page_title = _page_title(page, title_property)
+                if not page_id or page_title is None:
+                    continue
+                # Premier match gagnant (même ordre que la pagination Notion)
+                index.setdefault(normalize_text(page_title), page_id)
+                # Empreinte des valeurs actuelles : un upsert identique n'écrira rien
+                _remember_fingerprint(normalized_db_id, page_id, page.get("properties") or {})
+        except Exception:
+            # Index partiel : on ne marque pas la base comme indexée,
+            # la prochaine recherche retentera une passe complète
+            return index
+        
+        _indexed_databases.add(normalized_db_id)
+        return index
 
 
 def find_page_by_title(
@@ -35,7 +228,8 @@ def find_page_by_title(
     """
     Trouve une page par son titre dans une base Notion.
     
-    Utilise un cache local pour éviter les requêtes répétées.
+    Utilise l'index de la base (construit une seule fois via build_title_index),
+    donc un titre absent ne déclenche pas de nouveau parcours de la base.
     
     Args:
         client: Client Notion
@@ -51,54 +245,16 @@ def find_page_by_title(
     if not normalized_db_id:
         return None
     
-    # Normalise le titre pour le cache
+    # Normalise le titre pour l'index
     normalized_title = normalize_text(title)
     
-    # Vérifie le cache
-    if normalized_db_id not in _title_to_page_id_cache:
-        _title_to_page_id_cache[normalized_db_id] = {}
-    
-    if normalized_title in _title_to_page_id_cache[normalized_db_id]:
-        return _title_to_page_id_cache[normalized_db_id][normalized_title]
+    # Vérifie l'index (pages déjà vues ou créées pendant le run)
+    cached = _title_to_page_id_cache.get(normalized_db_id, {}).get(normalized_title)
+    if cached:
+        return cached
     
-    # Récupère le schéma pour trouver la propriété titre
-    if not title_property:
-        try:
-            schema = get_database_properties(client, normalized_db_id)
-            for prop_name, prop_def in schema.items():
-                if prop_def.get("type") == "title":
-                    title_property = prop_name
-                    break
-        except Exception:
-            pass
-    
-    # Parcourt les pages pour trouver le titre
-    try:
-        for page in iter_database_pages(client, normalized_db_id):
-            props = page.get("properties", {})
-            
-            # Si on connaît la propriété titre, on l'utilise directement
-            if title_property and title_property in props:
-                page_title = simplify_property(props[title_property])
-                if normalize_text(str(page_title)) == normalized_title:
-                    page_id = page.get("id")
-                    if page_id:
-                        _title_to_page_id_cache[normalized_db_id][normalized_title] = page_id
-                        return page_id
-            else:
-                # Sinon, on cherche toutes les propriétés de type title
-                for prop_name, prop_value in props.items():
-                    if prop_value.get("type") == "title":
-                        page_title = simplify_property(prop_value)
-                        if normalize_text(str(page_title)) == normalized_title:
-                            page_id = page.get("id")
-                            if page_id:
-                                _title_to_page_id_cache[normalized_db_id][normalized_title] = page_id
-                                return page_id
-    except Exception:
-        pass
-    
-    return None
+    index = build_title_index(client, normalized_db_id, title_property)
+    return index.get(normalized_title)
 
 
 def upsert_page(
@@ -111,6 +267,10 @@ def upsert_page(
     """
     Crée ou met à jour une page dans Notion (idempotent).
     
+    Une page existante dont l'empreinte (valeurs lues par l'index, ou dernière
+    écriture du run) correspond déjà n'est pas réécrite ; sinon seules les
+    propriétés modifiées sont envoyées.
+    
     Args:
         client: Client Notion
         database_id: ID de la base
@@ -122,6 +282,7 @@ def upsert_page(
         Tuple (created, updated, page_id)
         - created: True si la page a été créée
         - updated: True si la page a été mise à jour
+          (created et updated à False : page inchangée, aucune écriture)
         - page_id: ID de la page
     """
     # Normalise l'ID de la base
@@ -133,13 +294,19 @@ def upsert_page(
     existing_page_id = find_page_by_title(client, normalized_db_id, title, title_property)
     
     if existing_page_id:
-        # Mise à jour
+        changed = _changed_properties(normalized_db_id, existing_page_id, properties)
+        if not changed:
+            return (False, False, existing_page_id)
+        
+        # Mise à jour (propriétés modifiées uniquement)
         try:
             safe_notion_call(
                 client.pages.update,
                 page_id=existing_page_id,
-                properties=properties,
+                properties=changed,
             )
+            mark_stale(normalized_db_id)
+            _remember_fingerprint(normalized_db_id, existing_page_id, changed)
             return (False, True, existing_page_id)
         except Exception as e:
             # Si la mise à jour échoue, on essaie de créer (peut-être que la page a été supprimée)
@@ -154,11 +321,11 @@ def upsert_page(
         )
         page_id = new_page.get("id")
         if page_id:
-            # Met à jour le cache
+            mark_stale(normalized_db_id)
+            _remember_fingerprint(normalized_db_id, page_id, properties)
+            # Met à jour l'index (la page est visible pour les recherches suivantes)
             normalized_title = normalize_text(title)
-            if normalized_db_id not in _title_to_page_id_cache:
-                _title_to_page_id_cache[normalized_db_id] = {}
-            _title_to_page_id_cache[normalized_db_id][normalized_title] = page_id
+            _title_to_page_id_cache.setdefault(normalized_db_id, {})[normalized_title] = page_id
             return (True, False, page_id)
     except Exception as e:
         raise RuntimeError(f"Erreur lors de la création/mise à jour de la page '{title}': {e}")
@@ -0,0 +1,77 @@
+"""Écriture concurrente des upserts Notion (pool de workers borné)."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import NOTION_MAX_WORKERS
+from integrations.notion.mappers import normalize_text
+
+
+@dataclass
+class UpsertTask:
+    """Un upsert à exécuter : `run()` retourne (created, updated, page_id) comme upsert_page."""
+
+    name: str
+    run: Callable[[], Tuple[bool, bool, str]]
+    key: Optional[str] = None
+
+
+def run_upserts(
+    tasks: List[UpsertTask],
+    max_workers: int = NOTION_MAX_WORKERS,
+) -> Dict[str, int]:
+    """
+    Exécute les upserts en parallèle et compte les résultats.
+
+    Les tâches de même clé (par défaut : le titre normalisé) passent dans l'ordre
+    sur le même worker : deux articles au même titre ne créent jamais deux pages.
+    Une erreur sur un article est affichée et comptée, sans arrêter les autres.
+    Un upsert qui n'a rien écrit (page déjà à jour) est compté dans n_skipped.
+    Le débit (~3 requêtes/s) est tenu par le limiteur partagé de client.py.
+
+    Args:
+        tasks: Upserts à exécuter
+        max_workers: Nombre d'upserts en vol en même temps
+
+    Returns:
+        Dict avec n_created, n_updated, n_skipped, n_errors
+    """
+    # Regroupe par clé en gardant l'ordre d'arrivée
+    groups: Dict[str, List[UpsertTask]] = {}
+    for task in tasks:
+        key = task.key if task.key is not None else normalize_text(task.name)
+        groups.setdefault(key, []).append(task)
+
+    counts = {"n_created": 0, "n_updated": 0, "n_skipped": 0, "n_errors": 0}
+    counts_lock = threading.Lock()
+
+    def _run_group(group: List[UpsertTask]) -> None:
+        for task in group:
+            try:
+                created, updated, _page_id = task.run()
+            except Exception as e:
+                with counts_lock:
+                    counts["n_errors"] += 1
+                print(f"   ❌ Erreur pour '{task.name}': {e}")
+                continue
+            with counts_lock:
+                if created:
+                    counts["n_created"] += 1
+                elif updated:
+                    counts["n_updated"] += 1
+                else:
+                    counts["n_skipped"] += 1
+
+    if not groups:
+        return counts
+
+    workers = max(1, min(max_workers, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() propage une éventuelle erreur inattendue d'un worker
+        list(executor.map(_run_group, groups.values()))
+
+    return counts
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import argparse
 import json
 from pathlib import Path
 from typing import Dict
@@ -12,7 +13,9 @@ from app.config import (
     models_scorecard_db_id_2,
     models_scorecard_db_id_3,
 )
-from notion_tools.notion_reader import export_database, get_client, normalize_id, slugify
+from notion_tools.mirror import read_database
+from notion_tools.ndjson_export import export_database_ndjson, ndjson_path
+from notion_tools.notion_reader import get_client, normalize_id, slugify
 
 
 DATABASES: Dict[str, str] = {
@@ -22,7 +25,11 @@ DATABASES: Dict[str, str] = {
 }
 
 
-def main(output_dir: Path = DATA_DIR / "exports") -> None:
+def main(
+    output_dir: Path = DATA_DIR / "exports",
+    ndjson: bool = False,
+    compress: bool = False,
+) -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
     client = get_client()
 
@@ -32,9 +39,20 @@ def main(output_dir: Path = DATA_DIR / "exports") -> None:
             print(f"⚠️ ID manquant pour {label}, base ignorée")
             continue
 
+        if ndjson:
+            # Streaming : pages écrites au fur et à mesure, reprise possible après interruption
+            filename = ndjson_path(output_dir, slugify(label), compress)
+            try:
+                print(f"➡️  Export de '{label}' vers NDJSON…")
+                count = export_database_ndjson(client, normalized_id, filename, compress=compress)
+                print(f"   ✅ {count} entrée(s) écrite(s) dans {filename}")
+            except Exception as exc:
+                print(f"   ❌ Erreur lors de l'export (relancer pour reprendre) : {exc}")
+            continue
+
         try:
             print(f"➡️  Export de '{label}' vers JSON…")
-            pages = export_database(client, normalized_id)
+            pages = read_database(client, normalized_id)
             filename = output_dir / f"{slugify(label)}.json"
             filename.write_text(
                 json.dumps(pages, ensure_ascii=False, indent=2),
@@ -46,5 +64,9 @@ def main(output_dir: Path = DATA_DIR / "exports") -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Exporte les bases Notion en JSON")
+    parser.add_argument("--ndjson", action="store_true", help="Export NDJSON en streaming")
+    parser.add_argument("--gzip", action="store_true", help="Compresse les fichiers NDJSON")
+    args = parser.parse_args()
+    main(ndjson=args.ndjson, compress=args.gzip)
 
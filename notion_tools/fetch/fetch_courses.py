@@ -7,8 +7,9 @@ from pathlib import Path
 from typing import Dict
 
 from app.config import DATA_DIR, models_scorecard_db_id_2
+from app.store import record as record_in_store
+from notion_tools.mirror import read_database
 from notion_tools.notion_reader import (
-    export_database,
     get_client,
     get_database_properties,
     normalize_id,
@@ -50,7 +51,7 @@ def fetch_courses() -> list[Dict]:
             f"Colonnes disponibles: {available}"
         )
 
-    pages = export_database(client, normalized_id)
+    pages = read_database(client, normalized_id)
     items = []
     for page in pages:
         if not page:
@@ -74,6 +75,7 @@ def main() -> None:
     items = fetch_courses()
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     OUTPUT_PATH.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
+    record_in_store("replace_notion_pages", "courses", items)
     print(f"   ✅ {len(items)} élément(s) enregistré(s) dans {OUTPUT_PATH}")
 
 if __name__ == "__main__":
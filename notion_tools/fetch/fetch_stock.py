@@ -1,20 +1,22 @@
 """Export du stock Notion vers un fichier JSON.
 
 Usage : `python fetch_stock.py`
-Le fichier `stock.json` sert de snapshot complet, incluant toutes les
-propriétés connues et le schéma de la base pour faciliter la
-resynchronisation.
+Le fichier `stock.json` est un snapshot compact (format `stock-v2`, voir
+`app/stock.py`) : le schéma de la base une seule fois en en-tête, puis une
+ligne à champs fixes par article (page_id, nom, nom normalisé, quantité,
+unité, catégorie).
 """
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from app.config import DATA_DIR, models_scorecard_db_id_3
+from app.stock import StockItem, write_snapshot
+from app.store import record as record_in_store
+from notion_tools.mirror import read_database
 from notion_tools.notion_reader import (
-    export_database,
     get_client,
     get_database_properties,
     normalize_id,
@@ -62,7 +64,7 @@ def _page_to_stock_item(
     return item
 
 
-def fetch_stock() -> List[Dict]:
+def _read_stock() -> Tuple[List[Dict], Dict, Dict[str, str | None]]:
     normalized_id = normalize_id(STOCK_DB_ID)
     if not normalized_id:
         raise RuntimeError("Aucun identifiant de base Stock fourni.")
@@ -90,7 +92,9 @@ def fetch_stock() -> List[Dict]:
     if not unit_key:
         unit_key = find_property_by_type(client, normalized_id, ["rich_text", "select", "multi_select"])
 
-    pages = export_database(client, normalized_id)
+    category_key = resolve_property_name(client, normalized_id, ["Catégorie", "Categorie", "Category"])
+
+    pages = read_database(client, normalized_id)
     items = []
     for page in pages:
         if not page:
@@ -105,23 +109,37 @@ def fetch_stock() -> List[Dict]:
         if unit_key and unit_key in item and item[unit_key] is None:
             item[unit_key] = ""
 
-        # Sauvegarde le schéma complet dans l'item pour la synchronisation inverse
-        item["__schema__"] = schema
-
         items.append(item)
 
+    keys = {
+        "name_key": name_key,
+        "quantity_key": quantity_key,
+        "unit_key": unit_key,
+        "category_key": category_key,
+    }
+    return items, schema, keys
+
+
+def fetch_stock() -> List[Dict]:
+    # Pages du stock (une entrée par article, toutes les colonnes)
+    items, _schema, _keys = _read_stock()
     return items
 
 
+def fetch_stock_snapshot() -> Tuple[List[StockItem], Dict]:
+    # Articles à champs fixes (noms déjà normalisés) + schéma de la base, pour stock.json
+    pages, schema, keys = _read_stock()
+    items = [StockItem.from_dict(page, **keys) for page in pages]
+    return [item for item in items if item is not None], schema
+
+
 def main() -> None:
     print("➡️  Lecture du stock Notion…")
-    items = fetch_stock()
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
+    items, schema = fetch_stock_snapshot()
+    write_snapshot(OUTPUT_PATH, items, schema)
+    record_in_store("replace_stock", items)
     print(f"   ✅ {len(items)} élément(s) enregistré(s) dans {OUTPUT_PATH}")
 
 
 if __name__ == "__main__":
     main()
-
-
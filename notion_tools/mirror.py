@@ -0,0 +1,194 @@
+"""Miroir local des bases Notion, tenu à jour par delta sur last_edited_time.
+
+Chaque base a un fichier `data/notion_mirror/<id>.json` :
+- `pages` : pages simplifiées (format `page_to_dict`), par ID ;
+- `high_water` : plus grand `last_edited_time` vu ;
+- `synced_at` / `full_sync_at` : dates (epoch) de la dernière synchro et de la dernière relecture complète.
+
+Une synchro delta ne demande à Notion que les pages modifiées depuis `high_water`.
+Les pages archivées ou à la corbeille ne sont jamais renvoyées par les requêtes :
+chaque delta relit aussi la liste des IDs présents (une requête qui ne ramène que
+le titre) et retire du miroir les pages qui n'y sont plus, y compris celles
+supprimées à la main dans Notion. `forget_pages` les retire tout de suite quand
+c'est ce code qui les archive.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from notion_client import Client
+
+from app.config import (
+    NOTION_MIRROR_DIR,
+    NOTION_MIRROR_ENABLED,
+    NOTION_MIRROR_FULL_SYNC_HOURS,
+    NOTION_MIRROR_MAX_AGE_SECONDS,
+)
+from notion_tools.notion_reader import (
+    export_database,
+    iter_database_pages,
+    list_page_ids,
+    normalize_id,
+    page_to_dict,
+)
+
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_stale: set = set()
+
+
+def _mirror_key(database_id: str) -> Optional[str]:
+    normalized = normalize_id(database_id)
+    if not normalized:
+        return None
+    return normalized.replace("-", "").lower()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _mirror_path(key: str) -> Path:
+    return NOTION_MIRROR_DIR / f"{key}.json"
+
+
+def _load(key: str) -> Dict:
+    path = _mirror_path(key)
+    if not path.exists():
+        return {}
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as exc:
+        print(f"   [WARN] Miroir Notion illisible ({path.name}), relecture complète : {exc}")
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save(key: str, state: Dict) -> None:
+    path = _mirror_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def mark_stale(database_id: str) -> None:
+    # La prochaine lecture fera une synchro delta même si le miroir est récent
+    key = _mirror_key(database_id)
+    if key:
+        _stale.add(key)
+
+
+def forget_pages(database_id: str, page_ids: Iterable[str]) -> None:
+    # Retire du miroir des pages archivées par ce code (Notion ne les renvoie plus)
+    key = _mirror_key(database_id)
+    if not key or not NOTION_MIRROR_ENABLED:
+        return
+    ids = {page_id for page_id in page_ids if page_id}
+    if not ids:
+        return
+    with _lock_for(key):
+        state = _load(key)
+        pages = state.get("pages") or {}
+        if not pages:
+            return
+        for page_id in ids:
+            pages.pop(page_id, None)
+        state["pages"] = pages
+        _save(key, state)
+
+
+def sync_database(client: Client, database_id: str, full: bool = False) -> Dict[str, Dict]:
+    """
+    Met à jour le miroir d'une base et retourne ses pages par ID.
+
+    Args:
+        client: Client Notion
+        database_id: ID de la base
+        full: Force une relecture complète
+
+    Returns:
+        Dict page_id → page simplifiée
+    """
+    key = _mirror_key(database_id)
+    if not key:
+        raise RuntimeError("Identifiant de base de données invalide.")
+    normalized = normalize_id(database_id)
+
+    with _lock_for(key):
+        state = _load(key)
+        now = time.time()
+        pages: Dict[str, Dict] = state.get("pages") or {}
+        high_water = state.get("high_water")
+
+        if key not in _stale and now - state.get("synced_at", 0) < NOTION_MIRROR_MAX_AGE_SECONDS and not full:
+            return pages
+
+        full = (
+            full
+            or not high_water
+            or now - state.get("full_sync_at", 0) >= NOTION_MIRROR_FULL_SYNC_HOURS * 3600
+        )
+
+        if full:
+            query_filter = None
+            pages = {}
+        else:
+            # last_edited_time est arrondi à la minute : on_or_after ne rate rien,
+            # quitte à relire quelques pages déjà connues
+            query_filter = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": high_water},
+            }
+
+        n_changed = 0
+        for page in iter_database_pages(client, normalized, filter=query_filter):
+            page_id = page.get("id")
+            if not page_id:
+                continue
+            n_changed += 1
+            edited = page.get("last_edited_time")
+            if edited and (not high_water or edited > high_water):
+                high_water = edited
+            pages[page_id] = page_to_dict(page)
+
+        n_removed = 0
+        if not full:
+            # Listé après le delta : une page créée entre-temps sera lue au prochain delta,
+            # une page supprimée entre-temps est bien retirée
+            live_ids = list_page_ids(client, normalized)
+            for page_id in [page_id for page_id in pages if page_id not in live_ids]:
+                del pages[page_id]
+                n_removed += 1
+
+        state.update(
+            {
+                "database_id": normalized,
+                "pages": pages,
+                "high_water": high_water,
+                "synced_at": now,
+            }
+        )
+        if full:
+            state["full_sync_at"] = now
+        _save(key, state)
+        _stale.discard(key)
+
+    mode = "complète" if full else "delta"
+    removed = f", {n_removed} supprimée(s)" if n_removed else ""
+    print(f"   🔄 Miroir Notion ({mode}) : {n_changed} page(s) lue(s){removed}, {len(pages)} en local")
+    return pages
+
+
+def read_database(client: Client, database_id: str) -> List[Dict]:
+    # Remplace export_database pour les lecteurs : sert le miroir, synchronisé si besoin
+    if not NOTION_MIRROR_ENABLED:
+        return export_database(client, database_id)
+    return list(sync_database(client, database_id).values())
@@ -0,0 +1,122 @@
+"""Export d'une base Notion en NDJSON, écrit au fil des pages (mémoire constante).
+
+Chaque réponse paginée (100 pages max) est convertie par `page_to_dict`, écrite
+(une page par ligne), puis oubliée. Après chaque réponse, un checkpoint
+`<fichier>.checkpoint.json` garde le curseur suivant et la taille du fichier :
+un export interrompu reprend là où il s'était arrêté, sans doublon.
+
+En gzip, chaque réponse est un membre gzip complet (un fichier gzip multi-membres
+se relit normalement avec `gzip.open`) : le fichier peut être tronqué proprement
+au dernier checkpoint.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from notion_client import Client
+
+from notion_tools.notion_reader import iter_database_batches, normalize_id, page_to_dict
+
+
+def ndjson_path(output_dir: Path, name: str, compress: bool = False) -> Path:
+    return output_dir / f"{name}.ndjson{'.gz' if compress else ''}"
+
+
+def _checkpoint_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".checkpoint.json")
+
+
+def _load_checkpoint(path: Path, database_id: str) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return None
+    if not isinstance(checkpoint, dict) or checkpoint.get("database_id") != database_id:
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path: Path, checkpoint: Dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _encode(pages) -> bytes:
+    lines = [json.dumps(page_to_dict(page), ensure_ascii=False, default=str) for page in pages]
+    return "".join(line + "\n" for line in lines).encode("utf-8")
+
+
+def export_database_ndjson(
+    client: Client,
+    database_id: str,
+    output_path: Path,
+    compress: bool = False,
+    resume: bool = True,
+) -> int:
+    """
+    Exporte une base Notion en NDJSON (optionnellement gzip), en streaming.
+
+    Args:
+        client: Client Notion
+        database_id: ID de la base
+        output_path: Fichier de sortie (.ndjson ou .ndjson.gz)
+        compress: Écrit en gzip
+        resume: Reprend un export interrompu si un checkpoint existe
+
+    Returns:
+        Nombre total de pages dans le fichier
+    """
+    normalized = normalize_id(database_id)
+    if not normalized:
+        raise RuntimeError("Identifiant de base de données invalide.")
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = _checkpoint_path(output_path)
+
+    checkpoint = _load_checkpoint(checkpoint_path, normalized) if resume else None
+    if checkpoint and output_path.exists():
+        start_cursor = checkpoint.get("next_cursor")
+        written = int(checkpoint.get("written", 0))
+        offset = int(checkpoint.get("offset", 0))
+        print(f"   ↪️  Reprise de l'export ({written} page(s) déjà écrite(s))")
+    else:
+        start_cursor, written, offset = None, 0, 0
+
+    with open(output_path, "r+b" if offset else "wb") as raw:
+        # Enlève ce qui a été écrit après le dernier checkpoint (réponse incomplète)
+        raw.seek(offset)
+        raw.truncate()
+
+        batches = iter_database_batches(client, normalized, start_cursor=start_cursor)
+        for results, next_cursor in batches:
+            payload = _encode(results)
+            if compress:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as member:
+                    member.write(payload)
+            else:
+                raw.write(payload)
+            raw.flush()
+
+            written += len(results)
+            if next_cursor:
+                _save_checkpoint(
+                    checkpoint_path,
+                    {
+                        "database_id": normalized,
+                        "next_cursor": next_cursor,
+                        "written": written,
+                        "offset": raw.tell(),
+                    },
+                )
+
+    # Export terminé : plus rien à reprendre
+    checkpoint_path.unlink(missing_ok=True)
+    return written
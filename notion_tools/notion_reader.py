@@ -4,12 +4,13 @@ from __future__ import annotations
 
 import json
 from functools import lru_cache
-from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from notion_client import Client
 from notion_client.errors import APIResponseError
 
 from app.config import api_key
+from integrations.notion.client import safe_notion_call
 
 
 _DATABASE_PROPERTIES_CACHE: Dict[str, Dict[str, Dict]] = {}
@@ -34,42 +35,98 @@ def normalize_id(raw_id: Optional[str]) -> Optional[str]:
 
 @lru_cache(maxsize=None)
 def get_data_source_id(client: Client, database_id: str) -> str:
-    database = client.databases.retrieve(database_id=database_id)
+    database = safe_notion_call(client.databases.retrieve, database_id=database_id)
     data_sources: Iterable[dict] = database.get("data_sources", [])
     if not data_sources:
         raise RuntimeError("Aucun data source associé à la base Notion.")
     return data_sources[0]["id"]
 
 
-def query_data_source(client: Client, data_source_id: str, start_cursor: Optional[str] = None) -> Dict:
+def query_data_source(
+    client: Client,
+    data_source_id: str,
+    start_cursor: Optional[str] = None,
+    filter: Optional[Dict] = None,
+    sorts: Optional[List[Dict]] = None,
+    filter_properties: Optional[List[str]] = None,
+) -> Dict:
     body: Dict[str, object] = {}
     if start_cursor:
         body["start_cursor"] = start_cursor
+    if filter:
+        body["filter"] = filter
+    if sorts:
+        body["sorts"] = sorts
 
-    return client.request(
+    return safe_notion_call(
+        client.request,
         path=f"data_sources/{data_source_id}/query",
         method="POST",
+        # filter_properties : seules ces propriétés (par ID) reviennent dans les pages
+        query={"filter_properties": filter_properties} if filter_properties else None,
         body=body or None,
     )
 
 
-def iter_database_pages(client: Client, database_id: str) -> Iterator[Dict]:
+def iter_database_batches(
+    client: Client,
+    database_id: str,
+    filter: Optional[Dict] = None,
+    sorts: Optional[List[Dict]] = None,
+    start_cursor: Optional[str] = None,
+    filter_properties: Optional[List[str]] = None,
+) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    # Une réponse paginée à la fois : (pages, curseur de la suivante ou None à la fin)
     normalized = normalize_id(database_id)
     if not normalized:
-        return iter(())
+        return
 
     data_source_id = get_data_source_id(client, normalized)
-    start_cursor: Optional[str] = None
 
     while True:
-        response = query_data_source(client, data_source_id, start_cursor=start_cursor)
-        results = response.get("results", [])
-        for item in results:
-            yield item
-
-        if not response.get("has_more"):
+        response = query_data_source(
+            client,
+            data_source_id,
+            start_cursor=start_cursor,
+            filter=filter,
+            sorts=sorts,
+            filter_properties=filter_properties,
+        )
+        start_cursor = response.get("next_cursor") if response.get("has_more") else None
+        yield response.get("results", []), start_cursor
+
+        if not start_cursor:
             break
-        start_cursor = response.get("next_cursor")
+
+
+def iter_database_pages(
+    client: Client,
+    database_id: str,
+    filter: Optional[Dict] = None,
+    sorts: Optional[List[Dict]] = None,
+) -> Iterator[Dict]:
+    for results, _next_cursor in iter_database_batches(client, database_id, filter=filter, sorts=sorts):
+        yield from results
+
+
+def list_page_ids(client: Client, database_id: str) -> Set[str]:
+    """
+    IDs des pages actuellement dans la base (ni archivées ni à la corbeille).
+
+    Une requête paginée sans filtre qui ne ramène que le titre de chaque page :
+    de quoi repérer les pages supprimées dans Notion sans relire leur contenu.
+
+    Args:
+        client: Client Notion
+        database_id: ID de la base
+
+    Returns:
+        Ensemble des IDs de pages
+    """
+    page_ids: Set[str] = set()
+    for results, _next_cursor in iter_database_batches(client, database_id, filter_properties=["title"]):
+        page_ids.update(page["id"] for page in results if page.get("id"))
+    return page_ids
 
 
 def _extract_text(spans: List[dict]) -> str:
@@ -151,8 +208,14 @@ def slugify(label: str) -> str:
     return slug or "database"
 
 
-def export_database(client: Client, database_id: str) -> List[Dict]:
-    return [page_to_dict(page) for page in iter_database_pages(client, database_id)]
+def export_database(
+    client: Client,
+    database_id: str,
+    filter: Optional[Dict] = None,
+    sorts: Optional[List[Dict]] = None,
+) -> List[Dict]:
+    pages = iter_database_pages(client, database_id, filter=filter, sorts=sorts)
+    return [page_to_dict(page) for page in pages]
 
 
 def get_database_properties(client: Client, database_id: str) -> Dict[str, Dict]:
@@ -162,7 +225,7 @@ def get_database_properties(client: Client, database_id: str) -> Dict[str, Dict]
 
     cache_key = normalized.replace("-", "").lower()
     if cache_key not in _DATABASE_PROPERTIES_CACHE:
-        database = client.databases.retrieve(database_id=normalized)
+        database = safe_notion_call(client.databases.retrieve, database_id=normalized)
         properties = database.get("properties") or {}
 
         if not properties:
@@ -172,7 +235,7 @@ def get_database_properties(client: Client, database_id: str) -> Dict[str, Dict]
                 if not ds_id:
                     continue
                 try:
-                    ds_info = client.request(path=f"/data_sources/{ds_id}", method="GET")
+                    ds_info = safe_notion_call(client.request, path=f"/data_sources/{ds_id}", method="GET")
                 except Exception:
                     continue
 
@@ -224,6 +287,100 @@ def find_property_by_type(
     return None
 
 
+# Opérateur "égal / différent" selon le type de propriété Notion
+_EQUALS_OPERATORS = {
+    "multi_select": ("contains", "does_not_contain"),
+    "relation": ("contains", "does_not_contain"),
+    "people": ("contains", "does_not_contain"),
+}
+_FILTERABLE_TYPES = {
+    "title", "rich_text", "number", "select", "multi_select", "status",
+    "checkbox", "date", "url", "email", "phone_number", "relation", "people",
+}
+
+
+def property_filter(
+    client: Client,
+    database_id: str,
+    candidates: Sequence[str],
+    operator: str,
+    value: object = None,
+) -> Optional[Dict]:
+    """
+    Construit une condition de filtre Notion sur la première propriété trouvée.
+
+    Le nom réel et le type viennent du schéma en cache : "Semaine" peut être un
+    select ou un multi_select, la condition s'adapte.
+
+    Args:
+        client: Client Notion
+        database_id: ID de la base
+        candidates: Noms possibles de la propriété (ex: ["Semaine", "Week"])
+        operator: "equals", "does_not_equal", "is_empty" ou "is_not_empty"
+        value: Valeur comparée (ignorée pour is_empty / is_not_empty)
+
+    Returns:
+        Condition Notion, ou None si la propriété est introuvable ou non filtrable
+        (l'appelant lit alors toute la base)
+    """
+    try:
+        properties = get_database_properties(client, database_id)
+    except Exception as exc:
+        print(f"   [WARN] Schéma Notion indisponible, filtre ignoré : {exc}")
+        return None
+    if not isinstance(properties, dict):
+        return None
+
+    wanted = [c.strip().lower() for c in candidates]
+    name = next((n for n in properties if n.strip().lower() in wanted), None)
+    if name is None:
+        return None
+
+    prop_type = (properties.get(name) or {}).get("type")
+    if prop_type not in _FILTERABLE_TYPES:
+        return None
+
+    if operator in ("is_empty", "is_not_empty"):
+        if prop_type == "checkbox":
+            return None
+        return {"property": name, prop_type: {operator: True}}
+
+    if operator not in ("equals", "does_not_equal"):
+        raise ValueError(f"Opérateur de filtre non géré : {operator}")
+
+    if prop_type == "checkbox":
+        checked = bool(value) if operator == "equals" else not bool(value)
+        return {"property": name, "checkbox": {"equals": checked}}
+    if isinstance(value, bool):
+        # Un booléen sur une colonne texte/select deviendrait "True" : aucune page ne correspondrait
+        return None
+
+    equals_op, differs_op = _EQUALS_OPERATORS.get(prop_type, ("equals", "does_not_equal"))
+    notion_op = equals_op if operator == "equals" else differs_op
+    if prop_type == "number":
+        return {"property": name, "number": {notion_op: value}}
+    return {"property": name, prop_type: {notion_op: str(value)}}
+
+
+def and_filter(*conditions: Optional[Dict]) -> Optional[Dict]:
+    # Combine les conditions présentes (les None sont ignorées)
+    present = [c for c in conditions if c]
+    if not present:
+        return None
+    if len(present) == 1:
+        return present[0]
+    return {"and": present}
+
+
+def or_filter(*conditions: Optional[Dict]) -> Optional[Dict]:
+    present = [c for c in conditions if c]
+    if not present:
+        return None
+    if len(present) == 1:
+        return present[0]
+    return {"or": present}
+
+
 def build_property_payload(value, definition: Dict) -> Optional[Dict]:
     prop_type = definition.get("type")
 
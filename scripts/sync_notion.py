@@ -2,10 +2,14 @@
 
 Usage : `python -m scripts.sync_notion` ou `python scripts/sync_notion.py`
 Génère `data/notion_dump.json` avec toutes les bases exportées.
+
+Avec `--ndjson [--gzip]`, chaque base est écrite au fil de l'eau dans
+`data/notion_dump/<base>.ndjson[.gz]` (mémoire constante, reprise après interruption).
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -24,7 +28,10 @@ from app.config import (
     models_scorecard_db_id_2,
     models_scorecard_db_id_3,
 )
-from notion_tools.notion_reader import export_database, get_client, normalize_id
+from app.store import record as record_in_store
+from notion_tools.mirror import read_database
+from notion_tools.ndjson_export import export_database_ndjson, ndjson_path
+from notion_tools.notion_reader import get_client, normalize_id
 
 
 DATABASES: Dict[str, str] = {
@@ -34,6 +41,24 @@ DATABASES: Dict[str, str] = {
 }
 
 
+def export_ndjson(output_dir: Path = DATA_DIR / "notion_dump", compress: bool = False) -> None:
+    client = get_client()
+
+    for label, db_id in DATABASES.items():
+        normalized_id = normalize_id(db_id)
+        if not normalized_id:
+            print(f"[WARN] ID manquant pour {label}, base ignorée")
+            continue
+
+        output_path = ndjson_path(output_dir, label, compress)
+        try:
+            print(f"[INFO] Export NDJSON de '{label}'...")
+            count = export_database_ndjson(client, normalized_id, output_path, compress=compress)
+            print(f"   -> {count} entrée(s) écrite(s) dans {output_path}")
+        except Exception as exc:
+            print(f"   [ERROR] Erreur lors de l'export de '{label}' (relancer pour reprendre): {exc}")
+
+
 def main() -> None:
     output_path = DATA_DIR / "notion_dump.json"
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -49,8 +74,9 @@ def main() -> None:
 
         try:
             print(f"[INFO] Export de '{label}'...")
-            pages = export_database(client, normalized_id)
+            pages = read_database(client, normalized_id)
             dump[label] = pages
+            record_in_store("replace_notion_pages", label, pages)
             print(f"   -> {len(pages)} entrée(s) exportée(s)")
         except Exception as exc:
             print(f"   [ERROR] Erreur lors de l'export de '{label}': {exc}")
@@ -63,6 +89,20 @@ def main() -> None:
     print(f"[OK] Dump complet écrit dans {output_path}")
 
 
-if __name__ == "__main__":
-    main()
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export des bases Notion")
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Écrit une base par fichier NDJSON, au fil des pages (data/notion_dump/)",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Compresse les fichiers NDJSON")
+    return parser.parse_args()
 
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.ndjson:
+        export_ndjson(compress=args.gzip)
+    else:
+        main()
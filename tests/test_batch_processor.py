@@ -4,6 +4,7 @@ import pytest
 
 from app.batch_processor import (
     estimate_tokens,
+    pack_batches,
     process_in_batches,
     should_split_batch,
 )
@@ -74,3 +75,40 @@ def test_should_split_batch():
     result = should_split_batch(large_items, max_tokens=2000)
     assert isinstance(result, bool)
 
+
+
+def test_pack_batches_by_tokens():
+    """Test découpage selon le nombre d'items et les tokens estimés."""
+    small = [{"name": "x"} for _ in range(5)]
+    assert [len(b) for b in pack_batches(small, max_batch_size=2)] == [2, 2, 1]
+    
+    big = {"name": "y" * 400}  # ~100 tokens
+    items = [big, {"name": "a"}, big, big]
+    batches = pack_batches(items, max_batch_size=50, max_tokens_estimate=150)
+    assert batches == [[big, {"name": "a"}], [big], [big]]
+
+
+def test_process_in_batches_parallel_keeps_order():
+    """Test que les batches tournent en parallèle (limite respectée) sans mélanger l'ordre."""
+    import threading
+    import time
+    
+    items = [{"id": i} for i in range(20)]
+    lock = threading.Lock()
+    in_flight = 0
+    max_seen = 0
+    
+    def processor(batch):
+        nonlocal in_flight, max_seen
+        with lock:
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+        time.sleep(0.02 * (5 - batch[0]["id"] // 4))  # les premiers batches finissent en dernier
+        with lock:
+            in_flight -= 1
+        return [{"processed": item["id"]} for item in batch]
+    
+    result = process_in_batches(items, processor, max_batch_size=4, max_in_flight=3)
+    
+    assert [item["processed"] for item in result] == list(range(20))
+    assert 1 < max_seen <= 3
@@ -0,0 +1,79 @@
+"""Tests pour les points de reprise du pipeline."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import main
+from app.checkpoints import StageCheckpoints, input_hash
+
+STAGES = ("a", "b", "c")
+
+
+def test_stage_reused_only_when_inputs_unchanged(tmp_path):
+    """Test qu'une étape n'est reprise que si ses entrées sont identiques."""
+    first = StageCheckpoints(STAGES, directory=tmp_path)
+    assert first.run("a", {"x": 1}, lambda: [1, 2]) == [1, 2]
+
+    compute = Mock(return_value=[3])
+    resumed = StageCheckpoints(STAGES, directory=tmp_path, resume=True)
+    assert resumed.run("a", {"x": 1}, compute) == [1, 2]
+    compute.assert_not_called()
+    assert resumed.reused == ["a"]
+
+    # Entrées modifiées : recalcul
+    assert resumed.run("a", {"x": 2}, compute) == [3]
+    # Sans --resume : toujours recalculé
+    assert StageCheckpoints(STAGES, directory=tmp_path).run("a", {"x": 2}, lambda: [4]) == [4]
+
+
+def test_from_stage_forces_later_stages(tmp_path):
+    """Test que --from-stage refait l'étape donnée et les suivantes."""
+    writer = StageCheckpoints(STAGES, directory=tmp_path)
+    for stage in STAGES:
+        writer.run(stage, {}, lambda: "ancien")
+
+    checkpoints = StageCheckpoints(STAGES, directory=tmp_path, from_stage="b")
+    assert [checkpoints.run(stage, {}, lambda: "nouveau") for stage in STAGES] == ["ancien", "nouveau", "nouveau"]
+
+    with pytest.raises(ValueError):
+        StageCheckpoints(STAGES, directory=tmp_path, from_stage="inconnue")
+
+
+def test_keep_false_is_not_saved(tmp_path):
+    """Test qu'une sortie refusée par keep (synchro ratée) sera refaite."""
+    checkpoints = StageCheckpoints(STAGES, directory=tmp_path, resume=True)
+    checkpoints.run("c", {}, lambda: {"ok": False}, keep=lambda r: r["ok"])
+    assert not checkpoints.path("c").exists()
+    assert input_hash({"a": 1, "b": 2}) == input_hash({"b": 2, "a": 1})
+
+
+def test_resume_retries_failed_sync_without_paid_calls(tmp_path):
+    """Test qu'après un push raté, --resume ne relance que ce push."""
+    candidates = [{"title": f"Recette {i}", "ingredients": []} for i in range(3)]
+    get_candidates = Mock(return_value=candidates)
+    outcomes = {"recipes": [{"ok": True}], "groceries": [{"ok": False}, {"ok": True}]}
+    sync = Mock(side_effect=lambda kind, start=None: outcomes[kind].pop(0))
+
+    def run(resume):
+        options = main.PipelineOptions(
+            mode="mock", dry_run=False, llm_enabled=False, llm_fallback=False, resume=resume
+        )
+        main.build_pipeline(query=None, stock_path=tmp_path / "stock.json", options=options, refresh_stock=False)
+
+    with patch.object(main, "PIPELINE_CHECKPOINT_DIR", tmp_path / "checkpoints"), \
+         patch.object(main, "MENU_PATH", tmp_path / "menu.json"), \
+         patch.object(main, "GROCERIES_PATH", tmp_path / "groceries.json"), \
+         patch.object(main, "ACHATS_PATH", tmp_path / "achats.json"), \
+         patch.object(main, "record_in_store"), \
+         patch.object(main, "get_candidate_recipes", get_candidates), \
+         patch.object(main, "_notion_sync_config", return_value=Mock(mealplan_db_id="")), \
+         patch.object(main, "_push_to_notion", sync):
+        run(resume=False)
+        run(resume=True)
+        # Synchro réussie et entrées inchangées : plus rien à refaire
+        run(resume=True)
+
+    assert get_candidates.call_count == 1
+    # Recettes poussées une fois ; courses refaites seulement après l'échec
+    assert [c.args[0] for c in sync.call_args_list] == ["recipes", "groceries", "groceries"]
@@ -0,0 +1,68 @@
+"""Tests pour l'exécuteur de graphe d'étapes."""
+
+import threading
+import time
+
+import pytest
+
+from app.dag import Stage, run_stages
+
+
+def test_independent_stages_overlap():
+    """Test que deux étapes indépendantes tournent en même temps, la suivante attend les deux."""
+    started = {}
+    both_running = threading.Barrier(2, timeout=2)
+
+    def slow(name):
+        def run(_results):
+            started[name] = time.monotonic()
+            both_running.wait()  # bloquerait si les deux étapes passaient l'une après l'autre
+            return name
+        return run
+
+    results = run_stages([
+        Stage("recettes", slow("recettes")),
+        Stage("stock", slow("stock")),
+        Stage("selection", lambda r: (r["recettes"], r["stock"]), ("recettes", "stock")),
+    ], max_parallel=2)
+
+    assert results["selection"] == ("recettes", "stock")
+
+
+def test_max_parallel_one_runs_in_declared_order():
+    """Test qu'avec max_parallel=1 les étapes passent une par une, dans l'ordre déclaré."""
+    order = []
+
+    def record(name):
+        return lambda _results: order.append(name)
+
+    run_stages([
+        Stage("c", record("c"), ("a",)),
+        Stage("a", record("a")),
+        Stage("b", record("b")),
+    ], max_parallel=1)
+
+    assert order == ["a", "c", "b"]
+
+
+def test_failure_stops_dependents_and_is_raised():
+    """Test qu'une étape en erreur bloque ses dépendantes et remonte l'erreur."""
+    ran = []
+
+    def fail(_results):
+        raise RuntimeError("Notion indisponible")
+
+    with pytest.raises(RuntimeError, match="Notion"):
+        run_stages([
+            Stage("push", fail),
+            Stage("apres", lambda r: ran.append("apres"), ("push",)),
+        ])
+    assert ran == []
+
+
+def test_invalid_graph():
+    """Test des graphes invalides (dépendance inconnue, cycle)."""
+    with pytest.raises(ValueError, match="inconnue"):
+        run_stages([Stage("a", lambda r: 1, ("x",))])
+    with pytest.raises(ValueError, match="Cycle"):
+        run_stages([Stage("a", lambda r: 1, ("b",)), Stage("b", lambda r: 1, ("a",))])
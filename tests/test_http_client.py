@@ -0,0 +1,72 @@
+"""Tests pour la session HTTP partagée."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app import http_client
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    http_client.close_session()  # ferme la connexion keep-alive avant d'arrêter le serveur
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    http_client.close_session()
+    yield
+    http_client.close_session()
+
+
+def test_timeout_for_uses_host_specific_value():
+    """Test timeout par hôte, avec repli sur la valeur par défaut."""
+    assert http_client.timeout_for("https://ntfy.sh/topic") == 5
+    assert http_client.timeout_for("https://api.spoonacular.com/recipes/1/information") == 30
+    with patch('app.http_client.HTTP_TIMEOUT', 12):
+        assert http_client.timeout_for("https://example.com/") == 12
+
+
+def test_request_passes_host_timeout_unless_overridden():
+    """Test que le timeout de l'hôte est ajouté sauf s'il est fourni."""
+    with patch.object(http_client.get_session(), "request") as mock_request:
+        http_client.post("https://ntfy.sh/topic", data=b"x")
+        assert mock_request.call_args[1]["timeout"] == 5
+
+        http_client.get("https://ntfy.sh/topic", timeout=1)
+        assert mock_request.call_args[1]["timeout"] == 1
+
+
+def test_session_reuses_connections(local_server):
+    """Test que plusieurs requêtes vers un même hôte réutilisent la connexion."""
+    assert http_client.get_session() is http_client.get_session()
+
+    for _ in range(3):
+        response = http_client.get(local_server)
+        assert response.text == "ok"
+
+    stats = http_client.connection_stats()["127.0.0.1"]
+    assert stats == {"requests": 3, "connections": 1, "reused": 2}
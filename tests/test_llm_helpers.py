@@ -57,3 +57,51 @@ def test_lite_candidates_limit():
     result = _lite_candidates(candidates, limit=10)
     assert len(result) <= 10
 
+
+
+def test_complete_quantities_llm_batches_only_missing():
+    """Test que seuls les batches avec des quantités manquantes partent au LLM, avec leurs recettes."""
+    from unittest.mock import patch
+    from app.llm import complete_quantities_llm
+    
+    courses = [{"Aliment": f"Item {i}", "Quantité": 1, "Unité": "pc", "Recettes": "A"} for i in range(4)]
+    courses.append({"Aliment": "Sel", "Quantité": "", "Unité": "", "Recettes": "B"})
+    recipes = [{"Nom": "A", "ingredients": []}, {"Nom": "B", "ingredients": []}]
+    
+    def fake_batch(batch, recipes_context):
+        return [dict(item, Quantité=item["Quantité"] or 5) for item in batch]
+    
+    with patch('app.llm.LLM_BATCH_MAX_ITEMS', 2), \
+         patch('app.llm._complete_quantities_batch', side_effect=fake_batch) as mock_batch:
+        result = complete_quantities_llm(courses, recipes)
+    
+    mock_batch.assert_called_once()
+    batch, context = mock_batch.call_args[0]
+    assert [item["Aliment"] for item in batch] == ["Sel"]
+    assert [recipe["Nom"] for recipe in context] == ["B"]
+    assert [item["Quantité"] for item in result] == [1, 1, 1, 1, 5]
+
+
+def test_llm_responses_are_cached(tmp_path):
+    """Test qu'une même entrée ne rappelle pas le LLM, sauf si le prompt change de version."""
+    from unittest.mock import Mock, patch
+    from app.cache import ResponseCache
+    from app.llm import deduplicate_courses_llm
+    
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = '{"courses": [{"Aliment": "Riz", "Quantité": 200, "Unité": "g"}]}'
+    courses = [{"Aliment": "riz", "Quantité": 200, "Unité": "g"}]
+    cache = ResponseCache(tmp_path / "llm.sqlite3", ttl_seconds=3600)
+    
+    with patch('app.llm._llm_cache', cache), patch('app.llm.client') as mock_client:
+        mock_client.chat.completions.create.return_value = response
+        
+        first = deduplicate_courses_llm(courses)
+        second = deduplicate_courses_llm(courses)
+        assert first == second == [{"Aliment": "Riz", "Quantité": 200, "Unité": "g"}]
+        assert mock_client.chat.completions.create.call_count == 1
+        
+        with patch.dict(PROMPT_VERSIONS, {"deduplicate_courses.txt": "v9.9"}):
+            deduplicate_courses_llm(courses)
+        assert mock_client.chat.completions.create.call_count == 2
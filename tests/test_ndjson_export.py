@@ -0,0 +1,89 @@
+"""Tests pour l'export NDJSON en streaming."""
+
+import gzip
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from notion_tools import ndjson_export
+
+DB_ID = "0123456789abcdef0123456789abcdef"
+
+
+def _page(i):
+    return {"id": f"p{i}", "properties": {"Nom": {"type": "title", "title": [{"plain_text": f"Article {i}"}]}}}
+
+
+# Trois réponses paginées : curseurs c1, c2, puis fin
+RESPONSES = {
+    None: ([_page(0), _page(1)], "c1"),
+    "c1": ([_page(2), _page(3)], "c2"),
+    "c2": ([_page(4)], None),
+}
+
+
+def _fake_batches(fail_on=None):
+    calls = []
+
+    def fake(client, database_id, filter=None, sorts=None, start_cursor=None):
+        calls.append(start_cursor)
+        cursor = start_cursor
+        while True:
+            if cursor == fail_on:
+                raise RuntimeError("coupure réseau")
+            results, next_cursor = RESPONSES[cursor]
+            yield results, next_cursor
+            if not next_cursor:
+                return
+            cursor = next_cursor
+
+    return fake, calls
+
+
+def _read_ids(path, compress):
+    opener = gzip.open if compress else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_resumes_after_interruption(tmp_path, compress):
+    """Test qu'un export interrompu reprend au dernier curseur, sans doublon."""
+    output = ndjson_export.ndjson_path(tmp_path, "stock", compress)
+
+    failing, _ = _fake_batches(fail_on="c2")
+    with patch.object(ndjson_export, "iter_database_batches", side_effect=failing):
+        with pytest.raises(RuntimeError):
+            ndjson_export.export_database_ndjson(Mock(), DB_ID, output, compress=compress)
+
+    checkpoint = json.loads((tmp_path / f"{output.name}.checkpoint.json").read_text())
+    assert checkpoint["next_cursor"] == "c2"
+    assert checkpoint["written"] == 4
+
+    resumed, calls = _fake_batches()
+    with patch.object(ndjson_export, "iter_database_batches", side_effect=resumed):
+        count = ndjson_export.export_database_ndjson(Mock(), DB_ID, output, compress=compress)
+
+    assert calls == ["c2"]
+    assert count == 5
+    assert _read_ids(output, compress) == ["p0", "p1", "p2", "p3", "p4"]
+    assert not (tmp_path / f"{output.name}.checkpoint.json").exists()
+
+
+def test_partial_batch_is_truncated_on_resume(tmp_path):
+    """Test que des lignes écrites après le checkpoint sont retirées à la reprise."""
+    output = ndjson_export.ndjson_path(tmp_path, "stock")
+    failing, _ = _fake_batches(fail_on="c2")
+    with patch.object(ndjson_export, "iter_database_batches", side_effect=failing):
+        with pytest.raises(RuntimeError):
+            ndjson_export.export_database_ndjson(Mock(), DB_ID, output)
+
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "ligne incomplète"')
+
+    resumed, _ = _fake_batches()
+    with patch.object(ndjson_export, "iter_database_batches", side_effect=resumed):
+        ndjson_export.export_database_ndjson(Mock(), DB_ID, output)
+
+    assert _read_ids(output, False) == ["p0", "p1", "p2", "p3", "p4"]
@@ -0,0 +1,53 @@
+"""Tests pour la normalisation mémorisée."""
+
+from app import normalize
+from app.normalize import cache_stats, clear_cache, normalize_aliment, normalize_text
+
+
+def test_normalize_aliment_and_text():
+    """Test les deux normalisations (accents, casse, espaces)."""
+    assert normalize_aliment("  Crème Fraîche ") == "creme fraiche"
+    assert normalize_aliment(None) == ""
+    assert normalize_text(" Pâtes ") == "pates"
+    assert normalize_text("") == ""
+
+
+def test_normalize_is_memoized():
+    """Test que les appels répétés sont servis par le cache."""
+    clear_cache()
+    
+    for _ in range(3):
+        normalize_aliment("Oignon")
+    normalize_text("Oignon")
+    
+    stats = cache_stats()
+    assert stats["aliment"] == {"hits": 2, "misses": 1, "size": 1}
+    assert stats["text"] == {"hits": 0, "misses": 1, "size": 1}
+
+
+def test_shared_by_shopping_and_notion():
+    """Test que shopping et les mappers Notion utilisent le même service."""
+    from app import shopping
+    from integrations.notion import mappers
+    
+    assert shopping.normalize_aliment is normalize.normalize_aliment
+    assert mappers.normalize_text is normalize.normalize_text
+
+
+def test_learned_synonyms_override(tmp_path):
+    """Test que learned_synonyms.json complète et prime sur le dictionnaire principal."""
+    from unittest.mock import patch
+    
+    main = tmp_path / "FOOD_SYNONYMS_ALL.json"
+    main.write_text('{"poivron": ["bell pepper", "pepper"], "poivre": ["pepper"]}', encoding="utf-8")
+    learned = tmp_path / "learned_synonyms.json"
+    learned.write_text('{"pepper": "poivre", "Ciboule": "oignon"}', encoding="utf-8")
+    
+    with patch('app.normalize.SYNONYMS_PATH', main), patch('app.normalize.LEARNED_SYNONYMS_PATH', learned):
+        normalize.reload_synonyms()
+        try:
+            assert normalize.canonical_aliment("Bell Pepper") == "poivron"
+            assert normalize.canonical_aliment("pepper") == "poivre"
+            assert normalize.canonical_aliment("ciboule") == "oignon"
+        finally:
+            normalize.reload_synonyms()
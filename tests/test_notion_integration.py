@@ -4,6 +4,7 @@ import os
 from datetime import date
 from unittest.mock import MagicMock, Mock, patch
 
+import httpx
 import pytest
 
 from integrations.notion import config, mappers, models
@@ -290,19 +291,48 @@ def test_safe_notion_call_retries_on_429():
         call_count += 1
         if call_count < 2:
             error = APIResponseError(
-                response=Mock(status_code=429),
+                code="rate_limited",
+                status=429,
                 message="Rate limited",
-                code=429,
+                headers=httpx.Headers({"Retry-After": "0.05"}),
+                raw_body_text="",
             )
             raise error
         return {"id": "success"}
     
-    # Le retry devrait fonctionner automatiquement
-    # On teste juste que la fonction peut être appelée
-    # (le vrai retry est testé dans test_retry.py)
-    result = safe_notion_call(mock_func)
+    # Le 429 est relancé par le limiteur (après Retry-After), sans backoff exponentiel
+    with patch("app.retry.time.sleep") as mock_backoff:
+        result = safe_notion_call(mock_func)
     assert result["id"] == "success"
     assert call_count == 2
+    mock_backoff.assert_not_called()
+
+
+def test_rate_limiter_honours_retry_after_and_adapts_concurrency():
+    """Test token bucket + AIMD : un 429 divise la concurrence et suspend les envois."""
+    import time
+    from integrations.notion.client import NotionRateLimiter
+    
+    limiter = NotionRateLimiter(rate=0, max_concurrency=4)
+    assert limiter.concurrency == 4
+    
+    limiter.acquire()
+    limiter.release(rate_limited=True, retry_after=0.1)
+    assert limiter.concurrency == 2
+    
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09  # Retry-After respecté
+    limiter.release()
+    assert 2 < limiter.concurrency < 3  # remonte doucement
+    
+    # Débit : burst de 2 puis ~1 appel toutes les 50 ms
+    limiter = NotionRateLimiter(rate=20, burst=2, max_concurrency=4)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release()
+    assert time.monotonic() - start >= 0.09
 
 
 # ============================================================================
@@ -396,6 +426,45 @@ def test_upsert_page_updates_existing():
                 assert page_id == "existing_page_123"
 
 
+def test_upsert_page_skips_unchanged_and_sends_diff():
+    """Test qu'une page identique n'est pas réécrite et que seules les propriétés modifiées partent."""
+    clear_cache()
+    
+    mock_client = MagicMock()
+    existing = {
+        "id": "page_123",
+        "properties": {
+            "Name": {"type": "title", "title": [{"plain_text": "Poulet"}]},
+            "Quantité": {"type": "number", "number": 500.0},
+            "Unité": {"type": "rich_text", "rich_text": [{"plain_text": "g"}]},
+            "Catégorie": {"type": "select", "select": {"id": "x", "name": "Viande", "color": "red"}},
+        },
+    }
+    properties = {
+        "Name": {"title": [{"type": "text", "text": {"content": "Poulet"}}]},
+        "Quantité": {"number": 500},
+        "Unité": {"rich_text": [{"type": "text", "text": {"content": "g"}}]},
+        "Catégorie": {"select": {"name": "Viande"}},
+    }
+    
+    with patch("integrations.notion.upsert.iter_database_pages", return_value=[existing]), \
+         patch("integrations.notion.upsert.get_database_properties", return_value={"Name": {"type": "title"}}), \
+         patch("integrations.notion.upsert.safe_notion_call") as mock_call:
+        # Valeurs identiques à la lecture de l'index : aucune écriture
+        assert upsert_page(mock_client, "db_123", "Poulet", properties) == (False, False, "page_123")
+        mock_call.assert_not_called()
+        
+        # Quantité modifiée : seule cette propriété est envoyée
+        changed = {**properties, "Quantité": {"number": 700}}
+        assert upsert_page(mock_client, "db_123", "Poulet", changed) == (False, True, "page_123")
+        assert mock_call.call_args.kwargs["properties"] == {"Quantité": {"number": 700}}
+        
+        # Re-run identique : l'empreinte a suivi la dernière écriture
+        assert upsert_page(mock_client, "db_123", "Poulet", changed) == (False, False, "page_123")
+        assert mock_call.call_count == 1
+    clear_cache()
+
+
 def test_clear_cache():
     """Test que clear_cache vide le cache."""
     # Remplir le cache
@@ -412,3 +481,156 @@ def test_clear_cache():
     assert test_key not in upsert_module._title_to_page_id_cache
     assert len(upsert_module._title_to_page_id_cache) == 0
 
+
+
+def test_find_page_by_title_builds_index_once():
+    """Test que plusieurs titres absents ne déclenchent qu'un seul parcours de la base."""
+    clear_cache()
+    
+    mock_client = MagicMock()
+    mock_page = {
+        "id": "page_123",
+        "properties": {
+            "Name": {
+                "type": "title",
+                "title": [{"plain_text": "Poulet grillé"}],
+            }
+        },
+    }
+    
+    with patch("integrations.notion.upsert.iter_database_pages", return_value=[mock_page]) as mock_iter:
+        with patch("integrations.notion.upsert.get_database_properties", return_value={"Name": {"type": "title"}}):
+            with patch("integrations.notion.upsert.normalize_id", return_value="db_123"):
+                assert find_page_by_title(mock_client, "db_123", "Tomates") is None
+                assert find_page_by_title(mock_client, "db_123", "Oignons") is None
+                assert find_page_by_title(mock_client, "db_123", "poulet grille") == "page_123"
+                
+                assert mock_iter.call_count == 1
+
+
+def test_clear_cache_single_database():
+    """Test que clear_cache(db) n'invalide que l'index de cette base."""
+    import integrations.notion.upsert as upsert_module
+    clear_cache()
+    upsert_module._title_to_page_id_cache["db_a"] = {"a": "page_a"}
+    upsert_module._title_to_page_id_cache["db_b"] = {"b": "page_b"}
+    
+    clear_cache("db_a")
+    
+    assert "db_a" not in upsert_module._title_to_page_id_cache
+    assert upsert_module._title_to_page_id_cache["db_b"] == {"b": "page_b"}
+    clear_cache()
+
+
+# ============================================================================
+# Tests writer.py
+# ============================================================================
+
+def test_run_upserts_counts_and_reports_errors():
+    """Test que le writer garde le contrat n_created/n_updated/n_errors."""
+    from integrations.notion.writer import UpsertTask, run_upserts
+    
+    def _fail():
+        raise RuntimeError("boom")
+    
+    tasks = [
+        UpsertTask(name="Poulet", run=lambda: (True, False, "p1")),
+        UpsertTask(name="Riz", run=lambda: (False, True, "p2")),
+        UpsertTask(name="Sel", run=_fail),
+    ]
+    
+    result = run_upserts(tasks, max_workers=3)
+    
+    assert result == {"n_created": 1, "n_updated": 1, "n_skipped": 0, "n_errors": 1}
+
+
+def test_run_upserts_concurrent_but_same_title_in_order():
+    """Test que les upserts tournent en parallèle, sauf ceux d'un même titre (dans l'ordre)."""
+    import threading
+    import time
+    from integrations.notion.writer import UpsertTask, run_upserts
+    
+    lock = threading.Lock()
+    in_flight = 0
+    max_seen = 0
+    order = []
+    
+    def _make(name, value):
+        def _run():
+            nonlocal in_flight, max_seen
+            with lock:
+                in_flight += 1
+                max_seen = max(max_seen, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+                order.append((name, value))
+            return (value == 1, value != 1, name)
+        return _run
+    
+    tasks = [UpsertTask(name=f"Item {i}", run=_make(f"Item {i}", 1)) for i in range(4)]
+    tasks += [UpsertTask(name="item 0", run=_make("item 0", 2))]  # même titre normalisé
+    
+    result = run_upserts(tasks, max_workers=4)
+    
+    assert result == {"n_created": 4, "n_updated": 1, "n_skipped": 0, "n_errors": 0}
+    assert max_seen > 1
+    same_title = [value for name, value in order if name.lower() == "item 0"]
+    assert same_title == [1, 2]
+
+
+# ============================================================================
+# Tests notion_reader.py (filtres côté serveur)
+# ============================================================================
+
+def test_property_filter_adapts_to_schema_type():
+    """Test que le filtre utilise le nom réel et le type du schéma."""
+    from notion_tools.notion_reader import and_filter, or_filter, property_filter
+    
+    schema = {
+        "semaine": {"type": "multi_select"},
+        "Sélectionnée": {"type": "checkbox"},
+        "Nom": {"type": "title"},
+        "Acheté": {"type": "select"},
+    }
+    with patch("notion_tools.notion_reader.get_database_properties", return_value=schema):
+        week = property_filter(Mock(), "db", ["Semaine", "Week"], "equals", "S46")
+        not_week = property_filter(Mock(), "db", ["Semaine"], "does_not_equal", "S46")
+        empty = property_filter(Mock(), "db", ["Semaine"], "is_empty")
+        selected = property_filter(Mock(), "db", ["Sélectionnée"], "equals", True)
+        missing = property_filter(Mock(), "db", ["Absente"], "equals", True)
+        bool_on_select = property_filter(Mock(), "db", ["Acheté"], "equals", True)
+    
+    assert week == {"property": "semaine", "multi_select": {"contains": "S46"}}
+    assert not_week == {"property": "semaine", "multi_select": {"does_not_contain": "S46"}}
+    assert empty == {"property": "semaine", "multi_select": {"is_empty": True}}
+    assert selected == {"property": "Sélectionnée", "checkbox": {"equals": True}}
+    assert missing is None
+    assert bool_on_select is None  # pas de filtre {"select": {"equals": "True"}}
+    
+    assert and_filter(week, missing) == week
+    assert and_filter(None, None) is None
+    assert or_filter(not_week, empty) == {"or": [not_week, empty]}
+
+
+def test_iter_database_pages_sends_filter_on_every_page():
+    """Test que filter/sorts sont envoyés à chaque page de la requête."""
+    from notion_tools import notion_reader
+    
+    responses = [
+        {"results": [{"id": "p1"}], "has_more": True, "next_cursor": "c1"},
+        {"results": [{"id": "p2"}], "has_more": False},
+    ]
+    query_filter = {"property": "Semaine", "select": {"equals": "S46"}}
+    sorts = [{"property": "Nom", "direction": "ascending"}]
+    
+    with patch.object(notion_reader, "get_data_source_id", return_value="ds"), \
+         patch.object(notion_reader, "safe_notion_call", side_effect=responses) as mock_call:
+        pages = list(notion_reader.iter_database_pages(
+            Mock(), "db", filter=query_filter, sorts=sorts
+        ))
+    
+    assert [p["id"] for p in pages] == ["p1", "p2"]
+    bodies = [call.kwargs["body"] for call in mock_call.call_args_list]
+    assert bodies[0] == {"filter": query_filter, "sorts": sorts}
+    assert bodies[1] == {"start_cursor": "c1", "filter": query_filter, "sorts": sorts}
@@ -298,6 +298,71 @@ def test_push_groceries_with_clear_week(mock_groceries_json, mock_notion_config,
                             assert result["n_created"] == 2
 
 
+def _course_page(page_id, name, qty, week="Semaine 46 – 2025"):
+    return {
+        "id": page_id,
+        "properties": {
+            "Article": {"type": "title", "title": [{"plain_text": name}]},
+            "Quantité": {"type": "number", "number": qty},
+            "Unité": {"type": "rich_text", "rich_text": [{"plain_text": "g"}]},
+            "À acheter ?": {"type": "checkbox", "checkbox": True},
+            "Semaine": {"type": "select", "select": {"name": week}},
+        },
+    }
+
+
+def test_push_groceries_clear_week_reconciles(mock_groceries_json, mock_notion_config):
+    """Test que clear_week ne touche que les lignes nouvelles, modifiées ou disparues."""
+    schema = {
+        "Article": {"type": "title"},
+        "Quantité": {"type": "number"},
+        "Unité": {"type": "rich_text"},
+        "Catégorie": {"type": "select"},
+        "À acheter ?": {"type": "checkbox"},
+        "Semaine": {"type": "select"},
+        "Recettes": {"type": "rich_text"},
+    }
+    groceries = json.loads(mock_groceries_json.read_text(encoding="utf-8"))
+    groceries.append({"Aliment": "Sel", "Quantité": 5, "Unité": "g"})
+    mock_groceries_json.write_text(json.dumps(groceries), encoding="utf-8")
+    
+    existing = [
+        _course_page("p_sel", "Sel", 5),
+        _course_page("p_quinoa", "Quinoa", 100),
+        _course_page("p_riz", "Riz", 300),
+    ]
+    existing[1]["properties"]["Catégorie"] = {"type": "select", "select": {"name": "Céréales"}}
+    mock_client = MagicMock()
+    mock_client.pages.create.return_value = {"id": "p_new"}
+    
+    with patch("integrations.notion.groceries.get_config", return_value=mock_notion_config), \
+         patch("integrations.notion.groceries.get_client", return_value=mock_client), \
+         patch("integrations.notion.groceries.get_database_properties", return_value=schema), \
+         patch("integrations.notion.groceries.normalize_id", return_value="db_123"), \
+         patch("integrations.notion.groceries.property_filter", return_value=None), \
+         patch("integrations.notion.groceries.iter_database_pages", return_value=existing), \
+         patch("integrations.notion.groceries.safe_notion_call", side_effect=lambda fn, **kw: fn(**kw)), \
+         patch("integrations.notion.groceries.mark_stale"), \
+         patch("integrations.notion.groceries.forget_pages"), \
+         patch("app.utils.week_label", return_value="Semaine 46 – 2025"):
+        dry = push_groceries_to_notion(path=mock_groceries_json, clear_week=True, dry_run=True)
+        assert dry["n_created"] == 0
+        mock_client.pages.create.assert_not_called()
+        mock_client.pages.update.assert_not_called()
+        
+        result = push_groceries_to_notion(path=mock_groceries_json, clear_week=True)
+    
+    assert result == {"n_created": 1, "n_updated": 1, "n_skipped": 1, "n_archived": 1, "n_errors": 0}
+    # Poulet créé avec la semaine
+    created = mock_client.pages.create.call_args.kwargs["properties"]
+    assert created["Semaine"] == {"select": {"name": "Semaine 46 – 2025"}}
+    # Quinoa : seule la quantité est envoyée ; Riz archivé ; Sel inchangé
+    updates = {c.kwargs["page_id"]: c.kwargs for c in mock_client.pages.update.call_args_list}
+    assert updates["p_quinoa"]["properties"] == {"Quantité": {"number": 200.0}}
+    assert updates["p_riz"] == {"page_id": "p_riz", "archived": True}
+    assert "p_sel" not in updates
+
+
 # ============================================================================
 # Tests d'intégration (dry-run avec vrais fichiers)
 # ============================================================================
@@ -0,0 +1,115 @@
+"""Tests pour le miroir local des bases Notion (synchro delta)."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from notion_tools import mirror
+
+DB_ID = "0123456789abcdef0123456789abcdef"
+
+
+def _page(page_id, name, edited, archived=False):
+    return {
+        "id": page_id,
+        "url": f"https://notion.so/{page_id}",
+        "created_time": "2025-11-01T10:00:00.000Z",
+        "last_edited_time": edited,
+        "archived": archived,
+        "properties": {"Nom": {"type": "title", "title": [{"plain_text": name}]}},
+    }
+
+
+@pytest.fixture(autouse=True)
+def isolated_mirror(tmp_path):
+    mirror._stale.clear()
+    with patch.object(mirror, "NOTION_MIRROR_DIR", tmp_path), \
+         patch.object(mirror, "NOTION_MIRROR_ENABLED", True):
+        yield tmp_path
+    mirror._stale.clear()
+
+
+def test_read_database_delta_after_full_sync():
+    """Test relecture complète, puis miroir servi tel quel, puis delta après écriture."""
+    full = [_page("p1", "Riz", "2025-11-10T10:00:00.000Z"), _page("p2", "Lait", "2025-11-10T11:00:00.000Z")]
+    delta = [
+        _page("p2", "Lait demi-écrémé", "2025-11-12T09:00:00.000Z"),
+        _page("p3", "Oeufs", "2025-11-12T09:05:00.000Z"),
+    ]
+    calls = []
+
+    def fake_iter(client, database_id, filter=None, sorts=None):
+        calls.append(filter)
+        return iter(full if filter is None else delta)
+
+    with patch.object(mirror, "iter_database_pages", side_effect=fake_iter), \
+         patch.object(mirror, "list_page_ids", return_value={"p1", "p2", "p3"}):
+        first = mirror.read_database(Mock(), DB_ID)
+        second = mirror.read_database(Mock(), DB_ID)
+        assert len(calls) == 1  # miroir récent : aucun appel
+
+        mirror.mark_stale(DB_ID)
+        third = mirror.read_database(Mock(), DB_ID)
+
+    assert [p["Nom"] for p in first] == ["Riz", "Lait"]
+    assert second == first
+    assert calls[1] == {
+        "timestamp": "last_edited_time",
+        "last_edited_time": {"on_or_after": "2025-11-10T11:00:00.000Z"},
+    }
+    assert [p["Nom"] for p in third] == ["Riz", "Lait demi-écrémé", "Oeufs"]
+
+
+def test_archived_pages_leave_the_mirror():
+    """Test qu'une page supprimée dans Notion (absente des requêtes) ou archivée par nous sort du miroir au delta."""
+    full = [_page(f"p{i}", f"Article {i}", "2025-11-10T10:00:00.000Z") for i in range(4)]
+    delta = [_page("p3", "Article 3 modifié", "2025-11-12T09:00:00.000Z")]
+
+    def fake_iter(client, database_id, filter=None, sorts=None):
+        return iter(full if filter is None else delta)
+
+    # p0 mise à la corbeille dans Notion : ni dans le delta, ni dans la liste des IDs
+    with patch.object(mirror, "iter_database_pages", side_effect=fake_iter), \
+         patch.object(mirror, "list_page_ids", return_value={"p2", "p3"}) as mock_ids:
+        mirror.read_database(Mock(), DB_ID)
+        mock_ids.assert_not_called()  # relecture complète : rien à comparer
+        mirror.forget_pages(DB_ID, ["p1"])
+        mirror.mark_stale(DB_ID)
+        pages = mirror.read_database(Mock(), DB_ID)
+
+    assert [p["id"] for p in pages] == ["p2", "p3"]
+    assert pages[1]["Nom"] == "Article 3 modifié"
+
+
+def test_list_page_ids_requests_titles_only():
+    """Test que la liste des IDs ne demande que le titre des pages."""
+    from notion_tools import notion_reader
+
+    responses = [
+        {"results": [{"id": "p1"}], "has_more": True, "next_cursor": "c1"},
+        {"results": [{"id": "p2"}], "has_more": False},
+    ]
+    with patch.object(notion_reader, "get_data_source_id", return_value="ds"), \
+         patch.object(notion_reader, "safe_notion_call", side_effect=responses) as mock_call:
+        ids = notion_reader.list_page_ids(Mock(), DB_ID)
+
+    assert ids == {"p1", "p2"}
+    assert [call.kwargs["query"] for call in mock_call.call_args_list] == [{"filter_properties": ["title"]}] * 2
+    assert mock_call.call_args_list[1].kwargs["body"] == {"start_cursor": "c1"}
+
+
+def test_full_sync_when_mirror_is_old():
+    """Test qu'une relecture complète a lieu après NOTION_MIRROR_FULL_SYNC_HOURS."""
+    filters = []
+
+    def fake_iter(client, database_id, filter=None, sorts=None):
+        filters.append(filter)
+        return iter([_page("p1", "Riz", "2025-11-10T10:00:00.000Z")])
+
+    with patch.object(mirror, "iter_database_pages", side_effect=fake_iter), \
+         patch.object(mirror, "NOTION_MIRROR_FULL_SYNC_HOURS", 0):
+        mirror.read_database(Mock(), DB_ID)
+        mirror.mark_stale(DB_ID)
+        mirror.read_database(Mock(), DB_ID)
+
+    assert filters == [None, None]
@@ -2,13 +2,18 @@
 
 import pytest
 
+from app.normalize import canonical_aliment
 from app.shopping import (
+    GroceryAggregator,
     consolidate_groceries,
     merge_courses,
     normalize_aliment,
     prepare_stock_lookup,
+    split_near_duplicates,
     subtract_stock_from_groceries,
+    _build_stock_index,
     _convert_unit_for_subtraction,
+    _is_available,
 )
 
 
@@ -85,6 +90,129 @@ def test_merge_courses_stock_filtering():
     assert len(poulet_items) == 0
 
 
+def test_is_available_same_decisions_as_full_scan():
+    """Test que l'index du stock donne les mêmes décisions qu'un parcours complet."""
+    import random
+    from difflib import SequenceMatcher
+    
+    rng = random.Random(0)
+    words = [
+        "poulet", "poulets", "tomate", "tomates cerises", "oignon", "oignons rouges",
+        "riz basmati", "riz", "lait", "lait d'avoine", "huile d'olive", "ail", "ails",
+        "pates", "pate", "sel", "poivre noir", "creme fraiche", "beurre", "oeufs",
+    ]
+    stock = words[::2] + ["".join(rng.choice("aeioulnrst") for _ in range(rng.randint(1, 12))) for _ in range(60)]
+    stock_names = {canonical_aliment(name) for name in stock}
+    index = _build_stock_index(stock)
+    
+    queries = words + ["".join(rng.choice("aeioulnrst") for _ in range(rng.randint(1, 12))) for _ in range(200)]
+    for threshold in (0.0, 0.5, 0.75, 0.88, 1.0):
+        for raw in queries:
+            query = canonical_aliment(raw)
+            expected = query in stock_names or any(
+                SequenceMatcher(None, query, candidate).ratio() >= threshold
+                for candidate in stock_names
+            )
+            assert _is_available(raw, index, threshold) == expected, (raw, threshold)
+
+
+def test_merge_courses_merges_synonyms():
+    """Test que les synonymes (FR/EN, pluriels) sont regroupés sans LLM."""
+    courses = [
+        {"Aliment": "Oignon", "Quantité": 1, "Unité": "pc", "Recettes": "Soupe"},
+        {"Aliment": "onions", "Quantité": 2, "Unité": "pc", "Recettes": "Curry"},
+    ]
+    
+    merged = merge_courses(courses)
+    
+    assert len(merged) == 1
+    assert merged[0]["Aliment"] == "Oignon"
+    assert merged[0]["Quantité"] == 3
+    assert merged[0]["Recettes"] == "Curry, Soupe"
+
+
+def test_stock_filtering_uses_synonyms():
+    """Test qu'un aliment en stock sous un autre nom est bien filtré."""
+    recipes = [{"Nom": "Curry", "ingredients": [{"name": "garlic", "amount": 2, "unit": "pc"}]}]
+    
+    assert consolidate_groceries(recipes, stock=[{"Aliment": "Ail"}]) == []
+
+
+def test_canonical_aliment_skips_ambiguous_variants():
+    """Test qu'une variante listée sous deux aliments n'est pas regroupée."""
+    assert canonical_aliment("Tomatoes") == "tomate"
+    assert canonical_aliment("Épinards") == "epinard"
+    assert canonical_aliment("pepper") == "pepper"  # poivron ou poivre ?
+    assert canonical_aliment("quinoa") == "quinoa"
+
+
+def test_split_near_duplicates():
+    """Test que seuls les noms proches sont envoyés au LLM."""
+    courses = [
+        {"Aliment": "Riz", "Quantité": 200, "Unité": "g"},
+        {"Aliment": "Tomates", "Quantité": 3, "Unité": "pc"},
+        {"Aliment": "Tomates cerises", "Quantité": 250, "Unité": "g"},
+        {"Aliment": "Mozzarela", "Quantité": 1, "Unité": "pc"},
+        {"Aliment": "Mozzarella", "Quantité": 125, "Unité": "g"},
+        {"Aliment": "Beurre", "Quantité": 50, "Unité": "g"},
+    ]
+    
+    clear, ambiguous = split_near_duplicates(courses)
+    
+    assert [item["Aliment"] for item in clear] == ["Riz", "Beurre"]
+    assert [item["Aliment"] for item in ambiguous] == [
+        "Tomates", "Tomates cerises", "Mozzarela", "Mozzarella",
+    ]
+
+
+def test_split_near_duplicates_same_canonical_name():
+    """Test que deux items de même nom canonique (liste non fusionnée) partent au LLM."""
+    courses = [
+        {"Aliment": "Tomates", "Quantité": 3, "Unité": "pc"},
+        {"Aliment": "tomate", "Quantité": 200, "Unité": "g"},
+        {"Aliment": "Riz", "Quantité": 200, "Unité": "g"},
+    ]
+    
+    clear, ambiguous = split_near_duplicates(courses)
+    
+    assert [item["Aliment"] for item in clear] == ["Riz"]
+    assert [item["Aliment"] for item in ambiguous] == ["Tomates", "tomate"]
+
+
+def test_split_near_duplicates_nothing_ambiguous():
+    """Test qu'une liste sans noms proches ne nécessite pas le LLM."""
+    courses = merge_courses([
+        {"Aliment": "Oignon", "Quantité": 1, "Unité": "pc"},
+        {"Aliment": "onions", "Quantité": 1, "Unité": "pc"},
+        {"Aliment": "Lait", "Quantité": 1, "Unité": "l"},
+    ])
+    
+    clear, ambiguous = split_near_duplicates(courses)
+    
+    assert ambiguous == []
+    assert len(clear) == 2
+
+
+def test_grocery_aggregator_incremental_batches():
+    """Test qu'agréger par lots donne le même résultat qu'en une fois."""
+    courses = [
+        {"Aliment": "Oignons", "Quantité": 2, "Unité": "pcs", "Recettes": "Soupe"},
+        {"Aliment": "Lait", "Quantité": 500, "Unité": "ml", "Categorie": "liquid"},
+        {"Aliment": "oignon", "Quantité": 1, "Unité": "pcs", "Recettes": "Tarte"},
+        {"Aliment": "Lait", "Quantité": 1, "Unité": "l", "Categorie": "dairy"},
+        {"Aliment": "Sel", "Quantité": None, "Notes": "au goût"},
+    ]
+    aggregator = GroceryAggregator(stock=["sel"])
+    aggregator.add_courses(courses[:2])
+    aggregator.add_courses(courses[2:])
+
+    assert aggregator.results(notes_first=False) == merge_courses(courses, stock=["sel"])
+    assert aggregator.skipped_stock == 1
+    oignon = next(e for e in aggregator.results() if e["Aliment"] == "Oignons")
+    assert oignon["Quantité"] == 3
+    assert oignon["Recettes"] == "Soupe, Tarte"
+
+
 def test_prepare_stock_lookup(tmp_path):
     """Test préparation de l'index de stock."""
     import json
@@ -233,7 +361,7 @@ def test_subtract_stock_from_groceries_default_subtraction():
         {
             "Aliment": "Poulet",
             "Quantité": 100,
-            "Unité": "kg",  # Incompatible avec g
+            "Unité": "pc",  # Incompatible avec g (nombre ≠ masse)
             "Categorie": "durable",
         },
     ]
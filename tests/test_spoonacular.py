@@ -3,7 +3,33 @@
 from unittest.mock import Mock, patch
 import pytest
 
+from app.cache import ResponseCache
 from app.spoonacular import normalize, get_recipe_ingredients_with_quantities
+from app.spoonacular_keys import AllAPIKeysExhaustedError, SpoonacularKeyPool
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path):
+    """Chaque test utilise son propre cache, vide (jamais celui de data/)."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=3600, max_entries=100)
+    with patch('app.spoonacular._response_cache', cache):
+        yield cache
+
+
+def _pool(tmp_path, keys=("test_key",), **kwargs):
+    return SpoonacularKeyPool(keys, state_path=tmp_path / "quota.json", **kwargs)
+
+
+def _response(status_code=200, left=None, used=None, payload=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {}
+    if left is not None:
+        response.headers["X-API-Quota-Left"] = str(left)
+    if used is not None:
+        response.headers["X-API-Quota-Used"] = str(used)
+    response.json.return_value = payload or {"id": 1, "title": "R", "extendedIngredients": []}
+    return response
 
 
 def test_normalize_recipe():
@@ -87,13 +113,13 @@ def test_normalize_recipe_without_id():
     assert "id" not in normalized
 
 
-@patch('app.spoonacular.SPOONACULAR_API_KEY', 'test_key')
 @patch('app.spoonacular.BASE_URL', 'https://api.spoonacular.com')
-@patch('app.spoonacular.requests.get')
+@patch('app.spoonacular.http_client.get')
 @patch('app.spoonacular.retry_http')
 def test_get_recipe_ingredients_with_quantities(
     mock_retry,
     mock_get,
+    tmp_path,
 ):
     """Test récupération des ingrédients avec quantités."""
     # Mock retry_http
@@ -130,7 +156,8 @@ def test_get_recipe_ingredients_with_quantities(
     }
     mock_get.return_value = mock_response
     
-    result = get_recipe_ingredients_with_quantities(123456, portions_multiplier=2.0)
+    with patch('app.spoonacular._key_pool', _pool(tmp_path)):
+        result = get_recipe_ingredients_with_quantities(123456, portions_multiplier=2.0)
     
     assert len(result) == 2
     assert result[0]["name"] == "chicken breast"
@@ -141,12 +168,11 @@ def test_get_recipe_ingredients_with_quantities(
     assert result[1]["amount"] == 4  # 2 * 2
 
 
-@patch('app.spoonacular.SPOONACULAR_API_KEY', None)
-@patch('app.spoonacular.SPOONACULAR_API_KEY2', None)
-def test_get_recipe_ingredients_with_quantities_no_key():
+def test_get_recipe_ingredients_with_quantities_no_key(tmp_path):
     """Test erreur quand aucune clé API."""
-    with pytest.raises(RuntimeError, match="Aucune clé API"):
-        get_recipe_ingredients_with_quantities(123456)
+    with patch('app.spoonacular._key_pool', _pool(tmp_path, keys=())):
+        with pytest.raises(RuntimeError, match="Aucune clé API"):
+            get_recipe_ingredients_with_quantities(123456)
 
 
 def test_normalize_recipe_minimal():
@@ -162,3 +188,121 @@ def test_normalize_recipe_minimal():
     assert "ingredients" in normalized
     assert isinstance(normalized["ingredients"], list)
 
+
+
+def test_key_rate_limiter_spaces_requests_per_key():
+    """Test que le limiteur espace les requêtes d'une même clé, pas entre clés."""
+    from app.spoonacular import _KeyRateLimiter
+    
+    limiter = _KeyRateLimiter(max_per_second=10)  # 100 ms entre deux requêtes
+    with patch('app.spoonacular.time.sleep') as mock_sleep:
+        limiter.wait("key1")
+        limiter.wait("key2")
+        mock_sleep.assert_not_called()
+        
+        limiter.wait("key1")
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args[0][0] <= 0.1
+
+
+def test_response_cache_hit_miss_and_ttl(tmp_path):
+    """Test lecture/écriture du cache et expiration des entrées."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=60)
+    
+    assert cache.get("information", "k") is None
+    cache.set("information", "k", {"id": 1})
+    assert cache.get("information", "k") == {"id": 1}
+    assert cache.get("complexSearch", "k") is None  # namespaces séparés
+    
+    with patch('app.cache.time.time', return_value=10**12):
+        assert cache.get("information", "k") is None  # expirée
+    assert cache.get("information", "k") is None  # et supprimée
+    assert cache.stats() == {"hits": 1, "misses": 4}
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    """Test que les entrées les moins récemment lues sont supprimées en premier."""
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+    
+    with patch('app.cache.time.time', side_effect=[1, 2, 3, 4]):
+        cache.set("ns", "a", 1)
+        cache.set("ns", "b", 2)
+        cache.get("ns", "a")  # "a" devient plus récente que "b"
+        cache.set("ns", "c", 3)
+    
+    assert cache.get("ns", "a") == 1
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "c") == 3
+
+
+@patch('app.spoonacular.http_client.get')
+def test_get_recipe_ingredients_uses_cache(mock_get):
+    """Test qu'une recette vue dans complexSearch ne déclenche pas d'appel /information."""
+    from app.spoonacular import _seed_information_cache
+    
+    _seed_information_cache([
+        {
+            "id": 42,
+            "servings": 2,
+            "extendedIngredients": [
+                {
+                    "nameClean": "rice",
+                    "measures": {"metric": {"amount": 100, "unitShort": "g"}},
+                    "aisle": "Pasta and Rice",
+                },
+            ],
+        },
+    ])
+    
+    result = get_recipe_ingredients_with_quantities(42)
+    
+    mock_get.assert_not_called()
+    assert result[0]["name"] == "rice"
+    assert result[0]["amount"] == 100
+
+
+def test_key_pool_routes_to_most_headroom_and_keeps_widget_key(tmp_path):
+    """Test que les courses prennent la clé la plus fournie hors clé du widget, le widget toutes les clés."""
+    pool = _pool(tmp_path, keys=("k1", "k2", "k3"), widget_keys=1)
+    pool.record("k2", _response(left=10, used=140))
+    pool.record("k3", _response(left=90, used=60))
+    pool.record("k1", _response(left=120, used=30))
+
+    assert pool.acquire() == "k3"
+    assert pool.acquire("widget") == "k1"
+
+    # Une seule clé configurée : les courses peuvent utiliser celle du widget
+    assert _pool(tmp_path / "seule", keys=("k1",)).acquire() == "k1"
+
+
+def test_key_pool_persists_usage_until_daily_reset(tmp_path):
+    """Test que le solde lu dans les en-têtes est gardé sur disque jusqu'à minuit UTC."""
+    day = 1_700_000_000 - 1_700_000_000 % 86400
+    with patch('app.spoonacular_keys.time.time', return_value=day + 3600):
+        _pool(tmp_path, keys=("k1", "k2")).record("k1", _response(left=0, used=150))
+
+        reloaded = _pool(tmp_path, keys=("k1", "k2"))
+        assert reloaded.headroom("k1") == 0
+        assert reloaded.acquire("widget") == "k2"
+    assert "k1" not in (tmp_path / "quota.json").read_text(encoding="utf-8")
+
+    with patch('app.spoonacular_keys.time.time', return_value=day + 86400 + 60):
+        assert _pool(tmp_path, keys=("k1", "k2"), daily_quota=150).headroom("k1") == 150
+
+
+@patch('app.spoonacular.http_client.get')
+def test_exhausted_keys_are_skipped_without_request(mock_get, tmp_path):
+    """Test qu'un 402 marque la clé vide et qu'aucune requête ne part quand toutes le sont."""
+    pool = _pool(tmp_path, keys=("k1", "k2"), widget_keys=0)
+    mock_get.side_effect = [_response(status_code=402), _response(left=40, used=110)]
+
+    with patch('app.spoonacular._key_pool', pool), patch('app.spoonacular.time.sleep'):
+        get_recipe_ingredients_with_quantities(1)
+        assert [call.kwargs["params"]["apiKey"] for call in mock_get.call_args_list] == ["k1", "k2"]
+        assert pool.headroom("k1") == 0 and pool.headroom("k2") == 40
+
+        pool.record("k2", _response(status_code=402))
+        mock_get.reset_mock()
+        with pytest.raises(AllAPIKeysExhaustedError):
+            get_recipe_ingredients_with_quantities(2)
+    mock_get.assert_not_called()
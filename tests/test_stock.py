@@ -0,0 +1,80 @@
+"""Tests pour le snapshot compact du stock."""
+
+import json
+from unittest.mock import patch
+
+from app import stock as stock_module
+from app.shopping import _build_stock_index, prepare_stock_lookup, subtract_stock_from_groceries
+from app.stock import STOCK_SNAPSHOT_FORMAT, StockItem, load_snapshot, write_snapshot
+
+
+SCHEMA = {
+    "Aliment": {"type": "title"},
+    "Quantite": {"type": "number"},
+    "Unité": {"type": "rich_text"},
+    "Categorie": {"type": "select"},
+}
+
+
+def test_snapshot_stores_schema_once(tmp_path):
+    """Test que le schéma est écrit une seule fois, pas une fois par article."""
+    pages = [
+        {"id": f"p{i}", "Aliment": f"Article {i}", "Quantite": i, "Unité": "g", "Categorie": "épicerie"}
+        for i in range(50)
+    ]
+    items = [StockItem.from_dict(page, quantity_key="Quantite") for page in pages]
+    path = tmp_path / "stock.json"
+    write_snapshot(path, items, SCHEMA)
+
+    raw = path.read_text(encoding="utf-8")
+    data = json.loads(raw)
+    assert data["format"] == STOCK_SNAPSHOT_FORMAT
+    assert data["schema"] == SCHEMA
+    assert raw.count('"rich_text"') == 1
+    assert data["rows"][3] == ["p3", "Article 3", "article 3", 3.0, "g", "épicerie"]
+
+    loaded = load_snapshot(path)
+    assert loaded == items
+    assert loaded[3]["Aliment"] == "Article 3"
+    assert loaded[3].get("Quantité") == 3.0
+
+
+def test_load_snapshot_skips_normalization_when_synonyms_unchanged(tmp_path):
+    """Test que les noms normalisés du snapshot sont repris tels quels."""
+    path = tmp_path / "stock.json"
+    write_snapshot(path, [StockItem(name="Oignons", norm="oignon")], SCHEMA)
+
+    with patch.object(stock_module, "canonical_aliment") as mock_canonical:
+        loaded = load_snapshot(path)
+    mock_canonical.assert_not_called()
+    assert loaded[0].norm == "oignon"
+
+    # Synonymes modifiés depuis l'écriture : on renormalise
+    with patch.object(stock_module, "synonyms_fingerprint", return_value="autre"), \
+         patch.object(stock_module, "canonical_aliment", return_value="oignon jaune"):
+        assert load_snapshot(path)[0].norm == "oignon jaune"
+
+
+def test_legacy_stock_list_still_loads(tmp_path):
+    """Test que l'ancien stock.json (liste de dicts avec __schema__) se relit."""
+    path = tmp_path / "stock.json"
+    legacy = [
+        {"id": "p1", "Aliment": "Riz", "Quantite": 500.0, "Unité": "g", "__schema__": SCHEMA},
+        {"id": "p2", "Aliment": "", "__schema__": SCHEMA},
+    ]
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+
+    items = prepare_stock_lookup(path)
+
+    assert items == [StockItem(name="Riz", norm="riz", qty=500.0, unit="g", page_id="p1")]
+
+
+def test_stock_items_feed_lookups():
+    """Test que l'index et la soustraction utilisent les StockItem directement."""
+    items = [StockItem(name="Riz basmati", norm="riz basmati", qty=200, unit="g", category="épicerie")]
+
+    assert "riz basmati" in _build_stock_index(items)
+    result = subtract_stock_from_groceries(
+        [{"Aliment": "Riz basmati", "Quantité": 500, "Unité": "g"}], items
+    )
+    assert result[0]["Quantité"] == 300
@@ -0,0 +1,159 @@
+"""Tests pour le store local DuckDB."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app import shopping, store
+from app.shopping import merge_courses, subtract_stock_from_groceries
+from app.stock import StockItem, write_snapshot
+from app.store import LocalStore
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    return LocalStore(tmp_path / "food.duckdb")
+
+
+def test_groceries_are_stored_per_week(local_store):
+    """Test qu'une semaine se remplace sans toucher aux autres."""
+    local_store.replace_groceries("Semaine 46 – 2025", "achats", [
+        {"Aliment": "Oignons", "Quantité": 2, "Unité": "pcs"},
+        {"Aliment": "Lait", "Quantité": "1,5", "Unité": "l"},
+    ])
+    local_store.replace_groceries("Semaine 47 – 2025", "achats", [
+        {"Aliment": "oignon", "Quantité": 1, "Unité": "pcs"},
+    ])
+    local_store.replace_groceries("Semaine 46 – 2025", "achats", [
+        {"Aliment": "Oignons", "Quantité": 3, "Unité": "pcs"},
+    ])
+
+    assert local_store.load_groceries("Semaine 46 – 2025") == [
+        {"Aliment": "Oignons", "Quantité": 3, "Unité": "pcs"},
+    ]
+    # Historique par aliment canonique ("Oignons" et "oignon" sont le même aliment)
+    history = local_store.purchase_history("oignon")
+    assert [(h["semaine"], h["quantite"]) for h in history] == [
+        ("Semaine 46 – 2025", 3.0),
+        ("Semaine 47 – 2025", 1.0),
+    ]
+
+
+def test_write_is_all_or_nothing(local_store):
+    """Test qu'une écriture en erreur laisse les données précédentes intactes."""
+    local_store.replace_stock([{"Aliment": "Riz", "Quantité": 500, "Unité": "g"}])
+
+    with pytest.raises(TypeError):
+        local_store.replace_stock([{"Aliment": "Pâtes", "Quantité": 1, "Unité": "kg", "x": object()}])
+
+    assert local_store.load_stock() == [{"Aliment": "Riz", "Quantité": 500, "Unité": "g"}]
+
+
+def test_sql_joins_with_stock(local_store):
+    """Test des requêtes SQL : courses hors stock, totaux, recettes par spoon_id."""
+    local_store.replace_stock([{"Aliment": "lait", "Quantité": 1, "Unité": "l"}])
+    local_store.replace_groceries("S46", "achats", [
+        {"Aliment": "Lait", "Quantité": 1, "Unité": "l"},
+        {"Aliment": "Tomates", "Quantité": 2, "Unité": "pcs"},
+        {"Aliment": "tomate", "Quantité": 1, "Unité": "pcs"},
+    ])
+    local_store.replace_recipes("S46", [{"Nom": "Soupe", "spoon_id": 123}])
+
+    assert [g["Aliment"] for g in local_store.groceries_not_in_stock("S46")] == ["Tomates", "tomate"]
+    totals = {t["aliment"]: t["quantite"] for t in local_store.weekly_totals("S46")}
+    assert totals == {"lait": 1.0, "tomate": 3.0}
+    assert local_store.recipe_weeks(123) == ["S46"]
+
+
+def test_grocery_category_from_pipeline_output(local_store):
+    """Test que la catégorie des listes du pipeline ("Categorie") est bien rangée en colonne."""
+    merged = merge_courses([
+        {"Aliment": "Riz basmati", "Quantité": 200, "Unité": "g", "Categorie": "Épicerie"},
+        {"Aliment": "Lait", "Quantité": 1, "Unité": "l", "Categorie": "Frais"},
+    ])
+    assert all("Categorie" in item for item in merged)
+    local_store.replace_groceries("S46", "achats", merged)
+
+    rows = local_store._query("SELECT aliment, categorie FROM groceries ORDER BY position")
+    assert sorted(rows) == [("Lait", "Frais"), ("Riz basmati", "Épicerie")]
+
+
+def test_subtraction_joins_stock_in_sql(local_store):
+    """Test que la soustraction via le store (jointure SQL) donne le même résultat qu'en mémoire."""
+    stock = [
+        StockItem(name="Riz", norm="riz", qty=0.2, unit="kg", category="Épicerie"),
+        StockItem(name="Lait", norm="lait", qty=1, unit="l", category="Frais"),
+        StockItem(name="Pâtes", norm="pates", category="Épicerie"),
+    ]
+    local_store.replace_stock(stock)
+
+    def groceries():
+        return [
+            {"Aliment": "riz", "Quantité": 500, "Unité": "g"},
+            {"Aliment": "Lait", "Quantité": 1, "Unité": "l"},
+            {"Aliment": "Pâtes", "Quantité": 500, "Unité": "g"},
+            {"Aliment": "Tomates", "Quantité": 3, "Unité": "pc"},
+        ]
+
+    assert local_store.join_stock(["riz", "tomate", ""]) == [
+        {"categorie": "épicerie", "qty": 0.2, "unit": "kg"}, None, None,
+    ]
+    with patch.object(shopping, "_stock_lookup") as mock_lookup:
+        via_store = subtract_stock_from_groceries(groceries(), store=local_store)
+    mock_lookup.assert_not_called()
+    assert [g["Quantité"] for g in via_store] == [300, 1, 300, 3]
+    assert via_store == subtract_stock_from_groceries(groceries(), stock)
+
+
+def test_prepare_stock_lookup_reads_store_when_newer(tmp_path, local_store):
+    """Test que le stock par défaut est lu dans le store s'il est plus récent que le JSON."""
+    stock_file = tmp_path / "stock.json"
+    stock_file.write_text(json.dumps([{"Aliment": "Ancien"}]), encoding="utf-8")
+    os.utime(stock_file, (0, 0))
+    local_store.replace_stock([{"Aliment": "Nouveau"}])
+
+    with patch.object(shopping, "DEFAULT_STOCK_PATH", stock_file), \
+         patch.object(shopping, "get_store", return_value=local_store):
+        assert [item["Aliment"] for item in shopping.prepare_stock_lookup()] == ["Nouveau"]
+        # Un autre fichier que le snapshot par défaut est lu tel quel
+        other = tmp_path / "other.json"
+        other.write_text(json.dumps([{"Aliment": "Autre"}]), encoding="utf-8")
+        assert [item["Aliment"] for item in shopping.prepare_stock_lookup(other)] == ["Autre"]
+
+
+def test_prepare_stock_lookup_from_store_keeps_normalized_names(tmp_path, local_store):
+    """Test que le stock relu depuis le store garde les noms normalisés tant que les synonymes sont les mêmes."""
+    stock_file = tmp_path / "stock.json"
+    items = [StockItem(name="Oignons jaunes", norm="oignon", qty=3, unit="pc", category="Frais", page_id="p1")]
+    write_snapshot(stock_file, items)
+    os.utime(stock_file, (0, 0))
+    local_store.replace_stock(items)
+
+    with patch.object(shopping, "DEFAULT_STOCK_PATH", stock_file), \
+         patch.object(shopping, "get_store", return_value=local_store), \
+         patch.object(store, "canonical_aliment") as mock_canonical:
+        assert shopping.prepare_stock_lookup() == items
+    mock_canonical.assert_not_called()
+
+    # Synonymes modifiés depuis l'écriture : on renormalise
+    with patch.object(shopping, "DEFAULT_STOCK_PATH", stock_file), \
+         patch.object(shopping, "get_store", return_value=local_store), \
+         patch.object(store, "synonyms_fingerprint", return_value="autre"), \
+         patch.object(store, "canonical_aliment", return_value="oignon jaune"):
+        assert shopping.prepare_stock_lookup()[0].norm == "oignon jaune"
+
+
+def test_record_never_raises(local_store):
+    """Test qu'une erreur du store n'interrompt pas le pipeline."""
+    with patch.object(store, "get_store", return_value=local_store):
+        assert store.record("replace_groceries", "S46", "inconnu", []) is False
+        assert store.record("replace_recipes", "S46", [{"Nom": "Soupe"}]) is True
+
+
+def test_record_is_noop_without_duckdb():
+    """Test que record() ne fait rien quand duckdb n'est pas installé."""
+    with patch.object(store, "duckdb", None), patch.object(store, "_store", None):
+        assert store.get_store() is None
+        assert store.record("replace_recipes", "S46", [{"Nom": "Soupe"}]) is False
@@ -0,0 +1,95 @@
+"""Tests pour la mesure des durées (--profile)."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app import tracing
+from app.dag import Stage, run_stages
+from app.retry import retry_with_backoff
+
+
+@pytest.fixture(autouse=True)
+def _reset_tracing():
+    yield
+    tracing.disable()
+
+
+def test_span_is_noop_when_disabled():
+    """Test qu'aucune mesure n'est gardée tant que la mesure est désactivée."""
+    tracing.enable()
+    tracing.disable()
+
+    with tracing.span("notion:pages.create", cat="notion") as measure:
+        measure.set(status=200)
+
+    @tracing.traced()
+    def work():
+        return 42
+
+    assert work() == 42
+    assert tracing.span("x") is tracing.span("y")
+    assert tracing.events() == []
+
+
+def test_nested_spans_and_chrome_trace(tmp_path):
+    """Test que les spans imbriqués sont écrits au format Chrome trace, sans double compte par catégorie."""
+    tracing.enable()
+    with tracing.span("sync", cat="notion"):
+        with tracing.span("notion:pages.update", cat="notion", page="p1"):
+            pass
+    with pytest.raises(ValueError):
+        with tracing.span("openai:choose_recipes", cat="openai"):
+            raise ValueError("boom")
+
+    path = tracing.write_chrome_trace(tmp_path / "trace.json")
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    complete = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert set(complete) == {"sync", "notion:pages.update", "openai:choose_recipes"}
+    assert complete["notion:pages.update"]["args"] == {"page": "p1"}
+    assert complete["openai:choose_recipes"]["args"] == {"error": "ValueError"}
+    inner, outer = complete["notion:pages.update"], complete["sync"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in trace["traceEvents"])
+
+    nested = {event["name"]: event["nested"] for event in tracing.events()}
+    assert nested == {"sync": False, "notion:pages.update": True, "openai:choose_recipes": False}
+    text = tracing.summary()
+    assert "notion:pages.update" in text
+    assert "- notion:" in text and "(2 appels)" in text
+
+
+def test_stages_and_retry_backoff_are_measured():
+    """Test que chaque étape du graphe et chaque attente de retry produisent un span."""
+    calls = []
+
+    @retry_with_backoff(max_attempts=2, base_delay=0.0)
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("reset")
+        return "ok"
+
+    tracing.enable()
+    with patch("app.retry.time.sleep"):
+        run_stages([
+            Stage("a", lambda results: flaky()),
+            Stage("b", lambda results: results["a"] * 2, ("a",)),
+        ], max_parallel=2)
+
+    recorded = {(event["name"], event["cat"]) for event in tracing.events()}
+    assert {("a", "stage"), ("b", "stage"), ("retry.backoff", "retry")} <= recorded
+
+
+def test_profiling_writes_trace_even_on_error(tmp_path, capsys):
+    """Test que --profile écrit la trace et le résumé même si le bloc échoue."""
+    path = tmp_path / "profile.trace.json"
+    with pytest.raises(RuntimeError):
+        with tracing.profiling(path):
+            with tracing.span("spoonacular:GET /recipes/complexSearch", cat="spoonacular"):
+                raise RuntimeError("quota")
+
+    assert not tracing.is_enabled()
+    assert json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    assert "spoonacular" in capsys.readouterr().out
@@ -0,0 +1,56 @@
+"""Tests pour le registre des unités."""
+
+import pytest
+
+from app.shopping import merge_courses
+from app.units import MASS, VOLUME, canonical_unit, conversion_factor, convert, unit_dimension, unit_label
+
+
+def test_aliases_resolve_to_one_symbol():
+    """Test que les alias français/anglais, pluriels et accents donnent le même symbole."""
+    assert {canonical_unit(u) for u in ("g", "grammes", "Gramme", "grams")} == {"g"}
+    assert {canonical_unit(u) for u in ("pièces", "pc", "pcs", "unité")} == {"pc"}
+    assert {canonical_unit(u) for u in ("Tbsp", "tablespoons", "cuillères à soupe", "cuil. à soupe")} == {"tbsp"}
+    assert canonical_unit("boîte") == "boite"
+    assert unit_dimension("kilos") == MASS
+    assert unit_dimension("cl") == VOLUME
+    assert unit_dimension("boîte") is None
+
+
+def test_factors_cover_all_pairs_of_a_dimension():
+    """Test que les paires non déclarées sont déduites par fermeture transitive."""
+    assert conversion_factor("kg", "g") == 1000.0
+    assert conversion_factor("g", "kg") == pytest.approx(0.001)
+    assert conversion_factor("l", "tbsp") == pytest.approx(1000 / 15)
+    assert convert(2, "cuillères à soupe", "cuil. à café") == pytest.approx(6)
+    assert convert(1, "lb", "oz") == pytest.approx(453.59 / 28.35)
+    # Dimensions différentes : pas de conversion
+    assert conversion_factor("g", "ml") is None
+    assert convert(1, "pc", "g") is None
+    # Unité inconnue mais identique
+    assert conversion_factor("boîtes", "Boîtes") == 1.0
+
+
+def test_unit_label_for_notion():
+    """Test des libellés envoyés à Notion."""
+    assert unit_label("tablespoons") == "cuil. à soupe"
+    assert unit_label("pieces") == "pièce"
+    assert unit_label("Pincée") == "pincee"
+    assert unit_label("") == ""
+
+
+def test_merge_courses_converts_same_dimension():
+    """Test que des unités compatibles fusionnent en une quantité, sans note libre."""
+    merged = merge_courses([
+        {"Aliment": "Lait", "Quantité": 500, "Unité": "ml"},
+        {"Aliment": "lait", "Quantité": 1, "Unité": "l"},
+        {"Aliment": "Farine", "Quantité": 200, "Unité": "g"},
+        {"Aliment": "farine", "Quantité": 2, "Unité": "tbsp"},
+    ])
+    lait = next(e for e in merged if e["Aliment"] == "Lait")
+    assert (lait["Quantité"], lait["Unité"]) == (1500, "ml")
+    assert "Notes" not in lait
+    # Masse et volume restent séparés dans les notes
+    farine = next(e for e in merged if e["Aliment"] == "Farine")
+    assert farine["Quantité"] == ""
+    assert farine["Notes"] == "200.0 g + 2.0 tbsp"
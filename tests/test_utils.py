@@ -37,7 +37,7 @@ def test_week_label_format():
     assert parts[1].isdigit()
 
 
-@patch('app.utils.requests.post')
+@patch('app.utils.http_client.post')
 @patch('app.utils.NTFY_TOPIC', 'test-topic')
 def test_notify_ntfy_success(mock_post):
     """Test notification ntfy réussie."""
@@ -54,7 +54,7 @@ def test_notify_ntfy_success(mock_post):
     assert call_args[1]["data"] == b"Test Body"
 
 
-@patch('app.utils.requests.post')
+@patch('app.utils.http_client.post')
 @patch('app.utils.NTFY_TOPIC', 'test-topic')
 def test_notify_ntfy_error(mock_post):
     """Test notification ntfy avec erreur."""
@@ -3,7 +3,9 @@
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 
+from app.spoonacular import AllAPIKeysExhaustedError
 from app.workflow_courses import (
+    fetch_ingredients_for_recipes,
     get_selected_recipes_this_week,
     generate_courses_from_selection,
 )
@@ -105,6 +107,36 @@ def test_get_selected_recipes_this_week_default_portions(
     assert result[0]["portions"] == 2  # Défaut
 
 
+@patch('app.workflow_courses.get_client')
+@patch('app.workflow_courses.export_database')
+@patch('app.workflow_courses.normalize_id')
+@patch('app.workflow_courses.property_filter')
+def test_get_selected_recipes_this_week_filters_server_side(
+    mock_property_filter,
+    mock_normalize_id,
+    mock_export,
+    mock_get_client,
+    mock_client,
+):
+    """Test que Semaine et Sélectionnée sont filtrées par Notion."""
+    mock_normalize_id.return_value = "db_id"
+    mock_get_client.return_value = mock_client
+    mock_export.return_value = []
+    mock_property_filter.side_effect = lambda client, db, names, op, value=None: {
+        "property": names[0], "op": op, "value": value
+    }
+    
+    get_selected_recipes_this_week("Semaine 46 – 2025")
+    
+    query_filter = mock_export.call_args.kwargs["filter"]
+    assert query_filter == {
+        "and": [
+            {"property": "Semaine", "op": "equals", "value": "Semaine 46 – 2025"},
+            {"property": "Sélectionnée", "op": "equals", "value": True},
+        ]
+    }
+
+
 @patch('app.workflow_courses.get_selected_recipes_this_week')
 @patch('app.workflow_courses.get_recipe_ingredients_with_quantities')
 @patch('app.workflow_courses.fetch_stock')
@@ -215,3 +247,48 @@ def test_generate_courses_from_selection_no_spoon_id(
     assert result["n_selected"] == 1
     assert result["n_items"] == 0
 
+
+
+@patch('app.workflow_courses.get_recipe_ingredients_with_quantities')
+def test_fetch_ingredients_for_recipes_keeps_recipe_order(mock_get_ingredients):
+    """Test que la récupération parallèle garde l'ordre des recettes."""
+    import time
+    
+    def fake_fetch(spoon_id, desired_portions=2):
+        # La première recette répond en dernier
+        time.sleep(0.05 if spoon_id == 1 else 0.0)
+        return [{"name": f"ing_{spoon_id}", "amount": desired_portions}]
+    
+    mock_get_ingredients.side_effect = fake_fetch
+    recipes = [
+        {"name": "R1", "spoon_id": 1, "portions": 2},
+        {"name": "Sans ID", "spoon_id": None},
+        {"name": "R2", "spoon_id": 2, "portions": 4},
+    ]
+    
+    ingredients, exhausted = fetch_ingredients_for_recipes(recipes, max_workers=4)
+    
+    assert exhausted is False
+    assert [ing["name"] for ing in ingredients] == ["ing_1", "ing_2"]
+    assert mock_get_ingredients.call_count == 2
+
+
+@patch('app.workflow_courses.get_recipe_ingredients_with_quantities')
+def test_fetch_ingredients_for_recipes_stops_when_keys_exhausted(mock_get_ingredients):
+    """Test qu'aucune nouvelle requête ne part après AllAPIKeysExhaustedError."""
+    mock_get_ingredients.side_effect = [
+        [{"name": "ing_1"}],
+        AllAPIKeysExhaustedError("quota"),
+        [{"name": "ing_3"}],
+    ]
+    recipes = [
+        {"name": "R1", "spoon_id": 1},
+        {"name": "R2", "spoon_id": 2},
+        {"name": "R3", "spoon_id": 3},
+    ]
+    
+    ingredients, exhausted = fetch_ingredients_for_recipes(recipes, max_workers=1)
+    
+    assert exhausted is True
+    assert ingredients == [{"name": "ing_1"}]
+    assert mock_get_ingredients.call_count == 2